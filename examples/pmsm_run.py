@@ -12,6 +12,7 @@
     # What are geometry constraints: diameter, length
     # RPM from NDARC
 
+import os
 import numpy as np
 from math import pi
 import matplotlib.pyplot as plt
@@ -19,6 +20,7 @@ import matplotlib.pyplot as plt
 import openmdao.api as om
 
 from rad_motor.motor import Motor, print_motor
+from rad_motor.design_cache import DesignCache
 
 if __name__ == "__main__":
     p = om.Problem()
@@ -128,7 +130,11 @@ if __name__ == "__main__":
         p.model.connect('gap', f'{motor_path}.gap')
 
     # On-Design Function, to size the motor
-    p.model.add_subsystem('DESIGN', Motor(num_nodes=nn, design=True))
+    # set RAD_MOTOR_DESIGN_CACHE to a directory to cache converged sizing solutions there,
+    # reruns with the same DES inputs then skip the Newton solve
+    cache_dir = os.environ.get('RAD_MOTOR_DESIGN_CACHE')
+    design_cache = DesignCache(cache_dir) if cache_dir else None
+    p.model.add_subsystem('DESIGN', Motor(num_nodes=nn, design=True, design_cache=design_cache))
     motor_spec_connect('DESIGN')
     p.model.connect('DES:rpm', 'DESIGN.rpm')
     p.model.connect('DES:I', 'DESIGN.I')
@@ -0,0 +1,5 @@
+import sys
+
+from rad_motor.cli import console_main
+
+sys.exit(console_main())
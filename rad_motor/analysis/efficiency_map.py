@@ -0,0 +1,179 @@
+# Adaptive (quadtree) efficiency maps over rpm x I.
+# Cells are refined where a contour level crosses them or where bilinear interpolation of the
+# cell misses the evaluated midpoints (curvature). Every refinement level is one batch.
+
+from __future__ import absolute_import
+import numpy as np
+
+
+class EfficiencyMap(object):
+
+    def __init__(self, x, y, z, cells, levels):
+        self.rpm = x            # scattered evaluation points
+        self.I = y
+        self.Eff = z
+        self.cells = cells      # leaf cells, (n, 4) point indices: (x0,y0), (x1,y0), (x1,y1), (x0,y1)
+        self.levels = levels
+
+    @property
+    def n_evals(self):
+        return self.Eff.size
+
+    def contour(self, level):
+        """Marching squares over the leaf cells, returns line segments of shape (k, 2, 2) in (rpm, I)."""
+        x, y, z = self.rpm[self.cells], self.I[self.cells], self.Eff[self.cells] - level
+        segments = []
+        for edges in _cell_crossings(x, y, z):
+            segments.extend(edges)
+        return np.array(segments).reshape(-1, 2, 2)
+
+    def contours(self):
+        return {level: self.contour(level) for level in self.levels}
+
+    def to_grid(self, rpm, I):
+        """Eff on the rpm x I mesh, linearly interpolated from the scattered points (for plt.contour/imshow)."""
+        from scipy.interpolate import griddata
+        X, Y = np.meshgrid(rpm, I)
+        xs, ys = self._scale(X, Y)
+        return griddata(np.column_stack(self._scale(self.rpm, self.I)), self.Eff, (xs, ys), method='linear')
+
+    def _scale(self, x, y):
+        return ((x - self.rpm.min())/np.ptp(self.rpm), (y - self.I.min())/np.ptp(self.I))
+
+
+def _cell_crossings(x, y, z):
+    # yields the segments of every cell that the zero level crosses
+    crosses = (z.min(axis=1) < 0) & (z.max(axis=1) >= 0)
+    for cx, cy, cz in zip(x[crosses], y[crosses], z[crosses]):
+        pts = []
+        for a, b in ((0, 1), (1, 2), (2, 3), (3, 0)):
+            if (cz[a] < 0) != (cz[b] < 0):
+                t = cz[a] / (cz[a] - cz[b])
+                pts.append((cx[a] + t*(cx[b] - cx[a]), cy[a] + t*(cy[b] - cy[a])))
+        if len(pts) == 2:
+            yield [pts]
+        elif len(pts) == 4:
+            # saddle, connect around the corner that shares the sign of the cell centre
+            if (cz.mean() < 0) == (cz[0] < 0):
+                yield [[pts[0], pts[1]], [pts[2], pts[3]]]
+            else:
+                yield [[pts[3], pts[0]], [pts[1], pts[2]]]
+
+
+def adaptive_map(func, x_range, y_range, levels=None, coarse=8, max_level=4, tol=1e-3, contour_tol=None):
+    """
+    Quadtree sampling of z = func(x, y) (vectorized) on x_range x y_range.
+
+    Starts from a coarse x coarse grid of cells and splits cells up to max_level times
+    where the bilinear error estimate exceeds tol, or contour_tol (default tol/4) for cells
+    that a contour level crosses. Each pass evaluates all new points of that level in a
+    single call to func.
+    """
+    if contour_tol is None:
+        contour_tol = tol/4
+
+    N = coarse * 2**max_level     # finest lattice, points are integer (i, j) on it
+    index = {}
+    xs, ys, zs = [], [], []
+    z_all = [np.empty(0)]
+
+    def lattice_to_xy(ij):
+        ij = np.asarray(ij, dtype=float)
+        return (x_range[0] + (x_range[1] - x_range[0]) * ij[:, 0] / N,
+                y_range[0] + (y_range[1] - y_range[0]) * ij[:, 1] / N)
+
+    def evaluate(ij):
+        ij = [p for p in dict.fromkeys(ij) if p not in index]
+        if not ij:
+            return
+        x, y = lattice_to_xy(ij)
+        z = np.asarray(func(x, y), dtype=float)
+        for p in ij:
+            index[p] = len(index)
+        xs.append(x)
+        ys.append(y)
+        zs.append(z)
+        z_all[0] = np.concatenate(zs)
+
+    def values(ij):
+        return z_all[0][[index[p] for p in ij]]
+
+    # coarse grid
+    size = 2**max_level
+    grid = [(i*size, j*size) for j in range(coarse+1) for i in range(coarse+1)]
+    evaluate(grid)
+    Z = values(grid).reshape(coarse+1, coarse+1)
+
+    if levels is None:
+        levels = np.linspace(np.nanmin(Z), np.nanmax(Z), 12)[1:-1]
+    levels = np.atleast_1d(levels)
+
+    # curvature indicator for the coarse cells from second differences at the corners,
+    # (|d2z/dx2| + |d2z/dy2|) h**2 / 8 is the bilinear error at the cell centre
+    d2 = np.zeros_like(Z)
+    d2[:, 1:-1] += np.abs(Z[:, 2:] - 2*Z[:, 1:-1] + Z[:, :-2])
+    d2[1:-1, :] += np.abs(Z[2:, :] - 2*Z[1:-1, :] + Z[:-2, :])
+    d2[:, 0] = d2[:, 1]
+    d2[:, -1] = d2[:, -2]
+    d2[0, :] = np.maximum(d2[0, :], d2[1, :])
+    d2[-1, :] = np.maximum(d2[-1, :], d2[-2, :])
+    d2 /= 8
+
+    cells = {}
+    for j in range(coarse):
+        for i in range(coarse):
+            cells[(i*size, j*size, size)] = d2[j:j+2, i:i+2].max()
+
+    for level in range(max_level):
+        refine = []
+        for cell, err in cells.items():
+            z = values(_corners(cell))
+            crossed = np.any((z.min() < levels) & (z.max() >= levels))
+            if err > (contour_tol if crossed else tol):
+                refine.append(cell)
+        if not refine:
+            break
+
+        new_points = []
+        for i, j, s in refine:
+            h = s//2
+            new_points.extend([(i+h, j), (i+s, j+h), (i+h, j+s), (i, j+h), (i+h, j+h)])
+        evaluate(new_points)
+
+        for cell in refine:
+            i, j, s = cell
+            h = s//2
+            c = values(_corners(cell))
+            mid = values([(i+h, j), (i+s, j+h), (i+h, j+s), (i, j+h), (i+h, j+h)])
+            bilinear = np.array([c[0]+c[1], c[1]+c[2], c[2]+c[3], c[3]+c[0], c.sum()/2]) / 2
+            err = np.abs(mid - bilinear).max() / 4      # bilinear error is O(h**2), so a child sees a quarter
+            del cells[cell]
+            for ci, cj in ((i, j), (i+h, j), (i+h, j+h), (i, j+h)):
+                cells[(ci, cj, h)] = err
+
+    x, y, z = np.concatenate(xs), np.concatenate(ys), np.concatenate(zs)
+    leaves = np.array([[index[p] for p in _corners(cell)] for cell in cells], dtype=int)
+    return EfficiencyMap(x, y, z, leaves, levels)
+
+
+def _corners(cell):
+    i, j, s = cell
+    return [(i, j), (i+s, j), (i+s, j+s), (i, j+s)]
+
+
+def efficiency_map(evaluator, rpm_range, I_range, P_shaft=None, **kwargs):
+    """
+    Adaptive efficiency map of an off-design motor, evaluator is an OffDesignEvaluator
+    carrying the DESIGN geometry.
+
+    With P_shaft=None every point runs at the shaft power its current can produce,
+    P_shaft = Tq_max*omega, otherwise P_shaft is held at the given value as in the DOE of pmsm_run.py.
+    """
+    def eff(rpm, I):
+        if P_shaft is not None:
+            return evaluator.evaluate(rpm=rpm, I=I, P_shaft=P_shaft)['Eff']
+        res = evaluator.evaluate(outputs=('Tq_max', 'omega', 'P_wire', 'P_steinmetz'), rpm=rpm, I=I)
+        P_out = res['Tq_max'] * res['omega']
+        return P_out / (P_out + res['P_wire'] + res['P_steinmetz'])
+
+    return adaptive_map(eff, rpm_range, I_range, **kwargs)
@@ -0,0 +1,98 @@
+# Torque-speed envelope of a sized motor.
+# At every rpm node the limiting current is the smaller of the current-density limit and the
+# current at which winding + iron losses reach the thermal limit. The thermal current is found
+# by bisection over all unresolved nodes at once, one off-design batch per iteration.
+# Nodes whose iron losses alone exceed the thermal limit have no feasible current and return nan.
+
+from __future__ import absolute_import
+from collections import namedtuple
+import numpy as np
+
+Envelope = namedtuple('Envelope', ['rpm', 'I', 'Tq', 'P_shaft', 'P_loss', 'limit'])
+
+LIMIT_J = 'J'
+LIMIT_THERMAL = 'thermal'
+LIMIT_INFEASIBLE = 'infeasible'
+
+OUTPUTS = ('Tq_max', 'omega', 'P_wire', 'P_steinmetz')
+
+
+def limiting_current(evaluator, rpm, I_max, P_loss_max=None, xtol=1e-3, maxiter=60):
+    """
+    Largest current at each rpm node with I <= I_max and P_wire + P_steinmetz <= P_loss_max.
+    Returns (I, limit, outputs at I); I and the outputs are nan at LIMIT_INFEASIBLE nodes, where
+    the losses at I = 0 already exceed P_loss_max.
+    """
+    rpm = np.atleast_1d(np.asarray(rpm, dtype=float))
+    I_max = np.broadcast_to(np.asarray(I_max, dtype=float), rpm.shape).copy()
+    P_loss_max = None if P_loss_max is None else np.broadcast_to(np.asarray(P_loss_max, dtype=float), rpm.shape)
+
+    res = evaluator.evaluate(outputs=OUTPUTS, rpm=rpm, I=I_max)
+    I = I_max
+    limit = np.full(rpm.shape, LIMIT_J, dtype=object)
+    if P_loss_max is None:
+        return I, limit, res
+
+    P_loss = res['P_wire'] + res['P_steinmetz']
+    hot = P_loss > P_loss_max
+    limit[hot] = LIMIT_THERMAL
+    lo = np.zeros(rpm.shape)
+    hi = I_max.copy()
+    lo[~hot] = hi[~hot]
+
+    idx = np.flatnonzero(hot)
+    infeasible = np.zeros(rpm.shape, dtype=bool)
+    if idx.size:
+        r = evaluator.evaluate(outputs=('P_wire', 'P_steinmetz'), rpm=rpm[idx], I=np.zeros(idx.size))
+        infeasible[idx] = r['P_wire'] + r['P_steinmetz'] > P_loss_max[idx]
+        limit[infeasible] = LIMIT_INFEASIBLE
+        idx = idx[~infeasible[idx]]
+
+    for _ in range(maxiter):
+        if idx.size == 0:
+            break
+        mid = (lo[idx] + hi[idx]) / 2
+        r = evaluator.evaluate(outputs=('P_wire', 'P_steinmetz'), rpm=rpm[idx], I=mid)
+        over = r['P_wire'] + r['P_steinmetz'] > P_loss_max[idx]
+        hi[idx[over]] = mid[over]
+        lo[idx[~over]] = mid[~over]
+        idx = idx[hi[idx] - lo[idx] > xtol]
+
+    # lower bracket is always feasible
+    I = lo
+    if hot.any():
+        res = evaluator.evaluate(outputs=OUTPUTS, rpm=rpm, I=I)
+    if infeasible.any():
+        I[infeasible] = np.nan
+        for val in res.values():
+            val[infeasible] = np.nan
+    return I, limit, res
+
+
+def envelope(evaluator, rpm, I_max, P_loss_max=None, **kwargs):
+    I, limit, res = limiting_current(evaluator, rpm, I_max, P_loss_max, **kwargs)
+    rpm = np.atleast_1d(np.asarray(rpm, dtype=float))
+    return Envelope(rpm, I, res['Tq_max'], res['Tq_max']*res['omega'], res['P_wire'] + res['P_steinmetz'], limit)
+
+
+def torque_speed_envelope(evaluator, rpm, J_per_A, J_cont, J_peak, P_loss_cont=None, P_loss_peak=None, **kwargs):
+    """
+    Continuous and peak envelopes of the motor carried by evaluator (an OffDesignEvaluator
+    with the DESIGN geometry), solved together as one set of 2*len(rpm) nodes.
+
+    J_per_A is the RMS current density per amp of the design, DESIGN J / DESIGN I in A/mm**2/A,
+    J_cont and J_peak the current-density limits and P_loss_cont, P_loss_peak the allowed total
+    losses in W (None for no thermal limit).
+    """
+    rpm = np.atleast_1d(np.asarray(rpm, dtype=float))
+    n = rpm.size
+    I_max = np.concatenate([np.full(n, J_cont / J_per_A), np.full(n, J_peak / J_per_A)])
+    if P_loss_cont is None and P_loss_peak is None:
+        P_loss_max = None
+    else:
+        P_loss_max = np.concatenate([np.full(n, np.inf if P_loss_cont is None else P_loss_cont),
+                                     np.full(n, np.inf if P_loss_peak is None else P_loss_peak)])
+
+    env = envelope(evaluator, np.concatenate([rpm, rpm]), I_max, P_loss_max, **kwargs)
+    return {'continuous': Envelope(*[v[:n] for v in env]),
+            'peak': Envelope(*[v[n:] for v in env])}
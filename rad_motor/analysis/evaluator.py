@@ -0,0 +1,156 @@
+# Batch evaluation of an off-design Motor over arbitrary numbers of operating points.
+# A Problem is set up once per padded batch size and reused, so a study that sends
+# batches of varying length only pays for setup a handful of times.
+
+from __future__ import absolute_import
+import numpy as np
+
+import openmdao.api as om
+
+from rad_motor.motor import Motor
+from rad_motor.solvers import SolveStatus, newton_converged
+
+# outputs of a DESIGN motor that an off-design motor needs, in the units the off-design inputs use
+GEOMETRY = ('rot_or', 'sta_mass', 'w_slot', 'w_t')
+GEOMETRY_UNITS = {'rot_or': 'm', 'sta_mass': 'kg', 'w_slot': 'm', 'w_t': 'm'}
+
+NODE_INPUTS = ('rpm', 'I', 'P_shaft')
+
+
+def set_inputs(prob, inputs):
+    # inputs: {name: value or (value, units)}
+    for name, val in inputs.items():
+        if isinstance(val, tuple):
+            prob.set_val(name, val[0], units=val[1])
+        else:
+            prob.set_val(name, val)
+
+
+class OffDesignEvaluator(object):
+
+    def __init__(self, inputs=None, backend='numpy', min_nodes=16, max_nodes=2**16, vectorize_params=()):
+        # inputs: {promoted Motor input: value or (value, units)}, applied to every batch
+        # vectorize_params: Motor.VECTORIZABLE_PARAMS that evaluate takes per node, like rpm and I
+        self.inputs = dict(inputs or {})
+        self.backend = backend
+        self.vectorize_params = tuple(vectorize_params)
+        self.min_nodes = min_nodes
+        self.max_nodes = max_nodes
+        self.n_evals = 0
+        self._problems = {}
+
+    def set_inputs(self, **inputs):
+        self.inputs.update(inputs)
+        for p in self._problems.values():
+            self._apply_inputs(p)
+
+    def _apply_inputs(self, p):
+        set_inputs(p, self.inputs)
+
+    def _batch_size(self, n):
+        nn = self.min_nodes
+        while nn < n:
+            nn *= 2
+        return min(nn, self.max_nodes)
+
+    def problem(self, nn):
+        if nn not in self._problems:
+            p = om.Problem()
+            p.model.add_subsystem('motor', Motor(num_nodes=nn, design=False, backend=self.backend,
+                                                   vectorize_params=self.vectorize_params), promotes=['*'])
+            p.setup()
+            p.final_setup()
+            self._apply_inputs(p)
+            self._problems[nn] = p
+        return self._problems[nn]
+
+    def names(self):
+        """promoted variable names that evaluate can return"""
+        meta = self.problem(self.min_nodes).model.get_io_metadata(metadata_keys=['units'])
+        return set(m['prom_name'] for m in meta.values())
+
+    def evaluate(self, outputs=('Eff',), units=None, **node_inputs):
+        """
+        Run the motor at every operating point in node_inputs (rpm, I, P_shaft and any
+        vectorize_params; arrays or scalars that broadcast together) and return {output: array}
+        in the output's units unless overridden in units.
+        """
+        units = units or {}
+        arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float)) for v in node_inputs.values()])
+        node_vals = dict(zip(node_inputs, arrays))
+        n = arrays[0].size if arrays else 1
+
+        results = {name: np.empty(n) for name in outputs}
+        start = 0
+        while start < n:
+            nn = self._batch_size(n - start)
+            stop = min(start + nn, n)
+            p = self.problem(nn)
+
+            for name, val in node_vals.items():
+                chunk = np.empty(nn)
+                chunk[:stop-start] = val[start:stop]
+                chunk[stop-start:] = val[stop-1]      # pad with the last point so every node is valid
+                p.set_val(name, chunk)
+
+            p.run_model()
+            self.n_evals += stop - start
+
+            for name in outputs:
+                results[name][start:stop] = p.get_val(name, units=units.get(name))[:stop-start]
+            start = stop
+
+        return results
+
+
+def design_problem(backend='numpy', iprint=-1, design_cache=None, safeguard=False, sizing_budget=None):
+    """
+    Set up a standalone DESIGN Motor problem. It can be sized repeatedly with size_motor(prob=...);
+    design_cache (a DesignCache) reuses converged sizing solutions across calls and runs.
+    safeguard and sizing_budget are the Motor options, sizing_status reports the outcome.
+    """
+    p = om.Problem()
+    p.model.add_subsystem('motor', Motor(num_nodes=1, design=True, backend=backend, design_cache=design_cache,
+                                         safeguard=safeguard, sizing_budget=sizing_budget), promotes=['*'])
+    p.setup()
+    p.model.motor.sizing.nonlinear_solver.options['iprint'] = iprint
+    return p
+
+
+def size_motor(inputs=None, rot_or=6.8, backend='numpy', iprint=-1, design_cache=None, prob=None):
+    """
+    Solve a standalone DESIGN Motor; inputs as for OffDesignEvaluator, rot_or is the initial guess in cm.
+    prob is a design_problem to reuse, the other arguments are then ignored.
+    """
+    p = prob or design_problem(backend, iprint, design_cache)
+    set_inputs(p, inputs or {})
+    outputs = p.model._outputs
+    if outputs is not None:
+        # a failed solve leaves nan in the sizing loop (B_g feeds back into the geometry), restart those from the defaults
+        for name, meta in p.model._var_abs2meta['output'].items():
+            if not np.all(np.isfinite(outputs[name])):
+                outputs[name] = meta['val']
+    p['rot_or'] = rot_or
+    p.run_model()
+    return p
+
+
+def sizing_status(prob, motor_path='motor'):
+    """
+    SolveStatus of the last sizing solve of a DESIGN Motor. Without safeguard the code is 'newton',
+    'cached' or 'failed' and the time is not measured.
+    """
+    solver = prob.model._get_subsystem(f'{motor_path}.sizing' if motor_path else 'sizing').nonlinear_solver
+    if getattr(solver, 'status', None) is not None:
+        return solver.status
+    if getattr(solver, '_cache_hit', False):
+        return SolveStatus('cached', True, 0, 0, np.nan)
+    converged = newton_converged(solver)
+    return SolveStatus('newton' if converged else 'failed', converged, solver._iter_count, 0, np.nan)
+
+
+def design_geometry(prob, motor_path=''):
+    """Geometry of a converged DESIGN motor as OffDesignEvaluator inputs."""
+    if motor_path:
+        motor_path += '.'
+    return {name: (prob.get_val(f'{motor_path}{name}', units=units).copy(), units) for name, units in GEOMETRY_UNITS.items()}
@@ -0,0 +1,65 @@
+# Material grade sweeps at a fixed geometry.
+# Every (magnet, steel, conductor) combination and operating point is one node of a single
+# off-design Motor with the material inputs vectorized, so the sweep is one model evaluation
+# no matter how many grades are compared.
+
+from __future__ import absolute_import
+import itertools
+from collections import namedtuple
+import numpy as np
+
+from openmdao.utils.units import convert_units
+
+from rad_motor.analysis.evaluator import OffDesignEvaluator
+from rad_motor.materials import registry
+from rad_motor.motor import VECTORIZABLE_PARAMS
+
+GradeSweep = namedtuple('GradeSweep', ['magnet', 'steel', 'conductor', 'results'])
+
+# Motor inputs set per node from the grades
+GRADE_PARAMS = ('Br_20', 'T_coef_rem_mag', 'mu_r_mag', 'alpha_stein', 'beta_stein', 'k_stein', 'B_pk', 'sta_mass',
+                'resistivity_wire', 'T_coeff_cu')
+
+
+def grade_sweep(geometry, magnets=('N48H',), steels=('Hiperco-50',), conductors=('Cu',), outputs=('Eff',),
+                design_steel='Hiperco-50', inputs=None, backend='numpy', **node_inputs):
+    """
+    Evaluate the motor with geometry (as returned by design_geometry) for every combination of
+    the magnet, steel and conductor grades at the operating points in node_inputs (rpm, I,
+    P_shaft and optionally T_mag, T_windings).
+
+    The stator mass is rescaled by the density of each steel relative to design_steel, the
+    steel the geometry was sized with. Returns a GradeSweep with the grades of every combination
+    and results[output] of shape (n_combinations, n_points).
+    """
+    combos = list(itertools.product([registry.magnet(g) for g in magnets],
+                                    [registry.steel(g) for g in steels],
+                                    [registry.conductor(g) for g in conductors]))
+
+    geometry = dict(geometry)
+    sta_mass = geometry.pop('sta_mass')
+    if isinstance(sta_mass, tuple):
+        sta_mass = convert_units(np.asarray(sta_mass[0], dtype=float), sta_mass[1], 'kg')
+    rho_design = registry.steel(design_steel).rho
+
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float)) for v in node_inputs.values()])
+    n_pts = arrays[0].size if arrays else 1
+
+    grade_vals = {name: np.empty(len(combos)) for name in GRADE_PARAMS}
+    for i, (mag, st, cond) in enumerate(combos):
+        for name, val in dict(mag.motor_inputs(), **st.motor_inputs(), **cond.motor_inputs()).items():
+            grade_vals[name][i] = val
+        grade_vals['sta_mass'][i] = sta_mass * st.rho / rho_design
+
+    nodes = {name: np.repeat(val, n_pts) for name, val in grade_vals.items()}
+    nodes.update({name: np.tile(val, len(combos)) for name, val in zip(node_inputs, arrays)})
+
+    vec_params = GRADE_PARAMS + tuple(name for name in node_inputs if name in VECTORIZABLE_PARAMS and name not in GRADE_PARAMS)
+    n = len(combos) * n_pts
+    evaluator = OffDesignEvaluator(dict(inputs or {}, **geometry), backend=backend, min_nodes=n, max_nodes=n,
+                                   vectorize_params=vec_params)
+    res = evaluator.evaluate(outputs=outputs, **nodes)
+
+    return GradeSweep(np.array([c[0].grade for c in combos]), np.array([c[1].grade for c in combos]),
+                      np.array([c[2].grade for c in combos]),
+                      {name: val.reshape(len(combos), n_pts) for name, val in res.items()})
@@ -0,0 +1,78 @@
+# Many off-design scenarios (cycles, temperatures, currents) of one sized motor, on a thread pool.
+# The geometry is read from the converged DESIGN once and every scenario takes the same read-only
+# arrays. Each worker thread keeps its own OffDesignEvaluators, one per set of scenario inputs like
+# the server does, since a Problem can not be shared between threads; set-up is paid once per
+# thread and input layout, and the runs of different scenarios overlap wherever NumPy releases
+# the GIL, which is most of the time of the per-node components at large num_nodes.
+
+from __future__ import absolute_import
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from rad_motor.motor import VECTORIZABLE_PARAMS
+from rad_motor.analysis.evaluator import OffDesignEvaluator, NODE_INPUTS, design_geometry
+
+
+def _frozen(val):
+    val = np.array(val, dtype=float)
+    val.setflags(write=False)
+    return val
+
+
+class ScenarioPool(object):
+    """
+    Off-design evaluation of the motor sized by design, a converged DESIGN problem (the Motor at
+    motor_path) or the design_geometry of one, on max_workers threads.
+    """
+
+    def __init__(self, design, motor_path='', max_workers=None, backend='numpy', max_nodes=2**16):
+        geometry = design if isinstance(design, dict) else design_geometry(design, motor_path)
+        self.geometry = {name: (_frozen(val), units) for name, (val, units) in geometry.items()}
+        self.backend = backend
+        self.max_nodes = max_nodes
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scenario')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+    def _evaluator(self, shared, nodes):
+        evaluators = getattr(self._local, 'evaluators', None)
+        if evaluators is None:
+            evaluators = self._local.evaluators = {}
+        key = (tuple(sorted(shared)), tuple(sorted(nodes)))
+        if key not in evaluators:
+            evaluators[key] = OffDesignEvaluator(self.geometry, backend=self.backend, max_nodes=self.max_nodes,
+                                                 vectorize_params=[name for name in nodes if name not in NODE_INPUTS])
+        return evaluators[key]
+
+    def _run(self, inputs, outputs, units):
+        # NODE_INPUTS and arrays of VECTORIZABLE_PARAMS are per node, the rest is set once
+        nodes, shared = {}, {}
+        for name, val in inputs.items():
+            value, val_units = val if isinstance(val, tuple) else (val, None)
+            if name in NODE_INPUTS or (name in VECTORIZABLE_PARAMS and np.ndim(value) > 0):
+                if val_units is not None:
+                    raise ValueError(f"per-node input '{name}' of a scenario has to be given in the Motor's units")
+                nodes[name] = value
+            else:
+                shared[name] = val
+        ev = self._evaluator(shared, nodes)
+        ev.set_inputs(**shared)
+        return ev.evaluate(outputs=outputs, units=units, **nodes)
+
+    def evaluate(self, scenarios, outputs=('Eff',), units=None):
+        """
+        Run every scenario, {name: {input: value or (value, units)}} of off-design Motor inputs, and
+        return {name: {output: array over the scenario's nodes}} in the order of scenarios.
+        """
+        futures = {name: self._executor.submit(self._run, inputs, tuple(outputs), units)
+                   for name, inputs in scenarios.items()}
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,154 @@
+# Feasibility screening of DESIGN candidates before the sizing solve.
+# Sizing finds the rotor radius at which the slot area gives the target current density J_tgt,
+# so every converged design has slot_area = A_req = 2*sqrt(2)*n_turns*I/(k_wb*J_tgt). The screen
+# checks, with the closed form geometry of MotorSizeComp, whether any rotor radius with
+# rot_ir > 0 and s_d > 0 can reach that slot area. The air gap flux density, which the geometry
+# scales with, depends on the geometry itself through Carters coefficient; the screen only uses
+# bounds on it that it tightens over a few passes, so a candidate is only rejected when no
+# design can exist, never because of an estimate.
+
+from __future__ import absolute_import
+from collections import namedtuple
+import numpy as np
+
+from rad_motor.analysis.evaluator import size_motor, sizing_status
+
+# reason codes, index into REASONS
+FEASIBLE, ROT_IR, S_D, SLOT_AREA, FILL = range(5)
+REASONS = ('feasible',
+           'rot_ir',       # the rotor yoke is wider than the rotor, rot_ir <= 0 for every rotor radius
+           's_d',          # no rotor radius with rot_ir > 0 leaves room for the stator, s_d <= 0
+           'slot_area',    # the slots can not get large enough for J_tgt, slot_area < A_req
+           'fill')         # the copper is larger than the slot sized for J_tgt, A_cu > slot_area
+
+# DESIGN Motor inputs the screen reads, with the units it works in
+SCREEN_INPUTS = {'radius_motor': 'm', 'gap': 'm', 'k': None, 'b_ry': 'T', 'b_sy': 'T', 'b_t': 'T', 'n_m': None,
+                 't_mag': 'm', 'n_slots': None, 'n_turns': None, 'I': 'A', 'k_wb': None, 'Br_20': 'T',
+                 'T_coef_rem_mag': None, 'T_mag': None, 'mu_r_mag': None, 'k_sat': None, 'n_strands': None,
+                 'r_strand': 'm'}
+
+Screen = namedtuple('Screen', ['feasible', 'reason', 'rot_or', 'B_g'])
+
+
+def _quad_max(c2, c1, c0, lo, hi):
+    # max of c2*x**2 + c1*x + c0 over [lo, hi]
+    f = lambda x: (c2*x + c1)*x + c0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_v = np.clip(np.where(c2 < 0, -c1/(2*c2), lo), lo, hi)
+    return np.maximum(np.maximum(f(lo), f(hi)), f(x_v))
+
+
+def screen_designs(prob, motor_path='', n_pass=4, **cases):
+    """
+    Screen DESIGN candidates. cases are arrays (or scalars that broadcast) of the SCREEN_INPUTS
+    that vary between candidates, in the units of SCREEN_INPUTS; the other inputs and J_tgt are
+    read from prob, a DESIGN Motor problem such as design_problem(). Names the screen does not use
+    are ignored.
+
+    Returns a Screen with the feasible mask, the reason code of every candidate (see REASONS) and
+    the brackets (n, 2) of rot_or [m] and B_g [T] that a converged design has to lie in.
+    """
+    if motor_path:
+        motor_path += '.'
+    v = {}
+    for name, units in SCREEN_INPUTS.items():
+        # read from the source, several components take most of these inputs
+        v[name] = cases[name] if name in cases else prob.get_val(prob.model.get_source(f'{motor_path}{name}'), units=units)[0]
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(val, dtype=float)) for val in v.values()])
+    v = dict(zip(v, arrays))
+    J_tgt = prob.get_val(f'{motor_path}J_tgt', units='A/m**2')[0]
+
+    R, gap, t_mag, n_slots = v['radius_motor'], v['gap'], v['t_mag'], v['n_slots']
+    reason = np.zeros(R.size, dtype=int)
+
+    A_req = 2*np.sqrt(2)*v['n_turns']*v['I']/(v['k_wb']*J_tgt)
+    A_cu = v['n_turns']*v['n_strands']*2*np.pi*v['r_strand']**2
+    reason[A_cu > A_req] = FILL
+
+    # w_sy = a*B_g*rot_or, w_ry = c*B_g*rot_or, w_t = t*B_g*rot_or
+    a = np.pi/(v['n_m']*v['k']*v['b_sy'])
+    c = np.pi/(v['n_m']*v['k']*v['b_ry'])
+    t = 2*np.pi/(n_slots*v['k']*v['b_t'])
+
+    # B_g = Br/(1 + mu_r_mag*k_sat*gap*carters_coef/t_mag) and carters_coef >= 1
+    Br = v['Br_20']*(1 + v['T_coef_rem_mag']/100*(v['T_mag'] - 20))
+    B_g = lambda carters: Br/(1 + v['mu_r_mag']*v['k_sat']*gap*carters/t_mag)
+    g_mag = gap + t_mag/Br
+    B_lo, B_hi = np.zeros_like(R), B_g(1.)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(n_pass):
+            # the geometry is most permissive at the lowest B_g: rot_ir > 0 and s_d > 0 bound the rotor radius
+            r_lo = t_mag/(1 - c*B_lo)
+            r_hi = (R - gap)/(1 + a*B_lo)
+            # converged slots: w_slot = A_req/s_d, and w_slot <= 2*pi*R/n_slots as the slot lies in the annulus
+            s_d_hi = R - gap - r_lo*(1 + a*B_lo)
+            w_slot_lo = A_req/s_d_hi
+            w_slot_hi = np.pi*(R + r_hi + gap - a*B_lo*r_lo)/n_slots - 1.05*t*B_lo*r_lo
+            w_t_lo, w_t_hi = t*B_lo*r_lo, t*B_hi*r_hi
+            # bounds of the carters_coef expression in CartersComp
+            x = lambda w_slot: np.pi*w_slot/(4*g_mag)
+            cc_hi = w_t_hi/(w_slot_lo + w_t_hi) + (w_slot_hi + w_t_hi)*np.pi/(4*g_mag*np.log1p(x(w_slot_lo)))
+            cc_lo = w_t_lo/(w_slot_hi + w_t_lo) + (w_slot_lo + w_t_lo)*np.pi/(4*g_mag*np.log1p(x(w_slot_hi)))
+            ok = (w_slot_lo > 0) & (w_slot_hi > w_slot_lo)
+            B_lo = np.where(ok, np.maximum(B_lo, B_g(cc_hi)), B_lo)
+            B_hi = np.where(ok, np.minimum(B_hi, B_g(np.maximum(cc_lo, 1.))), B_hi)
+
+        r_lo = t_mag/(1 - c*B_lo)
+        r_hi = (R - gap)/(1 + a*B_lo)
+
+        # slot_area = pi*((R - w_sy)**2 - (rot_or + gap)**2)/n_slots - 1.05*w_t*s_d. The annulus term falls
+        # with B_g, the tooth term is concave in B_g, so its least value over the bracket is at an end
+        c0 = np.pi*(R**2 - gap**2)/n_slots
+        area_max = np.full_like(R, -np.inf)
+        for B_t in (B_lo, B_hi):
+            aB, tB, aT = a*B_lo, t*B_t, a*B_t
+            c2 = np.pi*(aB**2 - 1)/n_slots + 1.05*tB*(1 + aT)
+            c1 = -2*np.pi*(R*aB + gap)/n_slots - 1.05*tB*(R - gap)
+            area_max = np.maximum(area_max, _quad_max(c2, c1, c0, r_lo, r_hi))
+
+    reason[area_max < A_req] = SLOT_AREA
+    reason[~(r_lo < r_hi)] = S_D
+    reason[~(c*B_lo < 1)] = ROT_IR
+
+    return Screen(reason == FEASIBLE, reason, np.column_stack([r_lo, r_hi]), np.column_stack([B_lo, B_hi]))
+
+
+def size_designs(prob, outputs=('Eff',), units=None, screen=True, catalog=None, **cases):
+    """
+    Size every candidate in cases (arrays that broadcast, any DESIGN Motor inputs with units as
+    SCREEN_INPUTS for the ones the screen reads) with prob, a design_problem. Candidates that
+    screen_designs rejects are not solved. Returns {output: array} with nan for rejected and
+    unconverged candidates, 'reason', the screen reason codes, and 'status', the SOLVE_CODES code
+    of every solve ('screened' for rejected candidates).
+    With a DesignCatalog every solve starts from the rot_or of the nearest catalog design and the
+    converged designs are added to the catalog.
+    """
+    units = units or {}
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(val, dtype=float)) for val in cases.values()])
+    cases = dict(zip(cases, arrays))
+    n = arrays[0].size if arrays else 1
+
+    if screen:
+        reason = screen_designs(prob, **cases).reason
+    else:
+        reason = np.zeros(n, dtype=int)
+
+    results = {name: np.full(n, np.nan) for name in outputs}
+    status = np.full(n, 'screened', dtype=object)
+    base = catalog.design_point(prob) if catalog is not None else None
+    for i in np.flatnonzero(reason == FEASIBLE):
+        rot_or = 6.8
+        if catalog is not None:
+            rot_or = catalog.rot_or_guess(dict(base, **{name: val[i] for name, val in cases.items() if name in base}))
+        p = size_motor({name: (val[i], SCREEN_INPUTS.get(name)) for name, val in cases.items()}, rot_or=rot_or, prob=prob)
+        st = sizing_status(p)
+        status[i] = st.code
+        if st.converged and catalog is not None:
+            catalog.add(p)
+        if st.converged:
+            for name in outputs:
+                results[name][i] = p.get_val(name, units=units.get(name)).ravel()[0]
+    results['reason'] = reason
+    results['status'] = status
+    return results
@@ -0,0 +1,109 @@
+# Total derivatives of off-design outputs over an rpm x I map with respect to DESIGN inputs.
+# The map is one MotorArray motor whose nodes are the map points, so the DESIGN sizing solve is
+# shared by all of them. A scalar input (a motor spec or sizing input) is a dense column of the
+# total jacobian, an operating point input only reaches its own node (a diagonal block). The
+# simultaneous derivative coloring is built from that known structure instead of probing full
+# jacobians. In fwd mode the whole map takes one linear solve per scalar input plus one per
+# operating point input, however many points the map has. In rev mode a scalar input couples
+# every row, so rev is only used (and only accepted) when all the inputs are operating point
+# inputs; it then takes one solve per output.
+
+from __future__ import absolute_import
+from collections import namedtuple
+import numpy as np
+
+import openmdao.api as om
+
+from rad_motor.motor import SIZING_PARAMS
+from rad_motor.motor_array import MotorArray, SCHEDULE_INPUTS
+from rad_motor.analysis.evaluator import set_inputs
+
+SensitivityMap = namedtuple('SensitivityMap', ['rpm', 'I', 'values', 'derivs', 'n_solves'])
+
+DEFAULT_WRT = ('t_mag', 'radius_motor', 'n_turns', 'stack_length')
+
+
+def _model_name(name):
+    # sizing inputs only exist on the DESIGN motor, the rest are promoted by MotorArray
+    return f'DESIGN0.{name}' if name in SIZING_PARAMS else name
+
+
+def _colored_totals(p, sparsity, mode):
+    # total jacobian as an array with the simultaneous coloring of sparsity, and the number of linear
+    # solves. Coloring a problem from a known sparsity is private in OpenMDAO (3.16.0), if that API
+    # is not there the totals are computed uncolored.
+    try:
+        from openmdao.utils.coloring import _compute_coloring, _get_response_info, _get_desvar_info
+        coloring = _compute_coloring(sparsity, mode)
+        coloring._row_vars, coloring._row_var_sizes = _get_response_info(p.driver, None, True)
+        coloring._col_vars, coloring._col_var_sizes = _get_desvar_info(p.driver, None, True)
+        p.driver._coloring_info['coloring'] = coloring
+    except (ImportError, AttributeError, TypeError, KeyError):
+        return p.compute_totals(return_format='array'), sparsity.shape[1 if mode == 'fwd' else 0]
+    return p.compute_totals(return_format='array'), coloring.total_solves()
+
+
+def sensitivity_map(rpm, I, P_shaft=14000., of=('Eff',), wrt=DEFAULT_WRT, inputs=None, backend='numpy', mode='auto'):
+    """
+    d(of)/d(wrt) at every point of the rpm x I mesh (np.meshgrid(rpm, I), shape (len(I), len(rpm)))
+    of a motor sized by its DESIGN motor. of are off-design Motor outputs, wrt are motor spec
+    inputs (t_mag, n_turns, ...), sizing inputs (radius_motor, k_wb, ...), the DESIGN point
+    ('DESIGN0.I', ...) or the operating point (rpm, I, P_shaft; the derivative at each point wrt
+    its own value). inputs {name: value or (value, units)} set the motor, with the same names.
+    P_shaft is a scalar or an array shaped like the map.
+
+    mode 'auto' picks fwd, or rev when every wrt is an operating point input and there are fewer
+    of than wrt. rev raises a ValueError if a wrt is a scalar input, its solves would grow with
+    the number of points.
+
+    Returns a SensitivityMap with the values {of: map}, the derivs {(of, wrt): map} and the
+    number of linear solves the derivatives took.
+    """
+    per_node = [name in SCHEDULE_INPUTS for name in wrt]
+    if mode == 'auto':
+        mode = 'rev' if all(per_node) and len(of) < len(wrt) else 'fwd'
+    elif mode == 'rev' and not all(per_node):
+        raise ValueError(f'mode rev takes one solve per output and map point for the scalar inputs '
+                         f'{[name for name, pn in zip(wrt, per_node) if not pn]}, use fwd')
+
+    rpm, I = np.asarray(rpm, dtype=float), np.asarray(I, dtype=float)
+    R, C = np.meshgrid(rpm, I)
+    shape, n = R.shape, R.size
+
+    p = om.Problem()
+    p.model.add_subsystem('array', MotorArray(num_motors=1, num_nodes=n, backend=backend), promotes=['*'])
+    for name in wrt:
+        p.model.add_design_var(_model_name(name))
+    for name in of:
+        p.model.add_constraint(f'motors.{name}')
+    p.setup(mode=mode)
+    p.model.array.DESIGN0.sizing.nonlinear_solver.options['iprint'] = -1
+
+    p['DESIGN0.rot_or'] = 6.8
+    set_inputs(p, {_model_name(name): val for name, val in (inputs or {}).items()})
+    p['rpm'], p['I'] = R.ravel(), C.ravel()
+    p['P_shaft'] = np.broadcast_to(P_shaft, shape).ravel()
+    p.run_model()
+
+    values = {name: p.get_val(f'motors.{name}').reshape(shape) for name in of}
+    if not wrt:
+        return SensitivityMap(rpm, I, values, {}, 0)
+
+    # structural sparsity, rows are the of outputs node by node, columns the wrt in order
+    sizes = [n if pn else 1 for pn in per_node]
+    offsets = np.cumsum([0] + sizes)
+    sparsity = np.zeros((len(of)*n, offsets[-1]), dtype=bool)
+    for j, pn in enumerate(per_node):
+        for i in range(len(of)):
+            block = sparsity[i*n:(i + 1)*n, offsets[j]:offsets[j + 1]]
+            block[...] = np.eye(n, dtype=bool) if pn else True
+
+    J, n_solves = _colored_totals(p, sparsity, mode)
+
+    derivs = {}
+    for i, name in enumerate(of):
+        rows = J[i*n:(i + 1)*n]
+        for j, w in enumerate(wrt):
+            block = rows[:, offsets[j]:offsets[j + 1]]
+            derivs[name, w] = (np.diagonal(block) if per_node[j] else block[:, 0]).reshape(shape)
+    return SensitivityMap(rpm, I, values, derivs, n_solves)
@@ -0,0 +1,114 @@
+# Checkpointed off-design sweeps.
+# A study directory holds the case table (cases.npz) and one file per completed batch
+# (batch_NNNNNN.npz with the case indices and outputs). Every file is written to a temporary
+# file and moved into place, so an interrupted run leaves either a whole batch or none of it,
+# and a restarted run only evaluates the cases that no batch covers yet.
+
+from __future__ import absolute_import
+import os
+import glob
+import json
+import numpy as np
+
+from rad_motor.file_utils import atomic_write, save_npz
+
+CASES_FILE = 'cases.npz'
+META_FILE = 'study.json'
+BATCH_PATTERN = 'batch_%06d.npz'
+
+
+class SweepStudy(object):
+    """
+    Off-design cases and their results stored under path, created if it does not exist.
+    outputs are the Motor outputs recorded for every case; an existing study must be
+    reopened with the same outputs.
+    """
+
+    def __init__(self, path, outputs=('Eff',)):
+        self.path = path
+        self.outputs = tuple(outputs)
+        os.makedirs(path, exist_ok=True)
+
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if tuple(meta['outputs']) != self.outputs:
+                raise ValueError(f"study at {path} records outputs {meta['outputs']}, not {list(self.outputs)}")
+        else:
+            atomic_write(meta_path, lambda f: f.write(json.dumps({'outputs': self.outputs}).encode()))
+
+        cases_path = os.path.join(path, CASES_FILE)
+        if os.path.exists(cases_path):
+            with np.load(cases_path) as data:
+                self.cases = {name: data[name] for name in data.files}
+        else:
+            self.cases = {}
+
+        self._results = {name: np.full(self.n_cases, np.nan) for name in self.outputs}
+        self._done = np.zeros(self.n_cases, dtype=bool)
+        self._n_batches = 0
+        for batch in sorted(glob.glob(os.path.join(path, 'batch_*.npz'))):
+            with np.load(batch) as data:
+                idx = data['index']
+                self._done[idx] = True
+                for name in self.outputs:
+                    self._results[name][idx] = data[name]
+            self._n_batches += 1
+
+    @property
+    def n_cases(self):
+        return next(iter(self.cases.values())).size if self.cases else 0
+
+    @property
+    def done(self):
+        return self._done.copy()
+
+    def add_cases(self, **node_inputs):
+        """
+        Append cases (arrays or scalars that broadcast together) to the study; the input
+        names must match the ones the study already has. Returns the indices of the new cases.
+        """
+        if self.cases and set(node_inputs) != set(self.cases):
+            raise ValueError(f"study cases have inputs {sorted(self.cases)}, not {sorted(node_inputs)}")
+
+        arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float)) for v in node_inputs.values()])
+        start = self.n_cases
+        cases = {name: np.concatenate([self.cases.get(name, np.empty(0)), val.ravel()])
+                 for name, val in zip(node_inputs, arrays)}
+        save_npz(os.path.join(self.path, CASES_FILE), **cases)
+        self.cases = cases
+
+        n_new = self.n_cases - start
+        self._done = np.concatenate([self._done, np.zeros(n_new, dtype=bool)])
+        for name in self.outputs:
+            self._results[name] = np.concatenate([self._results[name], np.full(n_new, np.nan)])
+        return np.arange(start, self.n_cases)
+
+    def run(self, evaluator, batch_size=4096, max_batches=None):
+        """
+        Evaluate the unfinished cases with evaluator (an OffDesignEvaluator), checkpointing
+        every batch_size cases. Stops early after max_batches batches. Returns the number of
+        cases evaluated.
+        """
+        todo = np.flatnonzero(~self._done)
+        n_run = 0
+        for k, start in enumerate(range(0, todo.size, batch_size)):
+            if max_batches is not None and k >= max_batches:
+                break
+            idx = todo[start:start+batch_size]
+            res = evaluator.evaluate(outputs=self.outputs, **{name: val[idx] for name, val in self.cases.items()})
+
+            save_npz(os.path.join(self.path, BATCH_PATTERN % self._n_batches), index=idx, **res)
+            self._n_batches += 1
+            self._done[idx] = True
+            for name in self.outputs:
+                self._results[name][idx] = res[name]
+            n_run += idx.size
+        return n_run
+
+    def results(self):
+        """{input or output: array over all cases}; outputs of unfinished cases are nan"""
+        res = {name: val.copy() for name, val in self.cases.items()}
+        res.update({name: val.copy() for name, val in self._results.items()})
+        return res
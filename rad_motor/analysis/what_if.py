@@ -0,0 +1,139 @@
+# Linearized what-if reanalysis around a converged run.
+# The total jacobian of the outputs of interest with respect to the inputs is computed once at the
+# converged point, together with the hessian from central differences of that jacobian (two solves
+# per input). A what-if query is then a Taylor prediction, a few small matrix products. The next
+# Taylor term gives the error estimate: the hessian term for the linear prediction and, for the
+# quadratic one, the third derivatives that the same central differences give along each input.
+# Queries whose estimated error is over the tolerance (outside the trust region), or that change an
+# input the model was not linearized in, are re-solved.
+
+from __future__ import absolute_import
+from collections import namedtuple
+import numpy as np
+import openmdao.api as om
+
+from rad_motor.motor import _unit_factors
+
+WhatIfResult = namedtuple('WhatIfResult', ['values', 'error', 'solved'])
+
+
+def independent_inputs(prob):
+    """promoted names of the independent inputs of prob (auto_ivc sources and IndepVarComp outputs), one per source"""
+    model = prob.model
+    names = {}
+    for prom in model._var_allprocs_prom2abs_list['input']:
+        src = model.get_source(prom)
+        if src.startswith('_auto_ivc.'):
+            names.setdefault(src, prom)
+        elif isinstance(model._get_subsystem(src.rpartition('.')[0]), om.IndepVarComp):
+            names.setdefault(src, model._var_allprocs_abs2prom['output'][src])
+    return list(names.values())
+
+
+class WhatIf(object):
+    """
+    Taylor model of the outputs of with respect to wrt (promoted inputs, all independent inputs by default)
+    around the current, converged, state of prob. order is 1 or 2. A prediction is accepted when
+    its estimated error is below atol + rtol*|value|, otherwise predict re-solves prob.
+    """
+
+    def __init__(self, prob, of=('Eff',), wrt=None, order=2, rtol=1e-3, atol=0., step=1e-3):
+        if order not in (1, 2):
+            raise ValueError(f'order has to be 1 or 2, got {order}')
+        self.prob = prob
+        self.of = tuple(of)
+        self.wrt = tuple(independent_inputs(prob) if wrt is None else wrt)
+        self.order = order
+        self.rtol = rtol
+        self.atol = atol
+
+        model = prob.model
+        self.units = {name: model._var_allprocs_abs2meta['output'][model.get_source(name)]['units'] for name in self.wrt}
+        self.x0 = {name: prob.get_val(name).copy() for name in self.wrt}
+        sizes = [self.x0[name].size for name in self.wrt]
+        offsets = np.cumsum([0] + sizes)
+        self._slices = {name: slice(offsets[i], offsets[i + 1]) for i, name in enumerate(self.wrt)}
+        out_sizes = [prob.get_val(name).size for name in self.of]
+        out_offsets = np.cumsum([0] + out_sizes)
+        self._out_slices = {name: slice(out_offsets[i], out_offsets[i + 1]) for i, name in enumerate(self.of)}
+
+        self.y0 = np.concatenate([prob.get_val(name).ravel() for name in self.of])
+        self.J = self._totals()
+
+        # hessian H[:, :, j] and third derivatives D3[:, k, j] = d3y/dx_k dx_j**2 from J(x +- h e_j)
+        n = offsets[-1]
+        x0 = np.concatenate([self.x0[name].ravel() for name in self.wrt])
+        self.h = np.where(x0 != 0, step*np.abs(x0), step)
+        self.H = np.empty((self.y0.size, n, n))
+        self.D3 = np.empty((self.y0.size, n, n))
+        for name in self.wrt:
+            for i in range(self.x0[name].size):
+                j = self._slices[name].start + i
+                J_pm = []
+                for sign in (1, -1):
+                    x = self.x0[name].copy()
+                    x.flat[i] += sign*self.h[j]
+                    prob.set_val(name, x)
+                    prob.run_model()
+                    J_pm.append(self._totals())
+                prob.set_val(name, self.x0[name])
+                self.H[:, :, j] = (J_pm[0] - J_pm[1])/(2*self.h[j])
+                self.D3[:, :, j] = (J_pm[0] - 2*self.J + J_pm[1])/self.h[j]**2
+        self.H = 0.5*(self.H + self.H.transpose(0, 2, 1))
+        self._D3_diag = np.einsum('mjj->mj', self.D3).copy()
+        prob.run_model()
+
+    def _totals(self):
+        return self.prob.compute_totals(of=list(self.of), wrt=list(self.wrt), return_format='array')
+
+    def _values(self, y):
+        return {name: y[s].copy() for name, s in self._out_slices.items()}
+
+    def predict(self, inputs):
+        """
+        Outputs with the inputs {name: value or (value, units)} changed from the linearization point.
+        Returns a WhatIfResult with values {output: array}, the estimated error of every output (0 when
+        re-solved) and solved, True when the query was outside the trust region and was re-solved.
+        """
+        dx = np.zeros(self.h.size)
+        for name, val in inputs.items():
+            if name not in self._slices:
+                return self.solve(inputs)
+            if isinstance(val, tuple):
+                factor, offset = _unit_factors(val[1], self.units[name])
+                val = (np.asarray(val[0], dtype=float) + offset)*factor
+            dx[self._slices[name]] = (np.broadcast_to(val, self.x0[name].shape) - self.x0[name]).ravel()
+
+        Hdx = self.H @ dx
+        d2 = 0.5*(Hdx @ dx)
+        # third order term from the derivatives along the inputs: f_kjj with k == j once, k != j three times
+        d2x = dx*dx
+        d3 = (3*(self.D3 @ d2x) @ dx - 2*(self._D3_diag @ (d2x*dx)))/6
+        y = self.y0 + self.J @ dx
+        if self.order == 2:
+            y += d2
+            error = np.abs(d3)
+        else:
+            error = np.abs(d2) + np.abs(d3)
+
+        if np.any(error > self.atol + self.rtol*np.abs(y)):
+            return self.solve(inputs)
+        return WhatIfResult(self._values(y), self._values(error), False)
+
+    def solve(self, inputs):
+        """re-solve prob with inputs changed, then restore the linearization point"""
+        prob = self.prob
+        base = {name: prob.get_val(name).copy() for name in inputs}
+        try:
+            for name, val in inputs.items():
+                if isinstance(val, tuple):
+                    prob.set_val(name, val[0], units=val[1])
+                else:
+                    prob.set_val(name, val)
+            prob.run_model()
+            y = np.concatenate([prob.get_val(name).ravel() for name in self.of])
+        finally:
+            for name, val in base.items():
+                prob.set_val(name, val)
+            prob.run_model()
+        return WhatIfResult(self._values(y), self._values(np.zeros_like(y)), True)
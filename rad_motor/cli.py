@@ -0,0 +1,217 @@
+# rad-motor: batch Motor evaluation from the command line.
+# Reads cases from JSON (a list of records, a dict of columns or one record per line) or CSV
+# (header row of input names) and streams one result per case as NDJSON or a structured .npy.
+# Only argparse, json, csv and numpy are imported up front; OpenMDAO and the Motor model are
+# imported once there are cases to run.
+
+from __future__ import absolute_import
+import sys
+import csv
+import warnings
+import json
+import argparse
+import itertools
+import numpy as np
+
+from rad_motor.kernels import BACKENDS
+
+FORMATS = ('ndjson', 'npy')
+
+
+def read_cases(f, fmt=None):
+    """{input name: float array} from the JSON or CSV text in file object f"""
+    text = f.read()
+    if fmt is None:
+        fmt = 'json' if text.lstrip()[:1] in ('[', '{') else 'csv'
+
+    if fmt == 'csv':
+        rows = list(csv.DictReader(text.splitlines()))
+        names = list(rows[0]) if rows else []
+        return {name: np.array([float(row[name]) for row in rows]) for name in names}
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = [json.loads(line) for line in text.splitlines() if line.strip()]      # NDJSON
+    if isinstance(data, dict):
+        data = {name: np.atleast_1d(np.asarray(val, dtype=float)) for name, val in data.items()}
+        return dict(zip(data, np.broadcast_arrays(*data.values())))
+    names = list(data[0]) if data else []
+    return {name: np.array([float(row[name]) for row in data]) for name in names}
+
+
+class NDJSONWriter(object):
+
+    def __init__(self, f, outputs, n):
+        self.f = f
+        self.outputs = outputs
+
+    def write(self, results):
+        lines = [json.dumps(dict(zip(self.outputs, vals))) for vals in zip(*[results[name].tolist() for name in self.outputs])]
+        if lines:
+            self.f.write('\n'.join(lines) + '\n')
+            self.f.flush()
+
+
+class NPYWriter(object):
+    # the header only needs the number of cases, so rows are streamed as they are computed
+
+    def __init__(self, f, outputs, n):
+        self.f = f
+        self.outputs = outputs
+        self.dtype = np.dtype([(name, 'f8') for name in outputs])
+        np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(self.dtype),
+                                                  'fortran_order': False, 'shape': (n,)})
+
+    def write(self, results):
+        rows = np.empty(len(results[self.outputs[0]]), dtype=self.dtype)
+        for name in self.outputs:
+            rows[name] = results[name]
+        self.f.write(rows.tobytes())
+        self.f.flush()
+
+
+WRITERS = {'ndjson': NDJSONWriter, 'npy': NPYWriter}
+
+
+def _shared_runs(cases, shared_names):
+    # consecutive cases with the same shared (non-vectorizable) inputs, as (start, stop, {name: value})
+    n = len(next(iter(cases.values())))
+    keys = zip(*[cases[name] for name in shared_names]) if shared_names else itertools.repeat((), n)
+    start = 0
+    for key, group in itertools.groupby(keys):
+        stop = start + sum(1 for _ in group)
+        yield start, stop, dict(zip(shared_names, key))
+        start = stop
+
+
+def run_off_design(cases, outputs, writer, inputs, backend, batch_size):
+    from rad_motor.motor import VECTORIZABLE_PARAMS
+    from rad_motor.analysis.evaluator import OffDesignEvaluator, NODE_INPUTS
+
+    node_names = [name for name in cases if name in NODE_INPUTS or name in VECTORIZABLE_PARAMS]
+    shared_names = [name for name in cases if name not in node_names]
+    evaluator = OffDesignEvaluator(inputs, backend=backend, max_nodes=batch_size,
+                                   vectorize_params=[name for name in node_names if name in VECTORIZABLE_PARAMS])
+
+    for start, stop, shared in _shared_runs(cases, shared_names):
+        evaluator.set_inputs(**shared)
+        for lo in range(start, stop, batch_size):
+            hi = min(lo + batch_size, stop)
+            writer.write(evaluator.evaluate(outputs=outputs, **{name: cases[name][lo:hi] for name in node_names}))
+
+
+def run_design(cases, outputs, writer, inputs, backend, cache_dir, safeguard=False, sizing_budget=None, catalog_path=None):
+    from rad_motor.analysis.evaluator import design_problem, size_motor, set_inputs, sizing_status
+    from rad_motor.analysis.screen import screen_designs
+    cache = None
+    if cache_dir:
+        from rad_motor.design_cache import DesignCache
+        cache = DesignCache(cache_dir)
+    catalog = None
+    if catalog_path:
+        from rad_motor.design_catalog import DesignCatalog
+        catalog = DesignCatalog(catalog_path)
+
+    # every case sets the same inputs, so one problem is set up and re-solved
+    prob = design_problem(backend, design_cache=cache, safeguard=safeguard, sizing_budget=sizing_budget)
+    set_inputs(prob, inputs)
+    n = len(next(iter(cases.values()))) if cases else 1
+    # geometrically impossible cases are not solved; their outputs, and those of failed solves, are nan
+    feasible = screen_designs(prob, **cases).feasible if cases else np.ones(1, dtype=bool)
+    base = catalog.design_point(prob) if catalog is not None else None
+    for i in range(n):
+        if feasible[i]:
+            case = {name: val[i] for name, val in cases.items()}
+            rot_or = catalog.rot_or_guess(dict(base, **{name: val for name, val in case.items() if name in base})) if catalog is not None else 6.8
+            p = size_motor(case, rot_or=rot_or, prob=prob)
+            if sizing_status(p).converged:
+                if catalog is not None:
+                    catalog.add(p)
+                writer.write({name: p.get_val(name).ravel()[:1] for name in outputs})
+                continue
+        writer.write({name: np.full(1, np.nan) for name in outputs})
+    if catalog is not None:
+        catalog.save()
+
+
+def _parse_set(items):
+    inputs = {}
+    for item in items:
+        name, _, val = item.partition('=')
+        if not val:
+            raise argparse.ArgumentTypeError(f"--set takes name=value, got '{item}'")
+        inputs[name] = float(val)
+    return inputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='rad-motor', description='Evaluate the radial flux Motor for a batch of cases.')
+    parser.add_argument('cases', nargs='?', default='-', help='JSON or CSV file of Motor inputs, one case per record/row (default: stdin)')
+    parser.add_argument('-o', '--output', default='-', help='result file (default: stdout)')
+    parser.add_argument('-f', '--format', choices=FORMATS, default=None, help='result format, by default npy for .npy output files and ndjson otherwise')
+    parser.add_argument('--input-format', choices=('json', 'csv'), default=None, help='format of the cases, detected by default')
+    parser.add_argument('--outputs', default='Eff', help='comma separated Motor outputs (default: Eff)')
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUE', help='input applied to every case, may be repeated')
+    parser.add_argument('--design', action='store_true', help='size a DESIGN motor per case instead of evaluating off-design points, infeasible or unconverged cases give nan')
+    parser.add_argument('--cache', default=None, metavar='DIR', help='design mode: DesignCache directory for converged sizing solutions')
+    parser.add_argument('--catalog', default=None, metavar='FILE', help='design mode: DesignCatalog .npz that converged cases are added to and sizing solves start from')
+    parser.add_argument('--safeguard', action='store_true', help='design mode: stop diverging sizing solves early and fall back to a bracketed solve')
+    parser.add_argument('--sizing-budget', type=float, default=None, metavar='SECONDS', help='design mode with --safeguard: time limit per case')
+    parser.add_argument('--backend', choices=BACKENDS, default='numpy')
+    parser.add_argument('--batch-size', type=int, default=4096, help='off-design cases per model evaluation')
+    parser.add_argument('-v', '--verbose', action='store_true', help='show OpenMDAO warnings')
+    args = parser.parse_args(argv)
+
+    try:
+        inputs = _parse_set(args.set)
+    except argparse.ArgumentTypeError as err:
+        parser.error(str(err))
+    with warnings.catch_warnings():
+        if not args.verbose:
+            # OpenMDAO adds filters of its own when it is imported, so warnings are also dropped when shown
+            warnings.simplefilter('ignore')
+            warnings.showwarning = lambda *args, **kwargs: None
+        return _run(args, inputs)
+
+
+def _run(args, inputs):
+    outputs = [name.strip() for name in args.outputs.split(',') if name.strip()]
+    fmt = args.format or ('npy' if args.output.endswith('.npy') else 'ndjson')
+
+    if args.cases == '-':
+        cases = read_cases(sys.stdin, args.input_format)
+    else:
+        with open(args.cases) as f:
+            cases = read_cases(f, args.input_format)
+    n = len(next(iter(cases.values()))) if cases else (1 if args.design else 0)
+
+    binary = fmt == 'npy'
+    if args.output == '-':
+        out = sys.stdout.buffer if binary else sys.stdout
+    else:
+        out = open(args.output, 'wb' if binary else 'w')
+    try:
+        writer = WRITERS[fmt](out, outputs, n)
+        if args.design:
+            run_design(cases, outputs, writer, inputs, args.backend, args.cache, args.safeguard, args.sizing_budget, args.catalog)
+        elif n:
+            run_off_design(cases, outputs, writer, inputs, args.backend, args.batch_size)
+    finally:
+        if out not in (sys.stdout, sys.stdout.buffer):
+            out.close()
+    return 0
+
+
+def console_main():
+    """Entry point of the rad-motor script and python -m rad_motor."""
+    # OpenMDAO probes for IPython to detect notebooks, which costs about half of its import time.
+    # A command-line run is never inside a notebook, so the probe is made to fail fast. Only done
+    # here, main() called from Python leaves the interpreter as it is.
+    if 'IPython' not in sys.modules:
+        sys.modules['IPython'] = None
+    return main()
+
+
+if __name__ == '__main__':
+    sys.exit(console_main())
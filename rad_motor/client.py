@@ -0,0 +1,95 @@
+# asyncio client for rad_motor.server.
+# One connection carries any number of concurrent requests; replies are matched to them by id,
+# so callers can gather many small evaluations and let the server batch them.
+
+from __future__ import absolute_import
+import json
+import asyncio
+import itertools
+import numpy as np
+
+
+class MotorServerError(RuntimeError):
+    pass
+
+
+class MotorClient(object):
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        self._pending = {}
+        self._listener = asyncio.ensure_future(self._listen())
+
+    @classmethod
+    async def connect(cls, path=None, host='127.0.0.1', port=8765):
+        """connect to a server on the Unix socket path, or on host:port"""
+        if path:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _listen(self):
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                reply = json.loads(line)
+                future = self._pending.pop(reply['id'], None)
+                if future is None or future.done():
+                    continue
+                if 'error' in reply:
+                    future.set_exception(MotorServerError(reply['error']))
+                else:
+                    future.set_result(reply['results'])
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('connection to the motor server closed'))
+            self._pending.clear()
+
+    async def _request(self, msg):
+        msg['id'] = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg['id']] = future
+        self._writer.write(json.dumps(msg).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+
+    async def evaluate(self, outputs=('Eff',), inputs=None, **nodes):
+        """
+        Off-design evaluation at the operating points in nodes (rpm, I, P_shaft and any vectorized
+        parameters, arrays or scalars that broadcast together); inputs are shared by all points,
+        as numbers or (value, units). Returns {output: array}.
+        """
+        msg = {'op': 'evaluate', 'outputs': list(outputs), 'inputs': _encode(inputs),
+               'nodes': {name: np.asarray(val, dtype=float).tolist() for name, val in nodes.items()}}
+        results = await self._request(msg)
+        return {name: np.asarray(val) for name, val in results.items()}
+
+    async def size(self, inputs=None, outputs=('Eff',)):
+        """
+        Size a DESIGN motor. Returns the outputs as arrays and the geometry as (value, units),
+        ready to pass on as evaluate inputs.
+        """
+        results = await self._request({'op': 'size', 'outputs': list(outputs), 'inputs': _encode(inputs)})
+        return {name: (np.asarray(val[0]), val[1]) if isinstance(val, list) and len(val) == 2 and isinstance(val[1], str)
+                else np.asarray(val) for name, val in results.items()}
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        await self._listener
+
+
+def _encode(inputs):
+    enc = {}
+    for name, val in (inputs or {}).items():
+        if isinstance(val, tuple):
+            enc[name] = [np.asarray(val[0], dtype=float).tolist(), val[1]]
+        else:
+            enc[name] = np.asarray(val, dtype=float).tolist()
+    return enc
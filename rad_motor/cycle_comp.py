@@ -0,0 +1,81 @@
+# Drive-cycle totals of an off-design Motor whose nodes are the operating points of a cycle.
+# Input power is rebuilt as P_shaft + P_wire + P_steinmetz (the same sum EfficiencyComp uses)
+# so the energies are in consistent units.
+
+from __future__ import absolute_import
+import numpy as np
+
+import openmdao.api as om
+
+
+class DriveCycleComp(om.ExplicitComponent):
+    """
+    Energy totals over the nodes, each held for dt. With dt as weights that sum to one the
+    energies become cycle-average powers (in W*s per s) and Eff_cycle is unchanged.
+    P_loss_peak is a KS (smooth, conservative) maximum of the node losses.
+    """
+
+    def initialize(self):
+        self.options.declare('num_nodes', types=int)
+        self.options.declare('ks_rho', default=50., desc='KS aggregation factor for the peak loss, larger is closer to the max')
+        self.options.declare('P_loss_ref', default=100., desc='loss [W] the KS aggregation is scaled by')
+
+    def setup(self):
+        nn = self.options['num_nodes']
+        self.add_input('dt', np.ones(nn), units='s', desc='time spent at each node')
+        self.add_input('P_shaft', 14000*np.ones(nn), units='W', desc='output power')
+        self.add_input('P_wire', 500*np.ones(nn), units='W', desc='copper losses')
+        self.add_input('P_steinmetz', 200*np.ones(nn), units='W', desc='iron losses')
+
+        self.add_output('E_in', 1., units='J', desc='energy drawn over the cycle')
+        self.add_output('E_shaft', 1., units='J', desc='shaft energy delivered over the cycle')
+        self.add_output('E_loss', 1., units='J', desc='energy lost in the windings and iron')
+        self.add_output('Eff_cycle', 0.9, desc='energy weighted efficiency, E_shaft/E_in')
+        self.add_output('P_loss_peak', 700., units='W', desc='KS maximum of P_wire + P_steinmetz over the nodes')
+
+        r = np.zeros(nn, dtype=int)     # scalar outputs, one row
+        c = np.arange(nn)
+        self.declare_partials(['E_in', 'E_shaft', 'E_loss', 'Eff_cycle'], 'dt', rows=r, cols=c)
+        self.declare_partials(['E_in', 'E_shaft', 'Eff_cycle'], 'P_shaft', rows=r, cols=c)
+        self.declare_partials(['E_in', 'E_loss', 'Eff_cycle', 'P_loss_peak'], ['P_wire', 'P_steinmetz'], rows=r, cols=c)
+
+    def _ks(self, P_loss):
+        rho = self.options['ks_rho']
+        ref = self.options['P_loss_ref']
+        x = rho * P_loss / ref
+        x_max = np.max(x.real)
+        w = np.exp(x - x_max)
+        s = np.sum(w)
+        return ref * (x_max + np.log(s)) / rho, w / s
+
+    def compute(self, inputs, outputs):
+        dt = inputs['dt']
+        P_shaft = inputs['P_shaft']
+        P_loss = inputs['P_wire'] + inputs['P_steinmetz']
+
+        outputs['E_shaft'] = E_shaft = np.sum(dt * P_shaft)
+        outputs['E_loss'] = E_loss = np.sum(dt * P_loss)
+        outputs['E_in'] = E_in = E_shaft + E_loss
+        outputs['Eff_cycle'] = E_shaft / E_in
+        outputs['P_loss_peak'] = self._ks(P_loss)[0]
+
+    def compute_partials(self, inputs, J):
+        dt = inputs['dt']
+        P_shaft = inputs['P_shaft']
+        P_loss = inputs['P_wire'] + inputs['P_steinmetz']
+        E_shaft = np.sum(dt * P_shaft)
+        E_in = E_shaft + np.sum(dt * P_loss)
+
+        J['E_shaft', 'dt'] = P_shaft
+        J['E_shaft', 'P_shaft'] = dt
+        J['E_loss', 'dt'] = P_loss
+        J['E_in', 'dt'] = P_shaft + P_loss
+        J['E_in', 'P_shaft'] = dt
+        J['E_in', 'P_wire'] = J['E_in', 'P_steinmetz'] = J['E_loss', 'P_wire'] = J['E_loss', 'P_steinmetz'] = dt
+
+        # Eff = E_shaft/E_in
+        J['Eff_cycle', 'dt'] = (P_shaft * E_in - E_shaft * (P_shaft + P_loss)) / E_in**2
+        J['Eff_cycle', 'P_shaft'] = dt * (E_in - E_shaft) / E_in**2
+        J['Eff_cycle', 'P_wire'] = J['Eff_cycle', 'P_steinmetz'] = -dt * E_shaft / E_in**2
+
+        J['P_loss_peak', 'P_wire'] = J['P_loss_peak', 'P_steinmetz'] = self._ks(P_loss)[1]
@@ -0,0 +1,75 @@
+# On-disk cache of converged DESIGN sizing solutions.
+# An entry holds every output of the sizing group, keyed by a hash of the group's external
+# inputs, its variable layout and CACHE_VERSION, so a rerun with unchanged design inputs can
+# restore the solution instead of repeating the Newton solve. The least recently used entries
+# are evicted once the cache holds more than max_entries.
+
+from __future__ import absolute_import
+import os
+import glob
+import hashlib
+import numpy as np
+
+from rad_motor.file_utils import atomic_write
+
+# bump when a change to the sizing equations makes stored solutions stale
+CACHE_VERSION = '1'
+
+
+class DesignCache(object):
+
+    def __init__(self, path, max_entries=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.n_hits = 0
+        self.n_misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def key(self, system):
+        """hash of the values of the inputs of system that are not connected inside it"""
+        h = hashlib.sha256(CACHE_VERSION.encode())
+        prefix = system.pathname + '.' if system.pathname else ''
+        for name, meta in sorted(system.list_inputs(val=True, out_stream=None), key=lambda item: item[0]):
+            src = system.get_source(prefix + name)
+            if src.startswith(prefix) and not src.startswith('_auto_ivc.'):
+                continue
+            h.update(name.encode())
+            h.update(np.ascontiguousarray(meta['val'], dtype=float).tobytes())
+        for name, meta in system.get_io_metadata(iotypes='output', metadata_keys=['size']).items():
+            h.update(name.encode())
+            h.update(str(meta['size']).encode())
+        return h.hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.npy')
+
+    def get(self, key):
+        """stored outputs for key, or None"""
+        fname = self._file(key)
+        try:
+            outputs = np.load(fname)
+        except (OSError, ValueError):
+            self.n_misses += 1
+            return None
+        os.utime(fname)         # mark as recently used
+        self.n_hits += 1
+        return outputs
+
+    def put(self, key, outputs):
+        atomic_write(self._file(key), lambda f: np.save(f, np.asarray(outputs, dtype=float)))
+        self._evict()
+
+    def _evict(self):
+        files = glob.glob(os.path.join(self.path, '*.npy'))
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for fname in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(fname)
+            except OSError:
+                pass
+
+    def clear(self):
+        for fname in glob.glob(os.path.join(self.path, '*.npy')):
+            os.remove(fname)
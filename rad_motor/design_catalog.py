@@ -0,0 +1,158 @@
+# Catalog of evaluated DESIGN motors, kept across studies.
+# Every design is one row: the CATALOG_INPUTS that define it and the outputs of the Motor (geometry,
+# masses, losses, efficiency). The catalog is columnar, one float array per variable, and is saved
+# as an uncompressed .npz with 'name[units]' members like the FEA and AC loss tables. Queries go
+# through a k-d tree over the inputs, each scaled by its spread in the catalog, built on the first
+# query over a set of inputs and kept until designs are added. The nearest designs give results to
+# reuse and rot_or guesses for new sizing solves.
+
+from __future__ import absolute_import
+import os
+from collections import namedtuple
+import numpy as np
+from openmdao.utils.units import convert_units
+
+from rad_motor.file_utils import save_npz
+from rad_motor.sizing.fea_table import _parse_column
+
+# DESIGN Motor inputs that identify a design, with the units the catalog holds them in
+CATALOG_INPUTS = {'radius_motor': 'm', 'gap': 'm', 't_mag': 'm', 'stack_length': 'm', 'n_m': None, 'n_slots': None,
+                  'n_turns': None, 'n_strands': None, 'r_strand': 'm', 'k_wb': None, 'k': None, 'b_ry': 'T', 'b_sy': 'T',
+                  'b_t': 'T', 'Br_20': 'T', 'T_mag': 'C', 'T_windings': 'C', 'I': 'A', 'rpm': 'rpm', 'P_shaft': 'W'}
+
+CatalogMatch = namedtuple('CatalogMatch', ['index', 'distance', 'values'])
+
+
+class DesignCatalog(object):
+    """
+    Designs stored at path (a .npz, loaded if it exists). inputs maps the input columns to their
+    units; a query point is {input column: value}, in those units.
+    """
+
+    def __init__(self, path=None, inputs=CATALOG_INPUTS):
+        self.path = path
+        self.inputs = dict(inputs)
+        self.units = dict(inputs)
+        self._columns = {name: np.zeros(0) for name in inputs}
+        self._rows = []
+        self._trees = {}
+        if path is not None and os.path.exists(path):
+            with np.load(path) as data:
+                columns = {_parse_column(col): data[col] for col in data.files}
+            self.units.update({name: units for name, units in columns})
+            self._columns.update({name: val for (name, _), val in columns.items()})
+
+    def __len__(self):
+        return len(self.columns[next(iter(self.inputs))])
+
+    @property
+    def columns(self):
+        """{name: array} of every stored variable, one entry per design"""
+        if self._rows:
+            n = len(self._columns[next(iter(self.inputs))])
+            rows = self._rows
+            self._rows = []
+            for name in set(self._columns).union(*rows):
+                old = self._columns.get(name, np.full(n, np.nan))
+                self._columns[name] = np.concatenate([old, [row.get(name, np.nan) for row in rows]])
+        return self._columns
+
+    def design_point(self, prob, motor_path=''):
+        """{name: value} of the input columns of the DESIGN Motor of prob (at motor_path)"""
+        prefix = motor_path + '.' if motor_path else ''
+        # read from the source, several components take most of these inputs
+        return {name: prob.get_val(prob.model.get_source(prefix + name), units=units).ravel()[0]
+                for name, units in self.inputs.items()}
+
+    def add(self, prob, motor_path=''):
+        """add the converged DESIGN Motor of prob (at motor_path), its inputs at the design point and every output"""
+        from rad_motor.motor import motor_results
+
+        row = self.design_point(prob, motor_path)
+        results = motor_results(prob, motor_path, units={name: units for name, units in self.units.items() if units})
+        for name in results.values.dtype.names:
+            if name not in row and results.values[name].size == 1:
+                row[name] = results.values[name][0]
+                self.units.setdefault(name, results.units[name])
+        self._rows.append(row)
+        self._trees.clear()
+
+    def extend(self, columns, units=None):
+        """add designs given as {name: array}, every input column included; other missing columns are nan"""
+        missing = [name for name in self.inputs if name not in columns]
+        if missing:
+            raise ValueError(f'designs added to the catalog need the input columns {missing}')
+        arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(val, dtype=float)) for val in columns.values()])
+        current = self.columns
+        n = len(self)
+        for name, val in zip(columns, arrays):
+            old = current.get(name, np.full(n, np.nan))
+            current[name] = np.concatenate([old, val])
+            self.units.setdefault(name, (units or {}).get(name))
+        for name in current:
+            if name not in columns:
+                current[name] = np.concatenate([current[name], np.full(arrays[0].size, np.nan)])
+        self._trees.clear()
+
+    def _tree(self, names):
+        # k-d tree over the input columns names, scaled like FEATable
+        if names not in self._trees:
+            from scipy.spatial import cKDTree
+            X = np.column_stack([self.columns[name] for name in names])
+            center = X.mean(axis=0)
+            scale = X.std(axis=0)
+            scale[scale == 0] = 1.
+            self._trees[names] = (cKDTree((X - center)/scale), center, scale)
+        return self._trees[names]
+
+    def _query_points(self, point):
+        unknown = [name for name in point if name not in self.inputs]
+        if unknown:
+            raise ValueError(f'{unknown} are not input columns of the catalog, options are {tuple(self.inputs)}')
+        if not point:
+            raise ValueError('a catalog query needs the value of at least one input column')
+        if not len(self):
+            raise ValueError('the catalog is empty')
+        names = tuple(name for name in self.inputs if name in point)
+        arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(point[name], dtype=float)) for name in names])
+        tree, center, scale = self._tree(names)
+        return tree, (np.column_stack(arrays) - center)/scale
+
+    def _match(self, index, distance):
+        columns = self.columns
+        return CatalogMatch(index, distance, {name: val[index] for name, val in columns.items()})
+
+    def nearest(self, point, k=1):
+        """
+        The k designs closest to point ({input column: value}), by the scaled distance over the inputs
+        given. Values may be arrays (broadcast together) for many queries at once; index and distance are then (m, k), and
+        (k,) for scalars. Returns a CatalogMatch with values {name: the columns at index}.
+        """
+        tree, u = self._query_points(point)
+        k = min(k, len(self))
+        distance, index = tree.query(u, k=k)
+        distance, index = distance.reshape(-1, k), index.reshape(-1, k)
+        if all(np.ndim(val) == 0 for val in point.values()):
+            distance, index = distance[0], index[0]
+        return self._match(index, distance)
+
+    def within(self, point, radius):
+        """designs within the scaled distance radius of the (scalar) point, nearest first"""
+        tree, u = self._query_points(point)
+        index = np.asarray(tree.query_ball_point(u[0], radius), dtype=int)
+        distance = np.linalg.norm(tree.data[index] - u[0], axis=-1)
+        order = np.argsort(distance, kind='stable')
+        return self._match(index[order], distance[order])
+
+    def rot_or_guess(self, point, default=6.8):
+        """rot_or [cm] of the nearest design to start a sizing solve from, default for an empty catalog"""
+        point = {name: val for name, val in point.items() if name in self.inputs}
+        if not len(self) or not point or 'rot_or' not in self.columns:
+            return default
+        rot_or = self.nearest(point).values['rot_or'][0]
+        return convert_units(rot_or, self.units['rot_or'], 'cm') if np.isfinite(rot_or) else default
+
+    def save(self, path=None):
+        path = path or self.path
+        save_npz(path, **{f'{name}[{self.units[name]}]' if self.units.get(name) else name: val
+                          for name, val in self.columns.items()})
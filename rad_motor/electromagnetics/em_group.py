@@ -8,39 +8,67 @@ import openmdao.api as om
 # from ..size_comp import MotorSizeComp
 from rad_motor.electromagnetics.fields_comp import GapFieldsComp, CartersComp, GapEquivalentComp
 from rad_motor.electromagnetics.performance_comp import TorqueComp, EfficiencyComp
+from rad_motor.kernels import BACKENDS
+from rad_motor.node_params import promote_node_inputs
+
+# inputs of the air gap field components that can be given per node
+FIELD_PARAMS = ('gap', 'w_slot', 'w_t', 't_mag', 'Br_20', 'T_mag', 'T_coef_rem_mag', 'k_sat', 'mu_r_mag')
+# inputs of the performance components that can be given per node
+PERFORMANCE_PARAMS = ('rot_or',)
 
 
 
 class EmGroup(om.Group):
     def initialize(self):
         self.options.declare('num_nodes', types=int)
+        self.options.declare('backend', default='numpy', values=BACKENDS)
+        self.options.declare('fields', default=True, types=bool, desc='add the (scalar) air gap field components')
+        self.options.declare('performance', default=True, types=bool, desc='add the per-node torque and efficiency components')
+        self.options.declare('vec_params', default=(), types=(tuple, list), 
+                             desc='FIELD_PARAMS and PERFORMANCE_PARAMS given per node, the fields are then evaluated at every node')
 
     def setup(self):
         nn = self.options['num_nodes']
+        vec_params = self.options['vec_params']
+
+        # the fields only depend on shared parameters unless some of them are per node
+        fields_per_node = self.options['fields'] and any(name in FIELD_PARAMS for name in vec_params)
+
+        if self.options['fields']:
+            self._setup_fields(nn if fields_per_node else 1, vec_params)
+        if self.options['performance']:
+            self._setup_performance(nn, fields_per_node, vec_params)
 
+    def _setup_fields(self, nn, vec_params):
+        defaulted = set()
         self.add_subsystem(name='carters',
-                           subsys=CartersComp(),
-                           promotes_inputs=['gap', 'w_slot', 'w_t', 
-                           't_mag', 'Br_20', 'T_coef_rem_mag', 'T_mag'],  #  'l_slot_opening',
+                           subsys=CartersComp(num_nodes=nn, backend=self.options['backend']),
                            promotes_outputs=['Br', 'carters_coef'])       #'mech_angle', 't_1',
+        promote_node_inputs(self, 'carters', ['gap', 'w_slot', 'w_t', 't_mag', 'Br_20', 'T_coef_rem_mag', 'T_mag'], nn, vec_params, defaulted)  #  'l_slot_opening',
 
         self.add_subsystem(name='equivalent_gap',
-                           subsys=GapEquivalentComp(),
-                           promotes_inputs=['gap', 'carters_coef', 'k_sat'],
+                           subsys=GapEquivalentComp(num_nodes=nn),
+                           promotes_inputs=['carters_coef'],
                            promotes_outputs=['g_eq'])
+        promote_node_inputs(self, 'equivalent_gap', ['gap', 'k_sat'], nn, vec_params, defaulted)
 
         self.add_subsystem(name='gap_fields',
-                           subsys=GapFieldsComp(),
-                           promotes_inputs=['Br', 'mu_r', 'g_eq', 't_mag'],       
+                           subsys=GapFieldsComp(num_nodes=nn),
+                           promotes_inputs=['Br', 'g_eq'],       
                            promotes_outputs=['B_g'])
+        promote_node_inputs(self, 'gap_fields', ['mu_r_mag', 't_mag'], nn, vec_params, defaulted)
 
+    def _setup_performance(self, nn, fields_per_node, vec_params):
+        defaulted = set()
         self.add_subsystem(name='torque',
-                           subsys=TorqueComp(num_nodes=nn),
-                           promotes_inputs=['B_g', 'n_m', 'n_turns', 'I', 'rot_or', 'P_shaft', 'rpm', 'stack_length'],
+                           subsys=TorqueComp(num_nodes=nn, backend=self.options['backend']),
+                           promotes_inputs=['n_m', 'n_turns', 'I', 'P_shaft', 'rpm', 'stack_length'],
                            promotes_outputs=['Tq_shaft', 'Tq_max', 'omega'])
+        promote_node_inputs(self, 'torque', ['B_g'], nn, ('B_g',) if fields_per_node else (), defaulted)
+        promote_node_inputs(self, 'torque', ['rot_or'], nn, vec_params, defaulted)
 
         self.add_subsystem(name='motor_efficiency', 
-                           subsys=EfficiencyComp(num_nodes=nn),
+                           subsys=EfficiencyComp(num_nodes=nn, backend=self.options['backend']),
                            promotes_inputs=['P_wire', 'P_steinmetz', 'P_shaft', 'Tq_shaft', 'omega', 'rpm'],
                            promotes_outputs=['P_in', 'Eff'])
 
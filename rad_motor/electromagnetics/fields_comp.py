@@ -7,22 +7,29 @@ from math import pi
 
 import openmdao.api as om
 
+from rad_motor.kernels import BACKENDS, use_jit, carters_kernel
+
 class CartersComp(om.ExplicitComponent):
+    def initialize(self):
+        self.options.declare('num_nodes', default=1, types=int)
+        self.options.declare('backend', default='numpy', values=BACKENDS, desc='numba evaluates Br and carters_coef in one compiled loop')
 
     def setup(self):
-        self.add_input('gap', 0.001, units='m', desc='Air Gap - Mechanical Clearance')
-        self.add_input('w_slot', .015, units='m', desc='width of one slot')
-        self.add_input('w_t', .0045, units='m', desc='tooth width')
-        self.add_input('t_mag', .0044, units='m', desc='radial thickness of magnet')
-        self.add_input('Br_20', 1.39, units='T', desc='remnance flux density at 20 degC')
-        self.add_input('T_mag', 100, units='C', desc='operating temperature of magnet')
-        self.add_input('T_coef_rem_mag', -0.12,  desc=' Temperature coefficient of the remnance flux density for N48H magnets')
+        nn = self.options['num_nodes']
+        self.add_input('gap', 0.001*np.ones(nn), units='m', desc='Air Gap - Mechanical Clearance')
+        self.add_input('w_slot', .015*np.ones(nn), units='m', desc='width of one slot')
+        self.add_input('w_t', .0045*np.ones(nn), units='m', desc='tooth width')
+        self.add_input('t_mag', .0044*np.ones(nn), units='m', desc='radial thickness of magnet')
+        self.add_input('Br_20', 1.39*np.ones(nn), units='T', desc='remnance flux density at 20 degC')
+        self.add_input('T_mag', 100*np.ones(nn), units='C', desc='operating temperature of magnet')
+        self.add_input('T_coef_rem_mag', -0.12*np.ones(nn),  desc=' Temperature coefficient of the remnance flux density for N48H magnets')
         
-        self.add_output('Br', 1, units = 'T', desc='temp dependent renmance flux density of an N48H magnet')
-        self.add_output('carters_coef', 1,  desc='How much the air gap must be increased to account for slots')  # Gieras - pg.563 - (A.27)
+        self.add_output('Br', 1*np.ones(nn), units = 'T', desc='temp dependent renmance flux density of an N48H magnet')
+        self.add_output('carters_coef', 1*np.ones(nn),  desc='How much the air gap must be increased to account for slots')  # Gieras - pg.563 - (A.27)
 
-        self.declare_partials('Br', ['Br_20', 'T_coef_rem_mag', 'T_mag'])
-        self.declare_partials('carters_coef', ['w_slot', 'w_t', 'gap', 't_mag', 'Br_20', 'T_coef_rem_mag', 'T_mag'])
+        r = c = np.arange(nn)
+        self.declare_partials('Br', ['Br_20', 'T_coef_rem_mag', 'T_mag'], rows=r, cols=c)
+        self.declare_partials('carters_coef', ['w_slot', 'w_t', 'gap', 't_mag', 'Br_20', 'T_coef_rem_mag', 'T_mag'], rows=r, cols=c)
 
     def compute(self, inputs, outputs):
         g = inputs['gap']
@@ -33,6 +40,10 @@ class CartersComp(om.ExplicitComponent):
         T_mag = inputs['T_mag']
         T_coef_rem_mag = inputs['T_coef_rem_mag']
 
+        if use_jit(self.options['backend']) and not self.under_complex_step:
+            carters_kernel(g, w_slot, w_t, t_mag, Br_20, T_mag, T_coef_rem_mag, outputs['Br'], outputs['carters_coef'])
+            return
+
         outputs['Br']  = Br_20*(1+T_coef_rem_mag/100 * (T_mag-20)) 
         outputs['carters_coef'] = (1 - w_slot/(w_slot + w_t)) + ((4*(g+t_mag/outputs['Br'])/(np.pi*(w_slot + w_t))) * np.log(1 + (np.pi*w_slot/(4*(g+t_mag/outputs['Br'])))))**-1 
 
@@ -95,18 +106,23 @@ class CartersComp(om.ExplicitComponent):
 
 
 class GapEquivalentComp(om.ExplicitComponent):
+    def initialize(self):
+        self.options.declare('num_nodes', default=1, types=int)
+
     def setup(self):
-        self.add_input('gap', 0.001, units='m', desc='Air Gap - Mechanical Clearance')
-        self.add_input('carters_coef', 2,  desc='Carters Coefficient')  # Gieras - pg.563 - (A.27)
-        self.add_input('k_sat', 1,  desc='Saturation factor of the magnetic circuit due to the main (linkage) magnetic flux')  # Gieras - pg.73 - (2.48) - Typically ~1
+        nn = self.options['num_nodes']
+        self.add_input('gap', 0.001*np.ones(nn), units='m', desc='Air Gap - Mechanical Clearance')
+        self.add_input('carters_coef', 2*np.ones(nn),  desc='Carters Coefficient')  # Gieras - pg.563 - (A.27)
+        self.add_input('k_sat', 1*np.ones(nn),  desc='Saturation factor of the magnetic circuit due to the main (linkage) magnetic flux')  # Gieras - pg.73 - (2.48) - Typically ~1
         # self.add_input('t_mag', 0.0044, units='m', desc='Magnet thickness')  # 'h_m' in Gieras's book
         # self.add_input('mu_o', 1.2566e-6, units='H/m', desc='Magnetic Permeability of Free Space')  #CONSTANT
         # self.add_input('mu_r', 1, units='H/m', desc='Relative recoil permeability')  # Gieras - pg.48 - (2.5)
 
-        self.add_output('g_eq', .001, units='m', desc='Equivalent aig gap')  # Gieras - pg.180
+        self.add_output('g_eq', .001*np.ones(nn), units='m', desc='Equivalent aig gap')  # Gieras - pg.180
         # self.add_output('g_eq_q', .001, units='m', desc='Equivalent air gap q-axis')  # Gieras - pg.180
 
-        self.declare_partials('g_eq', ['gap', 'carters_coef', 'k_sat'])
+        r = c = np.arange(nn)
+        self.declare_partials('g_eq', ['gap', 'carters_coef', 'k_sat'], rows=r, cols=c)
 
     def compute(self, inputs, outputs):
         gap = inputs['gap']
@@ -127,25 +143,30 @@ class GapEquivalentComp(om.ExplicitComponent):
 
 class GapFieldsComp(om.ExplicitComponent):
 
+  def initialize(self):
+    self.options.declare('num_nodes', default=1, types=int)
+
   def setup(self):
-    self.add_input('mu_r', 1.04, units='H/m', desc='relative magnetic permeability of ferromagnetic materials')
-    self.add_input('g_eq', .001, units='m', desc='air gap')
-    self.add_input('t_mag', 0.0045, units='m', desc='magnet height')
-    self.add_input('Br', 1, units = 'T', desc='temp dependent renmance flux density of an N48H magnet')
+    nn = self.options['num_nodes']
+    self.add_input('mu_r_mag', 1.04*np.ones(nn), units='H/m', desc='relative recoil permeability of the magnets')
+    self.add_input('g_eq', .001*np.ones(nn), units='m', desc='air gap')
+    self.add_input('t_mag', 0.0045*np.ones(nn), units='m', desc='magnet height')
+    self.add_input('Br', 1*np.ones(nn), units = 'T', desc='temp dependent renmance flux density of an N48H magnet')
     # self.add_input('Hc_20', -1046, units='A/m', desc='Intrinsic Coercivity at 20 degC')
     # self.add_input('Br_20', 1.39, units='T', desc='remnance flux density at 20 degC')
     
     # self.add_output('H_g', units='A/m', desc='air gap field intensity')
-    self.add_output('B_g', 1.5, units='T', desc='air gap flux density')
+    self.add_output('B_g', 1.5*np.ones(nn), units='T', desc='air gap flux density')
 
-    self.declare_partials('B_g', ['Br', 'mu_r', 'g_eq', 't_mag'])
+    r = c = np.arange(nn)
+    self.declare_partials('B_g', ['Br', 'mu_r_mag', 'g_eq', 't_mag'], rows=r, cols=c)
     # self.declare_partials('H_g', ['Hc_20', 'Br', 'mu_r', 'g_eq', 't_mag', 'Br_20'])
 
   def compute(self, inputs, outputs):
     # Hc_20=inputs['Hc_20']
     # Br_20=inputs['Br_20']
     Br = inputs['Br']
-    mu_r=inputs['mu_r']
+    mu_r=inputs['mu_r_mag']
     g_eq=inputs['g_eq']
     t_mag=inputs['t_mag']
 
@@ -154,12 +175,12 @@ class GapFieldsComp(om.ExplicitComponent):
 
   def compute_partials(self, inputs, J):
     Br = inputs['Br']
-    mu_r=inputs['mu_r']
+    mu_r=inputs['mu_r_mag']
     g_eq=inputs['g_eq']
     t_mag=inputs['t_mag']
 
     J['B_g', 'Br'] = (1/(1+mu_r*g_eq/t_mag)) 
-    J['B_g', 'mu_r'] = -Br*g_eq*t_mag/((g_eq*mu_r+t_mag)**2)
+    J['B_g', 'mu_r_mag'] = -Br*g_eq*t_mag/((g_eq*mu_r+t_mag)**2)
     J['B_g', 'g_eq'] = -Br*(mu_r/t_mag)/(1+mu_r*(g_eq/t_mag))**2
     J['B_g', 't_mag'] = Br * mu_r*g_eq*t_mag**-2 / (1+mu_r*(g_eq/t_mag))**2
 
@@ -7,17 +7,21 @@ from math import pi
 
 import openmdao.api as om
 
+from rad_motor.kernels import BACKENDS, Workspace
+
 class TorqueComp(om.ExplicitComponent):
     def initialize(self):
         self.options.declare('num_nodes', types=int)
+        self.options.declare('backend', default='numpy', values=BACKENDS, desc='inplace writes the outputs without temporaries')
 
     def setup(self):
        nn = self.options['num_nodes']
-       self.add_input('B_g', 1, units='T', desc='air gap flux density')    
+       self._work = Workspace(nn)
+       self.add_input('B_g', 1*np.ones(nn), units='T', desc='air gap flux density')    
        self.add_input('n_m', 20, desc='number of magnets')
        self.add_input('n_turns', 12, desc='number of wire turns')
        self.add_input('I', 35*np.ones(nn), units='A', desc='RMS current')       
-       self.add_input('rot_or', 0.060, units='m', desc='rotor outer radius')
+       self.add_input('rot_or', 0.060*np.ones(nn), units='m', desc='rotor outer radius')
        self.add_input('P_shaft', 14000*np.ones(nn), units='W', desc='output power') 
        self.add_input('rpm', 5000*np.ones(nn), units='rpm', desc='Rotational Speed')
        self.add_input('stack_length', .0345, units='m', desc='stack length')
@@ -26,10 +30,12 @@ class TorqueComp(om.ExplicitComponent):
        self.add_output('Tq_shaft', 25*np.ones(nn), units='N*m', desc='torque')
        self.add_output('Tq_max', 30*np.ones(nn), units='N*m', desc='max torque available')      
        
-       r = c = np.arange(nn)  # for scalar variables only
+       r = c = np.arange(nn)
+       c0 = np.zeros(nn, dtype=int)  # for scalar variables only
        self.declare_partials('omega', 'rpm', rows=r, cols=c)
        self.declare_partials('Tq_shaft', ['P_shaft', 'rpm'], rows=r, cols=c)
-       self.declare_partials('Tq_max', ['stack_length', 'n_m', 'n_turns', 'B_g', 'rot_or', 'I'], rows=r, cols=c)
+       self.declare_partials('Tq_max', ['I', 'B_g', 'rot_or'], rows=r, cols=c)
+       self.declare_partials('Tq_max', ['stack_length', 'n_m', 'n_turns'], rows=r, cols=c0)
 
     def compute(self,inputs,outputs):
         n_m=inputs['n_m']
@@ -41,6 +47,14 @@ class TorqueComp(om.ExplicitComponent):
         P_shaft = inputs['P_shaft']
         stack_length = inputs['stack_length'] 
 
+        if self.options['backend'] == 'inplace' and not self.under_complex_step: 
+            np.multiply(rpm, 2*pi/60, out=outputs['omega'])
+            np.divide(P_shaft, outputs['omega'], out=outputs['Tq_shaft'])
+            np.multiply(B_g, rot_or, out=outputs['Tq_max'])
+            outputs['Tq_max'] *= I
+            outputs['Tq_max'] *= stack_length*2*n_m*n_turns
+            return
+
         outputs['omega'] = rpm*2*pi/60 
         outputs['Tq_shaft'] = P_shaft/(rpm*2*pi/60)
         outputs['Tq_max'] = stack_length*2*n_m*n_turns*B_g*rot_or*I    # Eqn 4.11, pg 79, from D.Hansleman book
@@ -57,6 +71,25 @@ class TorqueComp(om.ExplicitComponent):
 
         J['omega', 'rpm'] = 2*pi/60 
 
+        if self.options['backend'] == 'inplace': 
+            # w0 = B_g*rot_or*I
+            w0 = self._work[0]
+            np.multiply(rpm, 2*pi/60, out=J['Tq_shaft', 'P_shaft'])
+            np.reciprocal(J['Tq_shaft', 'P_shaft'], out=J['Tq_shaft', 'P_shaft'])
+            np.divide(P_shaft, rpm, out=J['Tq_shaft', 'rpm'])
+            J['Tq_shaft', 'rpm'] *= J['Tq_shaft', 'P_shaft']
+            J['Tq_shaft', 'rpm'] *= -1
+            np.multiply(B_g, rot_or, out=w0)
+            w0 *= I
+            np.multiply(w0, 2*n_m*n_turns, out=J['Tq_max', 'stack_length'])
+            np.multiply(w0, stack_length*2*n_turns, out=J['Tq_max', 'n_m'])
+            np.multiply(w0, stack_length*2*n_m, out=J['Tq_max', 'n_turns'])
+            # the product of the other two factors, dividing w0 would give nan where a factor is zero
+            for name, a, b in (('B_g', rot_or, I), ('rot_or', B_g, I), ('I', B_g, rot_or)): 
+                np.multiply(a, b, out=J['Tq_max', name])
+                J['Tq_max', name] *= stack_length*2*n_m*n_turns
+            return
+
         J['Tq_shaft', 'P_shaft'] = 1/(rpm*2*pi/60)
         J['Tq_shaft', 'rpm'] = -P_shaft/(rpm**2*2*pi/60)
 
@@ -71,9 +104,11 @@ class TorqueComp(om.ExplicitComponent):
 class EfficiencyComp(om.ExplicitComponent):
     def initialize(self):
         self.options.declare('num_nodes', types=int)
+        self.options.declare('backend', default='numpy', values=BACKENDS, desc='inplace writes the outputs without temporaries')
 
     def setup(self):
         nn = self.options['num_nodes']
+        self._work = Workspace(nn)
         self.add_input('P_wire', 500*np.ones(nn), units='W', desc='copper losses')
         self.add_input('P_steinmetz', 200*np.ones(nn), units='W', desc='iron losses')  
         self.add_input('P_shaft', 14000*np.ones(nn), units='W', desc='output power') 
@@ -96,6 +131,13 @@ class EfficiencyComp(om.ExplicitComponent):
         Tq_shaft = inputs['Tq_shaft']
         omega = inputs['omega']
 
+        if self.options['backend'] == 'inplace' and not self.under_complex_step: 
+            np.multiply(Tq_shaft, omega, out=outputs['P_in'])
+            outputs['P_in'] += P_wire
+            outputs['P_in'] += P_steinmetz
+            np.divide(P_shaft, outputs['P_in'], out=outputs['Eff'])
+            return
+
         outputs['P_in']  = (Tq_shaft*omega) + P_wire + (P_steinmetz)       
         outputs['Eff'] =  P_shaft / outputs['P_in']
 
@@ -112,6 +154,23 @@ class EfficiencyComp(om.ExplicitComponent):
         J['P_in', 'P_wire'] = 1
         J['P_in', 'P_steinmetz'] = 1
 
+        if self.options['backend'] == 'inplace': 
+            # w0 = -P_shaft/P_in**2
+            w0 = self._work[0]
+            d = J['Eff', 'P_shaft']
+            np.multiply(Tq_shaft, omega, out=d)
+            d += P_wire
+            d += P_steinmetz
+            np.reciprocal(d, out=d)
+            np.multiply(d, d, out=w0)
+            w0 *= P_shaft
+            w0 *= -1
+            np.multiply(w0, omega, out=J['Eff', 'Tq_shaft'])
+            np.multiply(w0, Tq_shaft, out=J['Eff', 'omega'])
+            J['Eff', 'P_wire'] = w0
+            J['Eff', 'P_steinmetz'] = w0
+            return
+
         J['Eff', 'P_shaft'] = 1 / ( (Tq_shaft*omega) + P_wire + P_steinmetz  )
         J['Eff', 'Tq_shaft'] = -omega*P_shaft / ( (Tq_shaft*omega) + P_wire + P_steinmetz  )**2
         J['Eff', 'omega'] = -Tq_shaft*P_shaft / ( (Tq_shaft*omega) + P_wire + P_steinmetz  )**2
@@ -26,7 +26,7 @@ class TestEmGroup(unittest.TestCase):
         ivc.add_output('T_coef_rem_mag', val=.00393)
         ivc.add_output('T_mag', val=100, units='C')
         ivc.add_output('k_sat', val=1)
-        ivc.add_output('mu_r', val=1, units='H/m')
+        ivc.add_output('mu_r_mag', val=1, units='H/m')
         ivc.add_output('n_m', val=20)
         ivc.add_output('n_turns', val=12)
         ivc.add_output('I', val=34.35, units='A')
@@ -74,7 +74,7 @@ class TestEmGroup(unittest.TestCase):
         ivc.add_output('T_coef_rem_mag', val=.00393)
         ivc.add_output('T_mag', val=100, units='C')
         ivc.add_output('k_sat', val=1)
-        ivc.add_output('mu_r', val=1, units='H/m')
+        ivc.add_output('mu_r_mag', val=1, units='H/m')
         ivc.add_output('n_m', val=20)
         ivc.add_output('n_turns', val=12)
         ivc.add_output('I', val=34.35, units='A')
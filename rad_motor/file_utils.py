@@ -0,0 +1,27 @@
+# Crash-safe file writes for studies and caches that are reopened by later runs.
+
+from __future__ import absolute_import
+import os
+import tempfile
+import numpy as np
+
+
+def atomic_write(path, write):
+    """
+    Call write(f) on a temporary file next to path and move it into place once it is on disk,
+    so readers see either the old file or the complete new one.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def save_npz(path, **arrays):
+    atomic_write(path, lambda f: np.savez(f, **arrays))
@@ -0,0 +1,111 @@
+# Fused per-node loops for the hot loss and sizing expressions.
+# Compiled with numba when it is installed. The components only call these when their
+# backend option is 'numba' and HAS_NUMBA is True; otherwise they keep the NumPy expressions.
+# The 'inplace' backend is for very large num_nodes: the kernels are NumPy ufuncs that write
+# into the output (or partials) arrays and a few preallocated Workspace buffers, so a call
+# allocates no full-length temporaries.
+
+from __future__ import absolute_import
+import importlib.util
+import functools
+import numpy as np
+from math import pi, sqrt, log
+
+# numba takes a noticeable part of the import time, so it is only imported when a kernel first runs
+HAS_NUMBA = importlib.util.find_spec('numba') is not None
+
+
+BACKENDS = ('numpy', 'numba', 'inplace')
+
+
+class _LazyJit(object):
+
+    def __init__(self, func):
+        functools.update_wrapper(self, func)
+        self.py_func = func
+        self._compiled = None
+
+    def __call__(self, *args):
+        if self._compiled is None:
+            import numba
+            self._compiled = numba.njit(cache=True, nogil=True)(self.py_func)
+        return self._compiled(*args)
+
+
+def _jit(func):
+    if HAS_NUMBA:
+        return _LazyJit(func)
+    return func
+
+
+def use_jit(backend):
+    """True when the compiled path should be used for the requested backend."""
+    return backend == 'numba' and HAS_NUMBA
+
+
+class Workspace(object):
+    """Per-node scratch buffers of a component, allocated on first use and reused by every call."""
+
+    def __init__(self, num_nodes):
+        self.num_nodes = num_nodes
+        self._buffers = []
+
+    def __getitem__(self, i):
+        while len(self._buffers) <= i:
+            self._buffers.append(np.empty(self.num_nodes))
+        return self._buffers[i]
+
+
+def winding_loss_inplace(rpm, I, AC_pf, n_m, temp_resistivity, R_dc, mu_r, mu_o, f_e, skin_depth, P_dc, P_ac, P_wire):
+    # winding_loss_kernel with in-place ufuncs, (I*sqrt(2))**2 * R_dc * 3/2 = 3 * I**2 * R_dc
+    np.multiply(rpm, n_m / 120, out=f_e)
+    np.multiply(f_e, mu_r, out=skin_depth)
+    skin_depth *= pi * mu_o
+    np.divide(temp_resistivity, skin_depth, out=skin_depth)
+    np.sqrt(skin_depth, out=skin_depth)
+    np.multiply(I, I, out=P_dc)
+    P_dc *= R_dc
+    P_dc *= 3.
+    np.multiply(AC_pf, P_dc, out=P_ac)
+    np.add(P_dc, P_ac, out=P_wire)
+
+
+def steinmetz_inplace(f_e, alpha_stein, B_pk, beta_stein, k_stein, sta_mass, P_steinmetz, work):
+    # k_stein * f_e**alpha_stein * B_pk**beta_stein * sta_mass, work is a Workspace
+    np.power(f_e, alpha_stein, out=P_steinmetz)
+    np.power(B_pk, beta_stein, out=work[0])
+    P_steinmetz *= work[0]
+    P_steinmetz *= k_stein
+    P_steinmetz *= sta_mass
+
+
+@_jit
+def winding_loss_kernel(rpm, I, AC_pf, n_m, temp_resistivity, R_dc, mu_r, mu_o, f_e, skin_depth, P_dc, P_ac, P_wire):
+    # mu_r per node, outputs are written in place
+    root2 = sqrt(2.)
+    for i in range(rpm.shape[0]):
+        fe = n_m / 2 * rpm[i] / 60
+        f_e[i] = fe
+        skin_depth[i] = sqrt(temp_resistivity[i] / (pi * fe * mu_r[i] * mu_o))
+        pdc = (I[i]*root2)**2 * R_dc[i] * 3/2
+        pac = AC_pf[i] * pdc
+        P_dc[i] = pdc
+        P_ac[i] = pac
+        P_wire[i] = pdc + pac
+
+
+@_jit
+def steinmetz_kernel(f_e, alpha_stein, coef, P_steinmetz):
+    # coef = k_stein * B_pk**beta_stein * sta_mass
+    for i in range(f_e.shape[0]):
+        P_steinmetz[i] = coef[i] * f_e[i]**alpha_stein[i]
+
+
+@_jit
+def carters_kernel(g, w_slot, w_t, t_mag, Br_20, T_mag, T_coef_rem_mag, Br, carters_coef):
+    for i in range(g.shape[0]):
+        br = Br_20[i]*(1+T_coef_rem_mag[i]/100 * (T_mag[i]-20))
+        g_mag = g[i] + t_mag[i]/br
+        pitch = w_slot[i] + w_t[i]
+        Br[i] = br
+        carters_coef[i] = (1 - w_slot[i]/pitch) + 1/((4*g_mag/(pi*pitch)) * log(1 + pi*w_slot[i]/(4*g_mag)))
@@ -20,6 +20,28 @@ n48sh={
         'BH_max' : 374000,
         }
 
+n42sh={
+        'Br_20':1.32, 
+        'mu_r':1.05,
+        'electric_resistivity':1.8e-6, 
+        'H_c':1003000,
+        'T_coef_remanence_flux_density' : -0.12,
+        'T_coef_intrinsic_coercivity'   : -0.55,
+        'density' : 7500,
+        'BH_max' : 334000,
+        }
+
+sm2co17={
+        'Br_20':1.08, 
+        'mu_r':1.03,
+        'electric_resistivity':8.5e-5, 
+        'H_c':796000,
+        'T_coef_remanence_flux_density' : -0.035,
+        'T_coef_intrinsic_coercivity'   : -0.2,
+        'density' : 8300,
+        'BH_max' : 223000,
+        }
+
 # n45uh={
 #         'Br_20': 1.35,
 #         'mu_r':
@@ -0,0 +1,92 @@
+# Magnet, lamination steel and conductor grades, indexed by grade name.
+# Each grade knows its temperature (or frequency/flux) dependent properties and the Motor
+# inputs that carry them, so a study can swap grades without copying values by hand.
+
+from __future__ import absolute_import
+from collections import namedtuple
+
+from rad_motor.materials.magnet_data import n48h, n48sh, n42sh, sm2co17
+
+
+class Magnet(namedtuple('Magnet', ['grade', 'Br_20', 'T_coef_rem_mag', 'mu_r', 'rho_mag'])):
+    """Br_20 [T], T_coef_rem_mag [%/degC], mu_r recoil permeability, rho_mag [kg/m**3]"""
+    kind = 'magnet'
+
+    def Br(self, T_mag):
+        """remanence at T_mag [degC], as in CartersComp"""
+        return self.Br_20 * (1 + self.T_coef_rem_mag/100 * (T_mag - 20))
+
+    def motor_inputs(self):
+        return {'Br_20': self.Br_20, 'T_coef_rem_mag': self.T_coef_rem_mag, 'mu_r_mag': self.mu_r}
+
+
+class Steel(namedtuple('Steel', ['grade', 'rho', 'alpha_stein', 'beta_stein', 'k_stein', 'B_pk'])):
+    """rho [kg/m**3], Steinmetz fit loss = k_stein * f_e**alpha_stein * B**beta_stein [W/kg], B_pk [T] design peak flux"""
+    kind = 'steel'
+
+    def loss_density(self, f_e, B_pk=None):
+        """core loss density [W/kg] at f_e [Hz] and B_pk [T] (the grade's design B_pk by default)"""
+        B_pk = self.B_pk if B_pk is None else B_pk
+        return self.k_stein * f_e**self.alpha_stein * B_pk**self.beta_stein
+
+    def motor_inputs(self):
+        return {'alpha_stein': self.alpha_stein, 'beta_stein': self.beta_stein, 'k_stein': self.k_stein, 'B_pk': self.B_pk}
+
+
+class Conductor(namedtuple('Conductor', ['grade', 'resistivity_wire', 'T_coeff_cu', 'rho_wire'])):
+    """resistivity_wire [ohm*m] at 20 degC, T_coeff_cu [1/degC], rho_wire [kg/m**3]"""
+    kind = 'conductor'
+
+    def resistivity(self, T_windings):
+        """resistivity at T_windings [degC], as in WindingLossComp"""
+        return self.resistivity_wire * (1 + self.T_coeff_cu*(T_windings - 20))
+
+    def motor_inputs(self):
+        return {'resistivity_wire': self.resistivity_wire, 'T_coeff_cu': self.T_coeff_cu}
+
+
+MAGNETS = {}
+STEELS = {}
+CONDUCTORS = {}
+
+_REGISTRIES = {'magnet': MAGNETS, 'steel': STEELS, 'conductor': CONDUCTORS}
+
+
+def register(material):
+    """add (or replace) a Magnet, Steel or Conductor grade"""
+    _REGISTRIES[material.kind][material.grade] = material
+    return material
+
+
+def _lookup(registry, kind, grade):
+    try:
+        return registry[grade]
+    except KeyError:
+        raise KeyError(f"unknown {kind} grade '{grade}', registered grades are {sorted(registry)}")
+
+
+def magnet(grade):
+    return _lookup(MAGNETS, 'magnet', grade)
+
+
+def steel(grade):
+    return _lookup(STEELS, 'steel', grade)
+
+
+def conductor(grade):
+    return _lookup(CONDUCTORS, 'conductor', grade)
+
+
+register(Magnet('N48H', n48h['Br_20'], n48h['T_coef_remanence_flux_density'], n48h['mu_r'], n48h['density']))
+register(Magnet('N48SH', n48sh['Br_20'], n48sh['T_coef_remanence_flux_density'], n48sh['mu_r'], n48sh['density']))
+register(Magnet('N42SH', n42sh['Br_20'], n42sh['T_coef_remanence_flux_density'], n42sh['mu_r'], n42sh['density']))
+register(Magnet('Sm2Co17', sm2co17['Br_20'], sm2co17['T_coef_remanence_flux_density'], sm2co17['mu_r'], sm2co17['density']))
+
+# values used by the examples
+register(Steel('Hiperco-50', rho=8110.2, alpha_stein=1.286, beta_stein=1.76835, k_stein=0.0044, B_pk=2.4))
+# rough Steinmetz fits of silicon steel loss curves, for comparisons, refit to measured data before sizing with them
+register(Steel('M19-29Ga', rho=7650., alpha_stein=1.33, beta_stein=1.92, k_stein=0.0028, B_pk=1.6))
+register(Steel('10JNEHF600', rho=7490., alpha_stein=1.29, beta_stein=1.85, k_stein=0.0021, B_pk=1.5))
+
+register(Conductor('Cu', resistivity_wire=1.724e-8, T_coeff_cu=0.00393, rho_wire=8940.))
+register(Conductor('Al', resistivity_wire=2.82e-8, T_coeff_cu=0.0039, rho_wire=2700.))
@@ -1,8 +1,33 @@
+import weakref
+import functools
+from collections import namedtuple
+import numpy as np
 import openmdao.api as om
+from openmdao.utils.units import convert_units, unit_conversion
 
-from rad_motor.electromagnetics.em_group import EmGroup
-from rad_motor.thermal.thermal_group import ThermalGroup
+from rad_motor.electromagnetics.em_group import EmGroup, FIELD_PARAMS
+from rad_motor.thermal.thermal_group import ThermalGroup, CORE_LOSS_MODELS, LOSS_PARAMS, AC_LOSS_REFERENCE
+from rad_motor.thermal.ac_loss_table import ACLossTable
+from rad_motor.thermal.motor_losses import steinmetz_table
 from rad_motor.sizing.size_group import SizeGroup
+from rad_motor.sizing.fea_table import FEATable, FEACorrectionComp
+from rad_motor.kernels import BACKENDS
+from rad_motor.solvers import NodeBlockSolver, CachedNewtonSolver, SafeguardedNewtonSolver
+
+# EmGroup promotes, split into the scalar air gap fields and the per-node performance
+EM_FIELDS_INPUTS = ['w_slot', 'w_t', 'T_coef_rem_mag', 'T_mag', 'gap', 'k_sat', 'Br_20', 'mu_r_mag', 't_mag']   #  'l_slot_opening', 
+EM_FIELDS_OUTPUTS = ['Br', 'carters_coef', 'g_eq', 'B_g']        # 'mech_angle', 't_1',
+EM_PERFORMANCE_INPUTS = ['B_g', 'n_m', 'n_turns', 'I', 'rot_or', 'rpm', 'stack_length', 
+                         'P_wire', 'P_steinmetz', 'P_shaft', 'Tq_shaft', 'omega']
+EM_PERFORMANCE_OUTPUTS = ['Tq_shaft', 'Tq_max', 'omega', 'P_in', 'Eff']
+
+# sized geometry an off-design motor takes from its DESIGN motor
+GEOMETRY_OUTPUTS = ('rot_or', 'sta_mass', 'w_slot', 'w_t')
+# shared inputs that an off-design motor can take per node (materials, temperatures, tolerances and
+# the sized geometry, so that one instance can run motors of different designs)
+VECTORIZABLE_PARAMS = ('gap', 't_mag', 'Br_20', 'T_coef_rem_mag', 'T_mag', 'mu_r_mag', 'rot_or', 'w_slot', 'w_t') + LOSS_PARAMS
+# inputs that only enter the (scalar) sizing loop, they have no effect on an off-design motor
+SIZING_PARAMS = ('k_wb', 'k', 'b_ry', 'b_sy', 'b_t', 'radius_motor', 'rho', 'rho_mag')
 
 class Motor(om.Group): 
 
@@ -10,47 +35,97 @@ class Motor(om.Group):
     def initialize(self): 
         self.options.declare('design', default=True, types=bool)
         self.options.declare('num_nodes', types=int)
+        self.options.declare('backend', default='numpy', values=BACKENDS, 
+                             desc='numba runs the loss and Carters kernels as compiled loops, falls back to numpy if numba is missing; '
+                                  'inplace evaluates the per-node components without temporaries, for very large num_nodes')
+        self.options.declare('current_balance', default=False, types=bool,
+                             desc='off-design only: solve I at each node so that Tq_max = Tq_shaft instead of taking I as an input')
+        self.options.declare('core_loss', default='steinmetz', values=CORE_LOSS_MODELS, 
+                             desc='table interpolates iron losses per node from core_loss_table, B_pk becomes a per-node input')
+        self.options.declare('core_loss_table', default=steinmetz_table(), types=tuple, 
+                             desc='(f_e [Hz], B_pk [T], loss density [W/kg]) for core_loss=table')
+        self.options.declare('ac_loss_table', default=AC_LOSS_REFERENCE, types=ACLossTable, 
+                             desc='AC_power_factor table, e.g. ACLossTable.load(path) of measured or FEA data, shared by every Motor using it')
+        self.options.declare('vectorize_params', default=(), types=(tuple, list), 
+                             desc='off-design only: VECTORIZABLE_PARAMS that become length num_nodes inputs')
+        self.options.declare('fea_table', default=None, types=FEATable, allow_none=True, 
+                             desc='FEATable that serves flux densities (b_ry, b_sy, b_t, B_pk, ...) from the geometry instead of fixed inputs')
+        self.options.declare('design_cache', default=None, allow_none=True, 
+                             desc='design only: DesignCache that stores converged sizing solutions, a hit skips the Newton solve')
+        self.options.declare('safeguard', default=False, types=bool, 
+                             desc='design only: give up on a diverging or stalled sizing Newton solve early and solve J(rot_or) = J_tgt '
+                                  'with a bracketed fallback instead, see SafeguardedNewtonSolver. The outcome is in sizing.nonlinear_solver.status')
+        self.options.declare('sizing_budget', default=None, allow_none=True, 
+                             desc='safeguard only: wall-clock seconds per sizing solve')
 
 
     def setup(self): 
         nn = self.options['num_nodes']
+        backend = self.options['backend']
+        design = self.options['design']
 
-        self.add_subsystem('thermal_properties', ThermalGroup(num_nodes=nn), promotes_inputs=['B_pk', 'alpha_stein', 'beta_stein', 'k_stein', 'rpm', 'sta_mass', 
-                                                                                              'resistivity_wire', 'stack_length', 'n_slots', 'n_strands', 
-                                                                                              'n_m', 'mu_o', 'f_e', 'n_turns', 'T_coeff_cu', 'I', 'T_windings', 'r_strand', 'mu_r'],
-                                                                            promotes_outputs=['A_cu', 'r_litz', 'P_steinmetz', 'P_dc', 'P_ac', 'P_wire', 'L_wire', 'R_dc',
-                                                                                              'skin_depth', 'temp_resistivity', 'f_e'])
+        if self.options['current_balance'] and design:
+            raise ValueError(f'{self.msginfo}: current_balance is only available in off-design mode, design=True sizes the motor for a given I.')
 
+        vec_params = tuple(self.options['vectorize_params'])
+        for name in vec_params: 
+            if name in SIZING_PARAMS: 
+                raise ValueError(f"{self.msginfo}: '{name}' only enters the sizing loop, vary it over DESIGN runs instead.")
+            if name not in VECTORIZABLE_PARAMS:
+                raise ValueError(f"{self.msginfo}: '{name}' can not be vectorized, options are {VECTORIZABLE_PARAMS}.")
+        if vec_params and design: 
+            raise ValueError(f'{self.msginfo}: vectorize_params is only available in off-design mode, the sizing loop is scalar.')
+        fea_table = self.options['fea_table']
+        if fea_table is not None: 
+            clash = [name for name in fea_table.key_names + fea_table.value_names if name in vec_params]
+            if clash: 
+                raise ValueError(f'{self.msginfo}: the FEA table looks up one value per design, {clash} can not be vectorized with it.')
+            if 'B_pk' in fea_table.value_names and self.options['core_loss'] == 'table': 
+                raise ValueError(f"{self.msginfo}: core_loss='table' takes B_pk per node, it can not come from the FEA table.")
+        if self.options['design_cache'] is not None and not design: 
+            raise ValueError(f'{self.msginfo}: design_cache is only available in design mode.')
+        safeguard = self.options['safeguard']
+        if safeguard and not design: 
+            raise ValueError(f'{self.msginfo}: safeguard is only available in design mode.')
 
-        self.add_subsystem('em_properties', EmGroup(num_nodes=nn), promotes_inputs=['w_slot', 'w_t', 'T_coef_rem_mag', 'T_mag',            
-                                                                                    'gap', 'carters_coef', 'k_sat', 'stack_length',                  
-                                                                                    'Br', 'Br_20', 'mu_r', 'g_eq', 't_mag',          
-                                                                                    'B_g', 'n_m', 'n_turns', 'I', 'rot_or',  'rpm',  
-                                                                                    'P_wire', 'P_steinmetz', 'P_shaft', 'Tq_shaft', 'omega'],       #  'l_slot_opening',  
-                                                                  promotes_outputs=['Br', 'carters_coef', 'Tq_shaft', 'Tq_max',             
-                                                                                    'g_eq','omega', 'P_in', 'Eff', 'B_g'])        # 'mech_angle', 't_1',                                                   
-  
-        if self.options['design']: 
+        if design: 
+            # only the rot_or balance is implicit, and it only involves the (scalar) geometry and gap fields. 
+            # It is solved on its own so the per-node thermal and performance components run once, feed-forward, afterwards
+            sizing = self.add_subsystem('sizing', om.Group(), promotes=['*'])
 
-            self.add_subsystem('geometry', SizeGroup(), promotes_inputs=['gap', 'B_g', 'k', 'b_ry', 'n_m', 'b_sy', 'b_t', 'n_turns', 'I', 'k_wb',
-                                                                     'rho', 'radius_motor', 'n_slots', 'sta_ir', 'w_t', 'stack_length',
-                                                                     's_d', 'rot_or', 'rot_ir', 't_mag', 'rho_mag'],
-                                                   promotes_outputs=['J', 'w_ry', 'w_sy', 'w_t', 'sta_ir', 'rot_ir', 's_d', 
-                                                                     'mag_mass', 'sta_mass', 'rot_mass', 'slot_area', 'w_slot'])
+            if fea_table is not None: 
+                # the looked-up flux densities depend on the geometry, so they are part of the sizing loop
+                sizing.add_subsystem('fea', FEACorrectionComp(table=fea_table), promotes=['*'])
 
-            bal = om.BalanceComp(num_nodes=nn)
+            sizing.add_subsystem('geometry', SizeGroup(), promotes_inputs=['gap', 'B_g', 'k', 'b_ry', 'n_m', 'b_sy', 'b_t', 'n_turns', 'k_wb',
+                                                                       'rho', 'radius_motor', 'n_slots', 'sta_ir', 'w_t', 'stack_length',
+                                                                       's_d', 'rot_or', 'rot_ir', 't_mag', 'rho_mag'],
+                                                     promotes_outputs=['J', 'w_ry', 'w_sy', 'w_t', 'sta_ir', 'rot_ir', 's_d', 
+                                                                       'mag_mass', 'sta_mass', 'rot_mass', 'slot_area', 'w_slot'])
+            # the motor is sized for the current of the first node
+            sizing.promotes('geometry', inputs=['I'], src_indices=[0])
+
+            sizing.add_subsystem('em_fields', EmGroup(num_nodes=nn, backend=backend, performance=False), 
+                                 promotes_inputs=EM_FIELDS_INPUTS, promotes_outputs=EM_FIELDS_OUTPUTS)
+
+            bal = om.BalanceComp()
             bal.add_balance('rot_or', val=0.05, units='cm', eq_units='A/mm**2', lower=1e-4)#, use_mult=True, mult_val=0.5)
             tgt = om.IndepVarComp(name='J_tgt', val=10.47, units='A/mm**2')
 
-            self.add_subsystem(name='target', subsys=tgt, promotes_outputs=['J_tgt'])
-            self.add_subsystem(name='balance', subsys=bal, promotes_outputs=['rot_or'])
+            sizing.add_subsystem(name='target', subsys=tgt, promotes_outputs=['J_tgt'])
+            sizing.add_subsystem(name='balance', subsys=bal, promotes_outputs=['rot_or'])
 
-            self.connect('J_tgt', 'balance.rhs:rot_or')
-            self.connect('J', 'balance.lhs:rot_or')
+            sizing.connect('J_tgt', 'balance.rhs:rot_or')
+            sizing.connect('J', 'balance.lhs:rot_or')
 
-            self.linear_solver = om.DirectSolver()
+            sizing.linear_solver = om.DirectSolver()
     
-            newton = self.nonlinear_solver = om.NewtonSolver()
+            if safeguard: 
+                newton = sizing.nonlinear_solver = SafeguardedNewtonSolver(cache=self.options['design_cache'], fallback_var='rot_or', 
+                                                                           bracket=rot_or_bracket, feasible=sizing_feasible, 
+                                                                           time_budget=self.options['sizing_budget'])
+            else: 
+                newton = sizing.nonlinear_solver = CachedNewtonSolver(cache=self.options['design_cache'])
             newton.options['maxiter'] = 50
             newton.options['iprint'] = 2
             newton.options['solve_subsystems'] = True
@@ -61,76 +136,210 @@ class Motor(om.Group):
             # ls.options['print_bound_enforce'] = True
     
             ls = newton.linesearch = om.BoundsEnforceLS()
-            ls.options['print_bound_enforce'] = True
+            ls.options['print_bound_enforce'] = not safeguard
 
+        elif fea_table is not None: 
+            self.add_subsystem('fea', FEACorrectionComp(table=fea_table), promotes=['*'])
 
-def print_motor(prob, motor_path=''): 
+        core_loss = self.options['core_loss']
+        steinmetz_inputs = ['alpha_stein', 'beta_stein', 'k_stein'] if core_loss == 'steinmetz' else []
+        self.add_subsystem('thermal_properties', ThermalGroup(num_nodes=nn, backend=backend, core_loss=core_loss, core_loss_table=self.options['core_loss_table'], 
+                                                                         ac_loss_table=self.options['ac_loss_table'], 
+                                                                         vec_params=vec_params), 
+                                                                            promotes_inputs=['B_pk', 'rpm', 'sta_mass', 
+                                                                                              'resistivity_wire', 'stack_length', 'n_slots', 'n_strands', 
+                                                                                              'n_m', 'mu_o', 'f_e', 'n_turns', 'T_coeff_cu', 'I', 'T_windings', 'r_strand', 'mu_r'] + steinmetz_inputs,
+                                                                            promotes_outputs=['A_cu', 'r_litz', 'P_steinmetz', 'P_dc', 'P_ac', 'P_wire', 'L_wire', 'R_dc',
+                                                                                              'skin_depth', 'temp_resistivity', 'f_e'])
 
-    print('***'*30)
-    print(f'* Data for motor: {motor_path}')
-    print('***'*30)
+        if design: 
+            self.add_subsystem('em_properties', EmGroup(num_nodes=nn, backend=backend, fields=False), 
+                               promotes_inputs=EM_PERFORMANCE_INPUTS, promotes_outputs=EM_PERFORMANCE_OUTPUTS)
+        else: 
+            self.add_subsystem('em_properties', EmGroup(num_nodes=nn, backend=backend, vec_params=vec_params), 
+                               promotes_inputs=EM_FIELDS_INPUTS + EM_PERFORMANCE_INPUTS, 
+                               promotes_outputs=EM_FIELDS_OUTPUTS + EM_PERFORMANCE_OUTPUTS)
+  
+        # component defaults disagree for these shared inputs, pin them to the reference motor
+        defaults = {'rpm': (5400*np.ones(nn), 'rpm'), 'stack_length': (0.0345, 'm'), 
+                    't_mag': (0.0044*np.ones(nn) if 't_mag' in vec_params else 0.0044, 'm'), 
+                    'mu_r': (np.ones(nn) if 'mu_r' in vec_params else 1.0, 'H/m'),
+                    'mu_r_mag': (np.ones(nn) if 'mu_r_mag' in vec_params else 1.0, 'H/m')}
+        if not self.options['current_balance']:
+            defaults['I'] = (34.5*np.ones(nn), 'A')
 
-    if motor_path: 
-        motor_path += "."
+        if design: 
+            defaults['n_slots'] = (24, None)
+            defaults['radius_motor'] = (0.078225, 'm')
+        elif fea_table is not None: 
+            # the table keys are plain inputs of an off-design motor, default them to the middle of the table
+            for name, val in zip(fea_table.key_names, fea_table.center): 
+                defaults.setdefault(name, (val, fea_table.key_units[name]))
 
-    # p.model.run_apply_nonlinear()
-    if motor_path == 'DESIGN':
+        for name, (val, units) in defaults.items(): 
+            self.set_input_defaults(name, val, units=units)
 
-        print('-----------GEOMETRY---------------')
-        # print('Rotor Inner Diameter..............', 2 * p.get_val('rot_ir', units='mm'))
-        print('Rotor Inner Radius................',     prob.get_val(f'{motor_path}rot_ir', units='mm'))
-        # print('Rotor Yoke Thickness..............',  prob.get_val('w_ry', units='mm'))
-        # print('Magnet Thickness..................',  prob.get_val('t_mag', units='mm'))
-    
-        # print('Rotor outer Diameter..............',  2 * prob.get_val('rot_or', units='mm'))
-        # print('Rotor Outer Radius................',      prob.get_val(f'{motor_path}rot_or', units='mm'))
-        print('Rotor Outer Radius................',     prob.get_val(f'{motor_path}em_properties.torque.rot_or', units='mm'))
+        if not design and self.options['current_balance']: 
+            # Tq_max is linear in I and every node only couples to itself, so Newton converges in a
+            # couple of iterations and the node blocks of the jacobian factor in O(num_nodes)
+            bal = om.BalanceComp()
+            bal.add_balance('I', val=34.5*np.ones(nn), units='A', eq_units='N*m', lhs_name='Tq_max', rhs_name='Tq_shaft', lower=0.)
+            self.add_subsystem(name='current_balance', subsys=bal, promotes_inputs=['Tq_max', 'Tq_shaft'], promotes_outputs=['I'])
+
+            # the wire length, the FEA lookups and the air gap fields (unless some field inputs are per node) are scalars
+            shared = ['L_wire'] + (list(fea_table.value_names) if fea_table is not None else [])
+            if not any(name in FIELD_PARAMS for name in vec_params): 
+                shared += EM_FIELDS_OUTPUTS
+            self.linear_solver = NodeBlockSolver(num_nodes=nn, shared_outputs=shared)
+            self.options['assembled_jac_type'] = 'csc'
+
+            newton = self.nonlinear_solver = om.NewtonSolver()
+            newton.options['maxiter'] = 20
+            newton.options['iprint'] = 0
+            newton.options['solve_subsystems'] = False
+            newton.options['err_on_non_converge'] = True
+
+
+def rot_or_bracket(sizing): 
+    # rot_or [cm] of a design lies between the magnet thickness (rot_ir > 0) and the motor radius less the gap (s_d > 0)
+    size = sizing.geometry.size
+    lo = size._inputs['t_mag'][0]
+    hi = size._inputs['radius_motor'][0] - size._inputs['gap'][0]
+    return convert_units(lo, 'm', 'cm'), convert_units(hi, 'm', 'cm')
 
-        # print('Stator Inner Diameter.............', 2 *  prob.get_val('sta_ir', units='mm'))
-        print('Stator Inner Radius...............',      prob.get_val(f'{motor_path}sta_ir', units='mm'))
 
-        print('Slot Depth........................',  prob.get_val(f'{motor_path}s_d', units='mm'))
-        print('Stator Yoke Thickness.............',  prob.get_val(f'{motor_path}w_sy', units='mm'))
+def sizing_feasible(sizing): 
+    return sizing._outputs['s_d'][0] > 0 and sizing._outputs['rot_ir'][0] > 0 and sizing._outputs['slot_area'][0] > 0
 
-        # print('Motor Outer Diameter..............', 2 *  prob.get_val(f'{motor_path}mass.radius_motor', units='mm'))
-        print('Motor Outer Radius................',      prob.get_val(f'{motor_path}geometry.mass.radius_motor', units='mm'))
 
-        print('Tooth Width.......................',  prob.get_val(f'{motor_path}w_t', units='mm'))
-        print('Radius of litz wire ..............', prob.get_val(f'{motor_path}r_litz', units='m'))
-        print('Length of Windings................',  prob.get_val(f'{motor_path}L_wire', units='m'))
-        print('Slot Area.........................', prob.get_val(f'{motor_path}slot_area', units='m**2'))
-        print('Slot Width........................', prob.get_val(f'{motor_path}w_slot'))
-        print('Copper area in one slot...........', prob.get_val(f'{motor_path}A_cu', units='m**2'))
-        print('Copper Slot Fill Percentage.......', prob.get_val(f'{motor_path}A_cu') / prob.get_val(f'{motor_path}slot_area'))
+# inputs reported by motor_results next to the outputs, when they are inputs of the motor
+RESULT_INPUTS = ('radius_motor', 'rot_or', 'sta_mass', 'w_slot', 'w_t', 'rpm', 'I', 'P_shaft', 'stack_length')
+
+MotorResults = namedtuple('MotorResults', ['values', 'units'])
+
+# (dtype, [(field, source, units)]) of every Motor that motor_results has read
+_result_layouts = weakref.WeakKeyDictionary()
+
+
+@functools.lru_cache(maxsize=None)
+def _unit_factors(old, new): 
+    # (factor, offset) with new = (old + offset)*factor
+    return unit_conversion(old, new) if old != new else (1., 0.)
+
+
+def _find_motor(prob, motor_path): 
+    if isinstance(prob.model, Motor) and not motor_path: 
+        return prob.model
+    motors = [s for s in prob.model.system_iter(recurse=True, typ=Motor) if not motor_path or s.pathname == motor_path]
+    if motor_path and not motors: 
+        raise ValueError(f"the model has no Motor at '{motor_path}'.")
+    if len(motors) != 1: 
+        raise ValueError(f'the model has {len(motors)} Motors, give the motor_path of one of them.')
+    return motors[0]
+
+
+def _result_layout(prob, motor): 
+    layout = _result_layouts.get(motor)
+    if layout is None: 
+        prefix = motor.pathname + '.' if motor.pathname else ''
+        fields = []
+        for name, m in motor.get_io_metadata(iotypes='output', metadata_keys=['units', 'size']).items(): 
+            fields.append((m['prom_name'], prefix + name, m['units'], m['size']))
+        out_names = set(field[0] for field in fields)
+
+        # the reported inputs are read from their sources
+        src_meta = prob.model.get_io_metadata(iotypes='output', metadata_keys=['units', 'size'])
+        in_names = {}
+        for name, m in motor.get_io_metadata(iotypes='input', metadata_keys=['units', 'size']).items(): 
+            in_names.setdefault(m['prom_name'], prefix + name)
+        for prom in RESULT_INPUTS: 
+            if prom in out_names or prom not in in_names: 
+                continue
+            src = prob.model.get_source(in_names[prom])
+            fields.append((prom, src, src_meta[src]['units'], src_meta[src]['size']))
+        dtype = np.dtype([(name, float, (size,)) for name, _, _, size in fields])
+        layout = _result_layouts[motor] = (dtype, [(name, src, units) for name, src, units, _ in fields])
+    return layout
+
+
+def motor_results(prob, motor_path='', units=None): 
+    """
+    Every output of the Motor at motor_path (and the RESULT_INPUTS that are inputs of it) read in
+    one pass. Returns MotorResults: values is a record (0-d structured array) with one field per
+    promoted name, of the variable's size, and units the units of every field. units={name: units}
+    converts fields; the variable layout and the conversion factors are cached, so records of many
+    cases can be gathered cheaply and stacked with np.stack.
+    With motor_path='' the model has to hold exactly one Motor.
+    """
+    motor = _find_motor(prob, motor_path)
+    dtype, fields = _result_layout(prob, motor)
+    units = units or {}
+    values = np.zeros((), dtype=dtype)
+    out_units = {}
+    for name, src, src_units in fields: 
+        val = np.ravel(prob.get_val(src)).real
+        to = units.get(name, src_units)
+        if to != src_units: 
+            factor, offset = _unit_factors(src_units, to)
+            val = (val + offset)*factor
+        values[name] = val
+        out_units[name] = to
+    return MotorResults(values, out_units)
+
+
+# units print_motor reports in
+PRINT_UNITS = {'rot_ir': 'mm', 'rot_or': 'mm', 'sta_ir': 'mm', 's_d': 'mm', 'w_sy': 'mm', 'radius_motor': 'mm', 'w_t': 'mm', 
+               'g_eq': 'mm'}
+
+
+def print_motor(prob, motor_path=''): 
+    r = motor_results(prob, motor_path, units=PRINT_UNITS).values
+    design = _find_motor(prob, motor_path).options['design']
+
+    print('***'*30)
+    print(f'* Data for motor: {motor_path}')
+    print('***'*30)
+
+    if design:
+        print('-----------GEOMETRY---------------')
+        print('Rotor Inner Radius................', r['rot_ir'])
+        print('Rotor Outer Radius................', r['rot_or'])
+        print('Stator Inner Radius...............', r['sta_ir'])
+        print('Slot Depth........................', r['s_d'])
+        print('Stator Yoke Thickness.............', r['w_sy'])
+        print('Motor Outer Radius................', r['radius_motor'])
+        print('Tooth Width.......................', r['w_t'])
+        print('Radius of litz wire ..............', r['r_litz'])
+        print('Length of Windings................', r['L_wire'])
+        print('Slot Area.........................', r['slot_area'])
+        print('Slot Width........................', r['w_slot'])
+        print('Copper area in one slot...........', r['A_cu'])
+        print('Copper Slot Fill Percentage.......', r['A_cu'] / r['slot_area'])
 
         print('--------------MASS----------------')
-        print('Mass of Stator....................',  prob.get_val(f'{motor_path}sta_mass', units='kg'))
-        print('Mass of Rotor.....................',  prob.get_val(f'{motor_path}rot_mass', units='kg'))
-        print('Mass of Magnets...................',  prob.get_val(f'{motor_path}mag_mass', units='kg')) 
-        print('Mass of Motor.....................',  prob.get_val(f'{motor_path}mag_mass', units='kg') + prob.get_val(f'{motor_path}rot_mass', units='kg') + prob.get_val(f'{motor_path}sta_mass', units='kg'))   
-        print('Current Density...................',   prob.get_val(f'{motor_path}J'))
+        print('Mass of Stator....................', r['sta_mass'])
+        print('Mass of Rotor.....................', r['rot_mass'])
+        print('Mass of Magnets...................', r['mag_mass'])
+        print('Mass of Motor.....................', r['mag_mass'] + r['rot_mass'] + r['sta_mass'])
+        print('Current Density...................', r['J'])
 
+    iron = r['P_steinmetz'] * r['sta_mass']
     print('--------------LOSSES-------------')
-    
-    print('Iron losses.............',   prob.get_val(f'{motor_path}P_steinmetz') * prob.get_val(f'{motor_path}sta_mass'))
-    print('DC Winding  Losses......',   prob.get_val(f'{motor_path}P_dc'))
-    print('AC Winding  Losses......',   prob.get_val(f'{motor_path}P_ac'))
-    print('TOTAL Winding  Losses...',   prob.get_val(f'{motor_path}P_wire'))
-    print('Total Losses............',   prob.get_val(f'{motor_path}P_steinmetz') * prob.get_val(f'{motor_path}sta_mass') + prob.get_val(f'{motor_path}P_wire'))
-    print('Overall Efficiency......',   prob.get_val(f'{motor_path}Eff'))
-    # print('Skin Depth..............',   prob.get_val(f'{motor_path}skin_depth', units='mm'))
-    # print('Temp Dependent Resistivity.......', prob.get_val(f'{motor_path}temp_resistivity', units='ohm*m'))
+    print('Iron losses.............', iron)
+    print('DC Winding  Losses......', r['P_dc'])
+    print('AC Winding  Losses......', r['P_ac'])
+    print('TOTAL Winding  Losses...', r['P_wire'])
+    print('Total Losses............', iron + r['P_wire'])
+    print('Overall Efficiency......', r['Eff'])
 
     print('--------------EM PERF-------------')
-    print('Power Required....................',  prob.get_val(f'{motor_path}P_in'))
-    # print('Power out  .......................',  prob.get_val(f'{motor_path}P_shaft'))
-    print('Electrical Frequency..............',  prob.get_val(f'{motor_path}f_e'))
-    print('Torque............................',  prob.get_val(f'{motor_path}Tq_shaft'))
-    print('Max Torque........................',  prob.get_val(f'{motor_path}Tq_max'))
+    print('Power Required....................', r['P_in'])
+    print('Electrical Frequency..............', r['f_e'])
+    print('Torque............................', r['Tq_shaft'])
+    print('Max Torque........................', r['Tq_max'])
 
     print('--------------FIELDS--------------')
-    print('Air gap flux density .............',  prob.get_val(f'{motor_path}B_g'))   
-    # print('Air gap field intensity ..........',  prob.get_val(f'{motor_path}H_g'))  
-    print('Equivalent air gap ...............',  prob.get_val(f'{motor_path}g_eq', units='mm'))
-    print('Carters Coefficient ..............',  prob.get_val(f'{motor_path}carters_coef'))
-    print('Mu_r for magnet...................',  prob.get_val(f'{motor_path}Br'))
+    print('Air gap flux density .............', r['B_g'])
+    print('Equivalent air gap ...............', r['g_eq'])
+    print('Carters Coefficient ..............', r['carters_coef'])
+    print('Mu_r for magnet...................', r['Br'])
@@ -0,0 +1,155 @@
+# K motors of a distributed propulsion system in one vectorized off-design Motor.
+# Every distinct design (variant) is sized once by its own DESIGN Motor; the K motors then run
+# as num_nodes blocks of a single off-design Motor of K*num_nodes nodes, motor-major (node
+# m*num_nodes + i is point i of the schedule of motor m). With several variants the sized geometry
+# becomes a per-node input of that Motor, fed by VariantGeometryComp. The model size only grows
+# with the number of variants, K only changes vector lengths.
+
+from __future__ import absolute_import
+import numpy as np
+import openmdao.api as om
+
+from rad_motor.motor import Motor, GEOMETRY_OUTPUTS
+from rad_motor.kernels import BACKENDS
+
+# motor spec inputs every DESIGN and the off-design Motor share (the motor_spec_connect list of pmsm_run)
+MOTOR_SPEC_INPUTS = ('n_turns', 'n_slots', 'n_m', 't_mag', 'gap', 'stack_length', 'n_strands', 'r_strand',
+                     'Br_20', 'T_coef_rem_mag', 'T_mag', 'T_windings', 'k_sat', 'mu_o', 'mu_r', 'mu_r_mag',
+                     'resistivity_wire', 'T_coeff_cu', 'alpha_stein', 'beta_stein', 'k_stein', 'B_pk')
+# operating schedule of the motors, K*num_nodes long
+SCHEDULE_INPUTS = ('rpm', 'I', 'P_shaft')
+
+GEOMETRY_UNITS = {'rot_or': 'm', 'sta_mass': 'kg', 'w_slot': 'm', 'w_t': 'm'}
+
+
+def _variants(variants, num_motors):
+    variants = np.zeros(num_motors, dtype=int) if variants is None else np.asarray(variants, dtype=int)
+    if variants.shape != (num_motors,):
+        raise ValueError(f'variants needs one design index per motor ({num_motors}), got shape {variants.shape}')
+    if variants.min() < 0 or np.setdiff1d(np.arange(variants.max() + 1), variants).size:
+        raise ValueError(f'variants has to use every design index from 0 to {variants.max()}, got {variants}')
+    return variants
+
+
+class VariantGeometryComp(om.ExplicitComponent):
+    """
+    Geometry of every motor node from the geometry of its DESIGN variant (inputs 'v<i>:<name>'),
+    and the mass of the whole array. With a single variant the geometry stays scalar.
+    """
+
+    def initialize(self):
+        self.options.declare('variants', desc='design index of every motor')
+        self.options.declare('num_nodes', types=int, desc='schedule points per motor')
+
+    def setup(self):
+        variants = self.options['variants']
+        nn = self.options['num_nodes']
+        n_var = variants.max() + 1
+        self._node_variant = np.repeat(variants, nn) if n_var > 1 else np.zeros(1, dtype=int)
+        size = self._node_variant.size
+        self._count = np.bincount(variants, minlength=n_var)
+
+        for v in range(n_var):
+            for name in GEOMETRY_OUTPUTS + ('rot_mass', 'mag_mass'):
+                self.add_input(f'v{v}:{name}', 1., units=GEOMETRY_UNITS.get(name, 'kg'))
+        for name in GEOMETRY_OUTPUTS:
+            self.add_output(name, np.ones(size), units=GEOMETRY_UNITS[name])
+        self.add_output('mass', 1., units='kg', desc='total mass of the motors')
+
+        for v in range(n_var):
+            rows = np.flatnonzero(self._node_variant == v)
+            for name in GEOMETRY_OUTPUTS:
+                self.declare_partials(name, f'v{v}:{name}', rows=rows, cols=np.zeros(rows.size, dtype=int), val=1.)
+            self.declare_partials('mass', [f'v{v}:{name}' for name in ('sta_mass', 'rot_mass', 'mag_mass')], val=self._count[v])
+
+    def compute(self, inputs, outputs):
+        n_var = self._count.size
+        for name in GEOMETRY_OUTPUTS:
+            vals = np.array([inputs[f'v{v}:{name}'][0] for v in range(n_var)])
+            outputs[name] = vals[self._node_variant]
+        outputs['mass'] = sum(self._count[v]*(inputs[f'v{v}:sta_mass'] + inputs[f'v{v}:rot_mass'] + inputs[f'v{v}:mag_mass'])
+                              for v in range(n_var))
+
+
+class ArrayPowerComp(om.ExplicitComponent):
+    """
+    Input power of the whole array at every schedule point, summed over the motors. As in
+    DriveCycleComp the power is rebuilt as P_shaft + P_wire + P_steinmetz, in W.
+    """
+
+    def initialize(self):
+        self.options.declare('num_motors', types=int)
+        self.options.declare('num_nodes', types=int, desc='schedule points per motor')
+
+    def setup(self):
+        K = self.options['num_motors']
+        nn = self.options['num_nodes']
+        self.add_input('P_shaft', 14000*np.ones(K*nn), units='W', desc='output power of every motor node')
+        self.add_input('P_wire', 500*np.ones(K*nn), units='W', desc='copper losses of every motor node')
+        self.add_input('P_steinmetz', 200*np.ones(K*nn), units='W', desc='iron losses of every motor node')
+        self.add_output('P_in_total', np.ones(nn), units='W', desc='input power of all the motors')
+        self.declare_partials('P_in_total', ['P_shaft', 'P_wire', 'P_steinmetz'],
+                              rows=np.tile(np.arange(nn), K), cols=np.arange(K*nn), val=1.)
+
+    def compute(self, inputs, outputs):
+        K = self.options['num_motors']
+        P_in = inputs['P_shaft'] + inputs['P_wire'] + inputs['P_steinmetz']
+        outputs['P_in_total'] = P_in.reshape(K, -1).sum(axis=0)
+
+
+class MotorArray(om.Group):
+    """
+    num_motors motors, each running a num_nodes point schedule, of the designs in variants (one
+    design index per motor, all identical by default). DESIGN<v> sizes variant v; its sizing
+    inputs and design point are set on DESIGN<v> (e.g. DESIGN1.radius_motor, DESIGN1.I). The
+    MOTOR_SPEC_INPUTS are shared by every motor and promoted. The schedules rpm, I and P_shaft
+    are promoted, num_motors*num_nodes long and motor-major, as are the per-motor outputs of the
+    off-design Motor 'motors' (motors.Eff, ...).
+    """
+
+    def initialize(self):
+        self.options.declare('num_motors', types=int)
+        self.options.declare('num_nodes', default=1, types=int, desc='schedule points per motor')
+        self.options.declare('variants', default=None, allow_none=True,
+                             desc='design index (0, 1, ...) of every motor, None for identical motors')
+        self.options.declare('backend', default='numpy', values=BACKENDS)
+        self.options.declare('design_cache', default=None, allow_none=True, desc='DesignCache shared by the DESIGN solves')
+        self.options.declare('safeguard', default=False, types=bool, desc='safeguarded DESIGN solves, see Motor')
+
+    def setup(self):
+        K = self.options['num_motors']
+        nn = self.options['num_nodes']
+        variants = _variants(self.options['variants'], K)
+        n_var = variants.max() + 1
+
+        for v in range(n_var):
+            self.add_subsystem(f'DESIGN{v}', Motor(num_nodes=1, design=True, backend=self.options['backend'],
+                                                   design_cache=self.options['design_cache'], safeguard=self.options['safeguard']),
+                               promotes_inputs=list(MOTOR_SPEC_INPUTS))
+
+        self.add_subsystem('geometry', VariantGeometryComp(variants=variants, num_nodes=nn),
+                           promotes_outputs=['mass'])
+        for v in range(n_var):
+            for name in GEOMETRY_OUTPUTS + ('rot_mass', 'mag_mass'):
+                self.connect(f'DESIGN{v}.{name}', f'geometry.v{v}:{name}')
+
+        vec_params = GEOMETRY_OUTPUTS if n_var > 1 else ()
+        self.add_subsystem('motors', Motor(num_nodes=K*nn, design=False, backend=self.options['backend'],
+                                           vectorize_params=vec_params),
+                           promotes_inputs=list(MOTOR_SPEC_INPUTS + SCHEDULE_INPUTS))
+        for name in GEOMETRY_OUTPUTS:
+            self.connect(f'geometry.{name}', f'motors.{name}')
+
+        self.add_subsystem('power', ArrayPowerComp(num_motors=K, num_nodes=nn), promotes_inputs=['P_shaft'],
+                           promotes_outputs=['P_in_total'])
+        self.connect('motors.P_wire', 'power.P_wire')
+        self.connect('motors.P_steinmetz', 'power.P_steinmetz')
+
+        # the Motor defaults of the shared inputs, at the array size
+        self.set_input_defaults('I', 34.5*np.ones(K*nn), units='A')
+        self.set_input_defaults('rpm', 5400*np.ones(K*nn), units='rpm')
+        self.set_input_defaults('stack_length', 0.0345, units='m')
+        self.set_input_defaults('t_mag', 0.0044, units='m')
+        self.set_input_defaults('mu_r', 1.0, units='H/m')
+        self.set_input_defaults('mu_r_mag', 1.0, units='H/m')
+        self.set_input_defaults('n_slots', 24)
@@ -0,0 +1,32 @@
+# Promotion of per-node component inputs that are usually shared by every node.
+# Components take these parameters as length num_nodes arrays with diagonal partials; the groups
+# either expose them as per-node inputs or feed them from one scalar source through src_indices,
+# so a model only pays for per-node parameters that a study actually varies.
+
+from __future__ import absolute_import
+import numpy as np
+
+
+def promote_node_inputs(group, subsys_name, names, num_nodes, vec_params=(), defaulted=None):
+    """
+    Promote inputs names of subsys_name, which are sized num_nodes, in group. Names in vec_params
+    stay length num_nodes inputs of the group, the others are broadcast from a scalar.
+    defaulted is a set, shared by the calls of one group setup, of the names whose scalar default
+    is already set.
+    """
+    per_node = [name for name in names if name in vec_params]
+    shared = [name for name in names if name not in vec_params]
+
+    if per_node:
+        group.promotes(subsys_name, inputs=per_node)
+    if shared:
+        if num_nodes == 1:
+            group.promotes(subsys_name, inputs=shared)
+            return
+        group.promotes(subsys_name, inputs=shared, src_indices=np.zeros(num_nodes, dtype=int))
+        for name in shared:
+            # several subsystems of group can share the input, the default only needs setting once
+            if defaulted is None or name not in defaulted:
+                group.set_input_defaults(name, src_shape=(1,))
+                if defaulted is not None:
+                    defaulted.add(name)
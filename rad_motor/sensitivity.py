@@ -0,0 +1,117 @@
+# Variance based (Sobol) global sensitivity analysis.
+# The Saltelli design evaluates the model at N*(d+2) points: two independent sample matrices
+# A and B plus, for every input i, A with column i taken from B. All points go to the model in
+# one call, so an off-design Motor evaluates the whole design as num_nodes batches. First-order
+# and total indices use the Saltelli (2010) and Jansen estimators, with bootstrap confidence
+# intervals over the N base samples.
+
+from __future__ import absolute_import
+from collections import namedtuple
+import numpy as np
+
+SobolIndices = namedtuple('SobolIndices', ['names', 'S1', 'S1_conf', 'ST', 'ST_conf'])
+
+
+def saltelli_sample(bounds, N, seed=None):
+    """
+    Saltelli design for the uniform inputs bounds {name: (lower, upper)}, from a scrambled Sobol
+    sequence. Returns {name: array of N*(d+2) values}, rows ordered A, B, AB_1 ... AB_d.
+    N should be a power of 2 to keep the balance properties of the sequence.
+    """
+    from scipy.stats import qmc
+
+    names = list(bounds)
+    d = len(names)
+    base = qmc.Sobol(2*d, scramble=True, seed=seed).random(N)
+    A, B = base[:, :d], base[:, d:]
+
+    X = np.empty(((d + 2) * N, d))
+    X[:N] = A
+    X[N:2*N] = B
+    for i in range(d):
+        AB = X[(2 + i)*N:(3 + i)*N]
+        AB[:] = A
+        AB[:, i] = B[:, i]
+
+    lower = np.array([bounds[name][0] for name in names], dtype=float)
+    upper = np.array([bounds[name][1] for name in names], dtype=float)
+    X = lower + X * (upper - lower)
+    return {name: X[:, j] for j, name in enumerate(names)}
+
+
+def _indices(fA, fB, fAB):
+    # fA, fB (..., N), fAB (..., d, N); the leading axes are bootstrap replicates
+    V = np.var(np.concatenate([fA, fB], axis=-1), axis=-1)[..., None]
+    S1 = np.mean(fB[..., None, :] * (fAB - fA[..., None, :]), axis=-1) / V
+    ST = 0.5 * np.mean((fA[..., None, :] - fAB)**2, axis=-1) / V
+    return S1, ST
+
+
+def sobol_indices(Y, N, names, n_boot=200, conf=0.95, seed=None):
+    """
+    First-order and total Sobol indices of the model output Y, evaluated at a saltelli_sample of
+    the inputs names. The confidence intervals are the half widths of the conf percentile
+    interval over n_boot bootstrap resamples.
+    """
+    d = len(names)
+    Y = np.asarray(Y, dtype=float)
+    if Y.size != (d + 2) * N:
+        raise ValueError(f'expected {(d + 2) * N} model outputs for N={N} and {d} inputs, got {Y.size}')
+    fA, fB = Y[:N], Y[N:2*N]
+    fAB = Y[2*N:].reshape(d, N)
+    S1, ST = _indices(fA, fB, fAB)
+
+    r = np.random.default_rng(seed).integers(0, N, size=(n_boot, N))
+    S1_b, ST_b = _indices(fA[r], fB[r], np.moveaxis(fAB[:, r], 0, 1))
+    tail = 50 * (1 - conf)
+    S1_conf = 0.5 * np.diff(np.percentile(S1_b, [tail, 100 - tail], axis=0), axis=0)[0]
+    ST_conf = 0.5 * np.diff(np.percentile(ST_b, [tail, 100 - tail], axis=0), axis=0)[0]
+    return SobolIndices(tuple(names), S1, S1_conf, ST, ST_conf)
+
+
+def sobol(model, bounds, N=1024, outputs=('Eff',), n_boot=200, conf=0.95, seed=None):
+    """
+    Sobol indices of outputs with respect to the uniform inputs bounds {name: (lower, upper)}.
+    model(samples, outputs) takes {name: array} and returns {output: array}, see
+    evaluator_model and design_model. Returns {output: SobolIndices}.
+    """
+    samples = saltelli_sample(bounds, N, seed=seed)
+    Y = model(samples, outputs)
+    return {name: sobol_indices(Y[name], N, list(bounds), n_boot=n_boot, conf=conf, seed=seed) for name in outputs}
+
+
+def evaluator_model(evaluator, **node_inputs):
+    """
+    Model for sobol that runs the samples as nodes of evaluator, an OffDesignEvaluator whose
+    vectorize_params include the sampled Motor inputs. node_inputs (rpm, I, P_shaft) are fixed
+    for every sample.
+    """
+    def model(samples, outputs):
+        nodes = dict(node_inputs, **samples)
+        return evaluator.evaluate(outputs=outputs, **nodes)
+    return model
+
+
+# outputs of design_model that sum Motor outputs
+DESIGN_SUMS = {'mass': ('sta_mass', 'rot_mass', 'mag_mass')}
+
+
+def design_model(inputs=None, backend='numpy', design_cache=None):
+    """
+    Model for sobol that sizes a DESIGN motor for every sample, for inputs such as k_wb that
+    only act on the (scalar) sizing loop. One problem is set up and re-solved; besides the
+    Motor outputs, 'mass' gives the total of stator, rotor and magnet mass.
+    """
+    from rad_motor.analysis.evaluator import design_problem, size_motor
+
+    prob = design_problem(backend, design_cache=design_cache)
+
+    def model(samples, outputs):
+        n = len(next(iter(samples.values())))
+        Y = {name: np.empty(n) for name in outputs}
+        for k in range(n):
+            size_motor(dict(inputs or {}, **{name: val[k] for name, val in samples.items()}), prob=prob)
+            for name in outputs:
+                Y[name][k] = sum(prob.get_val(part)[0] for part in DESIGN_SUMS.get(name, (name,)))
+        return Y
+    return model
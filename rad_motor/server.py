@@ -0,0 +1,257 @@
+# Local evaluation server that keeps set-up Motor problems warm between requests.
+# Clients send newline-delimited JSON requests over a Unix socket or localhost TCP:
+#
+#   {"id": 1, "op": "evaluate", "inputs": {...}, "nodes": {"rpm": [...], "I": [...]}, "outputs": ["Eff"]}
+#   {"id": 2, "op": "size", "inputs": {...}, "outputs": ["Eff"]}
+#
+# and get {"id": 1, "results": {output: [...]}} or {"id": 1, "error": "..."} back, possibly out
+# of order. Off-design requests that arrive within batch_window of each other and share their
+# inputs are concatenated into one num_nodes evaluation; requests for unknown outputs are
+# answered with an error before that, so they do not fail the rest of the batch. Input values
+# are plain numbers or arrays in the Motor's units, or [value, units] pairs.
+
+from __future__ import absolute_import
+import sys
+import json
+import asyncio
+import argparse
+import warnings
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from rad_motor.kernels import BACKENDS
+from rad_motor.analysis.evaluator import OffDesignEvaluator, design_problem, size_motor, design_geometry
+
+_Request = namedtuple('_Request', ['inputs', 'nodes', 'outputs', 'future'])
+
+
+def _decode_inputs(inputs):
+    # [value, units] pairs become the (value, units) tuples set_inputs takes
+    return {name: tuple(val) if isinstance(val, list) and len(val) == 2 and isinstance(val[1], str) else val
+            for name, val in (inputs or {}).items()}
+
+
+def _jsonable(results):
+    return {name: val.tolist() if isinstance(val, np.ndarray) else val for name, val in results.items()}
+
+
+class MotorServer(object):
+    """
+    Serves evaluate and size requests. Problems are kept per set of input names, at most
+    max_problems of each kind, least recently used first out. The models run one at a time on
+    a worker thread so the event loop keeps collecting requests meanwhile.
+    """
+
+    def __init__(self, backend='numpy', batch_window=1e-3, max_nodes=4096, max_problems=16, design_cache=None):
+        self.backend = backend
+        self.batch_window = batch_window
+        self.max_nodes = max_nodes
+        self.max_problems = max_problems
+        self.design_cache = design_cache
+        self.n_requests = 0
+        self.n_batches = 0
+        self._evaluators = OrderedDict()
+        self._design_problems = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._queue = None
+        self._batcher = None
+        self._server = None
+
+    def _warm(self, cache, key, make):
+        if key in cache:
+            cache.move_to_end(key)
+        else:
+            cache[key] = make()
+            if len(cache) > self.max_problems:
+                cache.popitem(last=False)
+        return cache[key]
+
+    # --- model runs, on the worker thread ---
+
+    def _evaluator(self, inputs, node_names):
+        key = (tuple(sorted(inputs)), tuple(sorted(node_names)))
+        vec_params = [name for name in node_names if name not in ('rpm', 'I', 'P_shaft')]
+        return self._warm(self._evaluators, key, lambda: OffDesignEvaluator(backend=self.backend, max_nodes=self.max_nodes,
+                                                                            vectorize_params=vec_params))
+
+    def _unknown_outputs(self, inputs, node_names, outputs):
+        names = self._evaluator(inputs, node_names).names()
+        return [name for name in outputs if name not in names]
+
+    def _evaluate(self, inputs, nodes, outputs):
+        ev = self._evaluator(inputs, nodes)
+        ev.set_inputs(**inputs)
+        return ev.evaluate(outputs=outputs, **nodes)
+
+    def _size(self, inputs, outputs):
+        key = tuple(sorted(inputs))
+        p = self._warm(self._design_problems, key, lambda: design_problem(self.backend, design_cache=self.design_cache))
+        size_motor(inputs, prob=p)
+        results = {name: p.get_val(name).copy() for name in outputs}
+        results.update({name: [val.tolist(), units] for name, (val, units) in design_geometry(p).items()})
+        return results
+
+    # --- batching ---
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def evaluate(self, inputs=None, nodes=None, outputs=('Eff',)):
+        """queue an off-design evaluation, returns {output: array over the nodes}"""
+        nodes = {name: np.atleast_1d(np.asarray(val, dtype=float)) for name, val in (nodes or {}).items()}
+        arrays = np.broadcast_arrays(*nodes.values())
+        req = _Request(_decode_inputs(inputs), dict(zip(nodes, arrays)), tuple(outputs),
+                       asyncio.get_running_loop().create_future())
+        self.n_requests += 1
+        await self._queue.put(req)
+        return await req.future
+
+    async def size(self, inputs=None, outputs=('Eff',)):
+        """size a DESIGN motor, returns the outputs and the geometry as [value, units]"""
+        self.n_requests += 1
+        return await self._run(self._size, _decode_inputs(inputs), tuple(outputs))
+
+    async def _batch_loop(self):
+        while True:
+            pending = [await self._queue.get()]
+            await asyncio.sleep(self.batch_window)
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+
+            groups = OrderedDict()
+            for req in pending:
+                key = (json.dumps(_jsonable(req.inputs), sort_keys=True), tuple(sorted(req.nodes)))
+                groups.setdefault(key, []).append(req)
+            for reqs in groups.values():
+                await self._run_group(reqs)
+
+    async def _run_group(self, reqs):
+        # a request for an unknown output must not fail the others of its batch
+        requested = tuple(OrderedDict.fromkeys(name for req in reqs for name in req.outputs))
+        try:
+            unknown = set(await self._run(self._unknown_outputs, reqs[0].inputs, reqs[0].nodes, requested))
+        except Exception:
+            unknown = set()         # the model can not be built, the evaluation below reports why
+        ok = []
+        for req in reqs:
+            bad = [name for name in req.outputs if name in unknown]
+            if bad:
+                if not req.future.done():
+                    req.future.set_exception(KeyError(f'unknown outputs {bad}'))
+            else:
+                ok.append(req)
+        if not ok:
+            return
+
+        outputs = tuple(name for name in requested if name not in unknown)
+        sizes = [next(iter(req.nodes.values())).size if req.nodes else 1 for req in ok]
+        nodes = {name: np.concatenate([req.nodes[name] for req in ok]) for name in ok[0].nodes}
+        try:
+            results = await self._run(self._evaluate, ok[0].inputs, nodes, outputs)
+        except Exception as err:
+            for req in ok:
+                if not req.future.done():
+                    req.future.set_exception(err)
+            return
+        self.n_batches += 1
+
+        start = 0
+        for req, n in zip(ok, sizes):
+            if not req.future.done():
+                req.future.set_result({name: results[name][start:start+n] for name in req.outputs})
+            start += n
+
+    # --- connections ---
+
+    async def _handle(self, reader, writer):
+        lock = asyncio.Lock()
+
+        async def respond(line):
+            msg = {}
+            try:
+                msg = json.loads(line)
+                if not isinstance(msg, dict):
+                    msg = {}
+                    raise ValueError('a request is a JSON object')
+                if msg.get('op') == 'size':
+                    results = await self.size(msg.get('inputs'), msg.get('outputs', ('Eff',)))
+                elif msg.get('op', 'evaluate') == 'evaluate':
+                    results = await self.evaluate(msg.get('inputs'), msg.get('nodes'), msg.get('outputs', ('Eff',)))
+                else:
+                    raise ValueError(f"unknown op '{msg['op']}'")
+                reply = {'id': msg.get('id'), 'results': _jsonable(results)}
+            except Exception as err:
+                reply = {'id': msg.get('id'), 'error': f'{type(err).__name__}: {err}'}
+            async with lock:
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """listen on the Unix socket path, or on host:port (port 0 picks a free port)"""
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.ensure_future(self._batch_loop())
+        if path:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=host, port=port)
+        return self._server
+
+    @property
+    def address(self):
+        return self._server.sockets[0].getsockname()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        self._executor.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='rad-motor-server', description='Serve warm Motor problems to local clients.')
+    parser.add_argument('--socket', default=None, help='Unix socket path, TCP on --host/--port otherwise')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--backend', choices=BACKENDS, default='numpy')
+    parser.add_argument('--batch-window', type=float, default=1e-3, help='seconds to collect concurrent requests into one batch')
+    parser.add_argument('--cache', default=None, metavar='DIR', help='DesignCache directory for size requests')
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache:
+        from rad_motor.design_cache import DesignCache
+        cache = DesignCache(args.cache)
+    server = MotorServer(backend=args.backend, batch_window=args.batch_window, design_cache=cache)
+
+    async def serve():
+        srv = await server.start(args.socket, args.host, args.port)
+        print(f'rad-motor-server listening on {server.address}', file=sys.stderr)
+        async with srv:
+            await srv.serve_forever()
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# Flux densities from offline FEA results, looked up by geometry.
+# The table points are indexed by a k-d tree over the geometry keys (scaled by their spread)
+# when the table is loaded. A lookup takes the k nearest FEA points and blends them with
+# Gaussian weights (Nadaraya-Watson) tapered by (1 - d**2/d_k1**2)**2, d_k1 the distance to the
+# (k+1)-th neighbour, so a point leaves the blend with zero weight and the values stay continuous
+# when the neighbour set changes. The blend has analytic derivatives, so the values can sit inside
+# the sizing Newton solve in place of the fixed b_ry, b_sy, b_t and B_pk.
+
+from __future__ import absolute_import
+import re
+import numpy as np
+
+import openmdao.api as om
+
+DEFAULT_KEYS = ('rot_or', 't_mag', 'w_t', 'n_slots')
+
+_COLUMN = re.compile(r'^\s*([^\[\]]+?)\s*(?:\[(.*)\])?\s*$')
+
+
+def _parse_column(col):
+    # 'rot_or[m]' -> ('rot_or', 'm'), 'n_slots' -> ('n_slots', None)
+    name, units = _COLUMN.match(col).groups()
+    return name, units or None
+
+
+class FEATable(object):
+    """
+    keys and values map a name to (array, units) over the same FEA points. k is the number
+    of neighbours blended per lookup, bandwidth the Gaussian width in units of the typical
+    distance to the k-th neighbour.
+    """
+
+    def __init__(self, keys, values, k=16, bandwidth=0.5):
+        from scipy.spatial import cKDTree
+
+        self.key_names = tuple(keys)
+        self.key_units = {name: units for name, (_, units) in keys.items()}
+        self.value_names = tuple(values)
+        self.value_units = {name: units for name, (_, units) in values.items()}
+
+        X = np.column_stack([np.asarray(keys[name][0], dtype=float) for name in self.key_names])
+        self.values = np.column_stack([np.asarray(values[name][0], dtype=float) for name in self.value_names])
+        if X.shape[0] != self.values.shape[0]:
+            raise ValueError(f'FEA table keys have {X.shape[0]} points but values have {self.values.shape[0]}')
+
+        self.n_points = X.shape[0]
+        self.k = min(k, self.n_points)
+        self.center = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.
+        self.tree = cKDTree((X - self.center) / self.scale)
+
+        # typical k-th neighbour distance from a subset of the table points
+        sample = self.tree.data[np.random.default_rng(0).choice(self.n_points, min(self.n_points, 1000), replace=False)]
+        d, _ = self.tree.query(sample, k=self.k)
+        self.h = bandwidth * max(np.median(np.atleast_2d(d)[:, -1]), 1e-12)
+
+    @classmethod
+    def load(cls, path, keys=DEFAULT_KEYS, **kwargs):
+        """
+        Table from a .npz or .csv file whose columns are named 'name[units]' (units optional).
+        The columns in keys are the geometry, the other columns the looked-up values.
+        """
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                columns = {col: data[col] for col in data.files}
+        else:
+            header = np.genfromtxt(path, delimiter=',', max_rows=1, dtype=str)
+            data = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+            columns = {col: data[:, j] for j, col in enumerate(header)}
+
+        parsed = {_parse_column(col): val for col, val in columns.items()}
+        key_cols = {name: (val, units) for (name, units), val in parsed.items() if name in keys}
+        missing = [name for name in keys if name not in key_cols]
+        if missing:
+            raise ValueError(f'FEA table {path} has no column for the keys {missing}')
+        values = {name: (val, units) for (name, units), val in parsed.items() if name not in keys}
+        return cls({name: key_cols[name] for name in keys}, values, **kwargs)
+
+    def lookup(self, x):
+        """
+        Blended values at the geometry x (m, n_keys), in the key units. Returns values (m, n_values)
+        and their derivatives wrt the keys (m, n_values, n_keys). Complex x is supported.
+        """
+        x = np.atleast_2d(x)
+        u = (x - self.center) / self.scale
+        k = self.k
+        taper = k < self.n_points            # a table of at most k points always blends all of them
+        _, idx = self.tree.query(u.real, k=k + 1 if taper else k)
+        idx = idx.reshape(x.shape[0], -1)
+
+        diff = u[:, None, :] - self.tree.data[idx]            # (m, k(+1), n_keys)
+        d2 = np.sum(diff**2, axis=-1)
+        a = np.exp(-(d2[:, :k] - d2[:, :k].real.min(axis=1, keepdims=True)) / self.h**2)   # the shift cancels
+        g = -2 * diff[:, :k] / self.h**2                      # d(log a_i)/du
+        if taper:
+            # b_i = (1 - t_i)**2 with t_i = d_i**2/d_k1**2
+            R2 = d2[:, k:] + 1e-300                            # nonzero on duplicated table points
+            t = d2[:, :k] / R2
+            b = (1 - t)**2
+            dt = 2 * (diff[:, :k] - t[..., None] * diff[:, k:]) / R2[..., None]
+            dw = a[..., None] * (b[..., None] * g - 2 * (1 - t)[..., None] * dt)
+            w = a * b
+        else:
+            w = a
+            dw = a[..., None] * g
+        W = w.sum(axis=1, keepdims=True)
+
+        f_k = self.values[idx[:, :k]]                          # (m, k, n_values)
+        f = np.einsum('mk,mkv->mv', w, f_k) / W
+        # df/du = sum_i dw_i/du (f_i - f) / sum_j w_j
+        df_du = np.einsum('mkd,mkv->mvd', dw, f_k - f[:, None, :]) / W[:, :, None]
+        return f, df_du / self.scale
+
+
+class FEACorrectionComp(om.ExplicitComponent):
+    """Values of an FEATable at the geometry inputs (the table keys), one design at a time."""
+
+    def initialize(self):
+        self.options.declare('table', types=FEATable)
+
+    def setup(self):
+        table = self.options['table']
+        for i, name in enumerate(table.key_names):
+            self.add_input(name, table.center[i], units=table.key_units[name])
+        for name in table.value_names:
+            self.add_output(name, 1., units=table.value_units[name])
+        self.declare_partials(list(table.value_names), list(table.key_names))
+
+    def _lookup(self, inputs):
+        table = self.options['table']
+        x = np.array([inputs[name][0] for name in table.key_names])
+        f, df = table.lookup(x[None, :])
+        return f[0], df[0]
+
+    def compute(self, inputs, outputs):
+        f, _ = self._lookup(inputs)
+        for j, name in enumerate(self.options['table'].value_names):
+            outputs[name] = f[j]
+
+    def compute_partials(self, inputs, J):
+        table = self.options['table']
+        _, df = self._lookup(inputs)
+        for j, name in enumerate(table.value_names):
+            for i, key in enumerate(table.key_names):
+                J[name, key] = df[j, i]
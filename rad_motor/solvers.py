@@ -0,0 +1,399 @@
+# Linear solvers for vectorized (num_nodes) motor groups, and the nonlinear solvers of the sizing loop.
+
+from __future__ import absolute_import
+import time
+from collections import namedtuple
+import numpy as np
+import scipy.linalg
+import scipy.optimize
+from scipy.sparse import csr_matrix
+
+import openmdao.api as om
+from openmdao.core.analysis_error import AnalysisError
+
+
+class NodeBlockSolver(om.DirectSolver):
+    """
+    Direct solver for groups where every per-node output only couples to the outputs of the
+    same node. The assembled jacobian is split into the scalar (shared) outputs and one k x k
+    block per node, the node blocks are inverted together and the scalars are solved through
+    their (small) Schur complement, so the cost is linear in num_nodes.
+
+    The outputs named in shared_outputs are shared, every other output must have length num_nodes.
+    The assembled matrix is read from DirectSolver's private _assembled_jac._int_mtx._matrix,
+    as laid out in OpenMDAO 3.16.0.
+    """
+
+    SOLVER = 'LN: NodeBlock'
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('assemble_jac', True)
+        super(NodeBlockSolver, self).__init__(**kwargs)
+
+    def _declare_options(self):
+        super(NodeBlockSolver, self)._declare_options()
+        self.options.declare('num_nodes', types=int, desc='length of the per-node outputs')
+        self.options.declare('shared_outputs', default=(), types=(tuple, list),
+                             desc='promoted names (relative to the group) of the outputs that are not per node')
+
+    def _setup_solvers(self, system, depth):
+        super(NodeBlockSolver, self)._setup_solvers(system, depth)
+        if not self.options['assemble_jac']:
+            raise ValueError(f'{self.msginfo}: NodeBlockSolver needs assemble_jac=True.')
+
+    def _node_layout(self):
+        # node index (-1 for shared) and position within the node block of every output entry
+        system = self._system()
+        nn = self.options['num_nodes']
+        shared = set(self.options['shared_outputs'])
+        abs2prom = system._var_allprocs_abs2prom['output']
+        prefix = system.pathname + '.' if system.pathname else ''
+        node, slot = [], []
+        k = 0
+        for abs_name, meta in system._var_abs2meta['output'].items():
+            size = meta['size']
+            if abs2prom[abs_name] in shared or abs_name[len(prefix):] in shared:
+                node.append(np.full(size, -1))
+                slot.append(np.full(size, -1))
+            elif size == nn:
+                node.append(np.arange(nn))
+                slot.append(np.full(nn, k))
+                k += 1
+            else:
+                raise ValueError(f"{self.msginfo}: output '{abs_name}' has size {size}, per-node outputs need "
+                                 f"size {nn}. Add it to shared_outputs if it is not per node.")
+        return np.concatenate(node), np.concatenate(slot), k
+
+    def _linearize(self):
+        system = self._system()
+        # private in OpenMDAO 3.16.0, the assembled jacobian of the group
+        matrix = self._assembled_jac._int_mtx._matrix
+        if not hasattr(matrix, 'tocoo'):
+            raise RuntimeError(f"{self.msginfo}: NodeBlockSolver needs a sparse assembled jacobian, "
+                               f"set assembled_jac_type='csc' on {system.pathname or 'the model'}.")
+        node, slot, k = self._node_layout()
+        self._lu = _NodeBlockLU(matrix, node, slot, self.options['num_nodes'], k, self.msginfo)
+
+
+class _NodeBlockLU(object):
+    # J ordered as [shared, per-node] is [[A, C], [B, D]] with D block diagonal
+
+    def __init__(self, matrix, node, slot, num_nodes, k, msginfo=''):
+        nn = num_nodes if k else 0
+        shared = np.flatnonzero(node < 0)
+        g = shared.size
+
+        gpos = np.full(node.size, -1)
+        gpos[shared] = np.arange(g)
+        npos = np.where(node >= 0, node*k + slot, -1)
+        order = np.empty(nn*k, dtype=int)
+        order[npos[node >= 0]] = np.flatnonzero(node >= 0)
+
+        coo = matrix.tocoo()
+        coo.sum_duplicates()
+        r, c, v = coo.row, coo.col, coo.data
+        rn, cn = node[r], node[c]
+
+        nodal = (rn >= 0) & (cn >= 0)
+        if np.any(rn[nodal] != cn[nodal]):
+            raise RuntimeError(f'{msginfo}: the jacobian couples outputs of different nodes, '
+                               'NodeBlockSolver only handles node-local blocks.')
+        D = np.zeros((nn, k, k), dtype=v.dtype)
+        D[rn[nodal], slot[r[nodal]], slot[c[nodal]]] = v[nodal]
+
+        m = (rn < 0) & (cn < 0)
+        A = np.zeros((g, g), dtype=v.dtype)
+        A[gpos[r[m]], gpos[c[m]]] = v[m]
+        m = (rn >= 0) & (cn < 0)
+        B = csr_matrix((v[m], (npos[r[m]], gpos[c[m]])), shape=(nn*k, g))
+        m = (rn < 0) & (cn >= 0)
+        C = csr_matrix((v[m], (gpos[r[m]], npos[c[m]])), shape=(g, nn*k))
+
+        try:
+            Dinv = np.linalg.inv(D)
+        except np.linalg.LinAlgError:
+            raise RuntimeError(f'{msginfo}: singular node block in the jacobian.')
+
+        S = A
+        if C.nnz:
+            # shared outputs that depend on the nodes, one Schur column per shared output
+            S = A.copy()
+            for j in range(g):
+                col = B[:, j].toarray().reshape(nn, k)
+                S[:, j] -= C.dot(np.einsum('nij,nj->ni', Dinv, col).ravel())
+
+        self._shared, self._order = shared, order
+        self._nn, self._k = nn, k
+        self._Dinv, self._B, self._C = Dinv, B, C
+        self._S = scipy.linalg.lu_factor(S) if g else None
+
+    def _node_solve(self, Dinv, b):
+        return np.einsum('nij,nj->ni', Dinv, b.reshape(self._nn, self._k)).ravel()
+
+    def solve(self, b, trans='N'):
+        # same interface as scipy's SuperLU.solve, trans='T' solves with the transposed jacobian
+        if trans == 'N':
+            Dinv, B, C, trans_lu = self._Dinv, self._B, self._C, 0
+        else:
+            Dinv, B, C, trans_lu = self._Dinv.transpose(0, 2, 1), self._C.T, self._B.T, 1
+
+        bg = b[self._shared]
+        bn = b[self._order]
+
+        x = np.empty_like(b)
+        xg = bg
+        if self._S is not None:
+            if C.nnz:
+                bg = bg - C.dot(self._node_solve(Dinv, bn))
+            xg = scipy.linalg.lu_solve(self._S, bg, trans=trans_lu)
+            x[self._shared] = xg
+        if self._k:
+            x[self._order] = self._node_solve(Dinv, bn - B.dot(xg))
+        return x
+
+
+def newton_converged(solver):
+    """
+    True if the last solve of a NewtonSolver ended with a finite residual norm within its atol or rtol.
+    """
+    norm = solver._system()._residuals.get_norm()
+    norm0 = solver._norm0 if solver._norm0 else 1.
+    return bool(np.isfinite(norm) and (norm <= solver.options['atol'] or norm / norm0 <= solver.options['rtol']))
+
+
+class CachedNewtonSolver(om.NewtonSolver):
+    """
+    Newton solver that restores the outputs of its group from a DesignCache when the group's
+    external inputs match a previously converged solve, and stores every converged solution.
+    Complex step runs always solve.
+    """
+
+    def _declare_options(self):
+        super(CachedNewtonSolver, self)._declare_options()
+        self.options.declare('cache', default=None, allow_none=True, desc='DesignCache, no caching if None')
+
+    def solve(self):
+        cache = self.options['cache']
+        system = self._system()
+        self._cache_hit = False
+        if cache is None or system.under_complex_step:
+            return super(CachedNewtonSolver, self).solve()
+
+        key = cache.key(system)
+        outputs = cache.get(key)
+        self._cache_hit = outputs is not None and outputs.size == system._outputs.asarray().size
+        if self._cache_hit:
+            system._outputs.set_val(outputs)
+            system._transfer('nonlinear', 'fwd')
+            self._iter_count = 0
+            return
+
+        super(CachedNewtonSolver, self).solve()
+        # only store solves that met the tolerances, a nan residual also ends the iterations early
+        if newton_converged(self):
+            cache.put(key, system._outputs.asarray())
+
+
+# outcome of a SafeguardedNewtonSolver solve. code is one of SOLVE_CODES, iterations the Newton
+# iterations, evaluations the residual evaluations of the fallback and time the wall-clock seconds
+SolveStatus = namedtuple('SolveStatus', ['code', 'converged', 'iterations', 'evaluations', 'time'])
+SOLVE_CODES = ('newton',     # Newton converged
+               'cached',     # restored from the DesignCache
+               'bracket',    # Newton gave up, the bracketed fallback converged
+               'no_root',    # no sign change of the residual anywhere in the bracket
+               'budget',     # the time or evaluation budget ran out
+               'failed')     # Newton did not converge and there was no fallback (safeguard off)
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+class _NewtonAbort(Exception):
+    pass
+
+
+# start of the DirectSolver (OpenMDAO 3.16.0) messages for a singular or nan jacobian
+_SINGULAR_MESSAGES = ('Singular entry found', 'NaN entries found', 'Jacobian in ')
+
+
+def _is_singular(err):
+    return isinstance(err, np.linalg.LinAlgError) or (isinstance(err, RuntimeError) and str(err).startswith(_SINGULAR_MESSAGES))
+
+
+class SafeguardedNewtonSolver(CachedNewtonSolver):
+    """
+    Newton solver for a group with a single scalar implicit output (the fallback variable, like the
+    rot_or balance of the sizing loop). Newton is abandoned as soon as it diverges (residual norm
+    above div_limit times the initial one, or not finite), stalls (no halving of the best norm
+    within stall_window iterations) or its jacobian is singular. The solver then scans the residual
+    of the fallback variable over bracket(system), with the rest of the group converged by
+    Gauss-Seidel passes at every point, and refines the sign change closest to the starting value
+    with Brent's method. The group must not scale its outputs or residuals.
+
+    time_budget [s] and max_evals bound the whole solve. The outcome of the last solve is in status.
+    """
+
+    SOLVER = 'NL: Safeguarded Newton'
+
+    def __init__(self, **kwargs):
+        super(SafeguardedNewtonSolver, self).__init__(**kwargs)
+        self.status = None
+
+    def _declare_options(self):
+        super(SafeguardedNewtonSolver, self)._declare_options()
+        self.options.declare('fallback_var', types=str, desc='promoted name of the scalar implicit output that the fallback solves for')
+        self.options.declare('bracket', desc='bracket(system) -> (lower, upper) of fallback_var in its units')
+        self.options.declare('div_limit', default=1e3, desc='Newton is abandoned when the residual norm grows past div_limit times the initial norm')
+        self.options.declare('stall_window', default=6, types=int, desc='Newton is abandoned when the best norm has not halved in this many iterations')
+        self.options.declare('feasible', default=None, allow_none=True, desc='feasible(system) -> bool, only sign changes between feasible points are refined')
+        self.options.declare('n_scan', default=16, types=int, desc='points the bracket is scanned at for sign changes')
+        self.options.declare('n_refine', default=6, types=int, desc='bisections that locate the edges of the feasible region')
+        self.options.declare('gs_maxiter', default=20, types=int, desc='Gauss-Seidel passes per fallback evaluation')
+        self.options.declare('max_evals', default=200, types=int, desc='fallback residual evaluations per solve')
+        self.options.declare('time_budget', default=None, allow_none=True, desc='wall-clock seconds per solve, None for no limit')
+
+    def _check_budget(self):
+        budget = self.options['time_budget']
+        if budget is not None and time.perf_counter() - self._t0 > budget:
+            raise _OutOfBudget()
+
+    def _iter_get_norm(self):
+        norm = super(SafeguardedNewtonSolver, self)._iter_get_norm()
+        self._norms.append(norm)
+        return norm
+
+    def _single_iteration(self):
+        self._check_budget()
+        norms = self._norms
+        if not np.isfinite(norms[-1]) or norms[-1] > self.options['div_limit'] * norms[0]:
+            raise _NewtonAbort()
+        w = self.options['stall_window']
+        if len(norms) > w and min(norms[-w:]) > 0.5 * min(norms[:-w]):
+            raise _NewtonAbort()
+        if len(norms) > 1:
+            # a Newton step left the bracket
+            lo, hi = self.options['bracket'](self._system())
+            x = self._system()._outputs[self.options['fallback_var']][0].real
+            if not lo <= x <= hi:
+                raise _NewtonAbort()
+        try:
+            super(SafeguardedNewtonSolver, self)._single_iteration()
+        except (RuntimeError, np.linalg.LinAlgError) as err:
+            if not _is_singular(err):
+                raise
+            raise _NewtonAbort()
+        except AnalysisError:
+            # a child solver failed
+            raise _NewtonAbort()
+
+    def solve(self):
+        system = self._system()
+        if system.under_complex_step:
+            return super(SafeguardedNewtonSolver, self).solve()
+
+        self._t0 = time.perf_counter()
+        self._norms = []
+        self._n_evals = 0
+        x_name = self.options['fallback_var']
+        x0 = system._outputs[x_name].real.copy()
+
+        code = None
+        try:
+            super(SafeguardedNewtonSolver, self).solve()
+            if self._cache_hit:
+                code = 'cached'
+            elif self._norms and self._converged(self._norms[-1], self._norms[0]):
+                code = 'newton'
+        except (_NewtonAbort, _OutOfBudget, AnalysisError):
+            # AnalysisError: Newton ran out of iterations with err_on_non_converge set
+            pass
+
+        if code is None:
+            newton_iters = self._iter_count
+            try:
+                code = self._fallback(system, x_name, x0)
+            except _OutOfBudget:
+                code = 'budget'
+            self._iter_count = newton_iters
+            if code == 'bracket' and self.options['cache'] is not None:
+                self.options['cache'].put(self.options['cache'].key(system), system._outputs.asarray())
+
+        converged = code in ('newton', 'cached', 'bracket')
+        self.status = SolveStatus(code, converged, self._iter_count, self._n_evals, time.perf_counter() - self._t0)
+
+        if not converged:
+            msg = f"Solver '{self.SOLVER}' on system '{system.pathname}' failed: {code}."
+            if self.options['iprint'] > -1:
+                print(self._solver_info.prefix + msg)
+            if self.options['err_on_non_converge']:
+                raise AnalysisError(msg)
+
+    def _converged(self, norm, norm0):
+        return norm <= self.options['atol'] or norm <= self.options['rtol'] * norm0
+
+    def _residual(self, system, x_name, x, rtol=1e-10):
+        # residual of the fallback variable at x, the rest of the group converged by Gauss-Seidel to rtol,
+        # and whether the group is feasible there
+        if self._n_evals >= self.options['max_evals']:
+            raise _OutOfBudget()
+        self._check_budget()
+        self._n_evals += 1
+
+        outputs = system._outputs
+        outputs[x_name] = x
+        prev = None
+        for _ in range(self.options['gs_maxiter']):
+            self._gauss_seidel_pass(system)
+            outputs[x_name] = x
+            vals = outputs.asarray().copy()
+            if prev is not None and np.allclose(vals, prev, rtol=rtol, atol=0, equal_nan=True):
+                break
+            prev = vals
+        system._apply_nonlinear()
+        feasible = self.options['feasible']
+        return system._residuals[x_name][0].real, feasible is None or bool(feasible(system))
+
+    def _gauss_seidel_pass(self, system):
+        # one pass over the subsystems in order, as NonlinearBlockGS does. run_solve_nonlinear is called on
+        # the vectors as they are, so the group must not scale its outputs or residuals. The transfer is
+        # private in OpenMDAO 3.16.0
+        for subsys in system.system_iter(recurse=False):
+            system._transfer('nonlinear', 'fwd', subsys.name)
+            subsys.run_solve_nonlinear()
+
+    def _fallback(self, system, x_name, x0):
+        lo, hi = self.options['bracket'](system)
+        # the scan only needs the sign, so the Gauss-Seidel passes stop early
+        scan = lambda x: self._residual(system, x_name, x, rtol=1e-4)
+        xs = list(np.linspace(lo, hi, self.options['n_scan']))
+        fs, ok = [list(v) for v in zip(*[scan(x) for x in xs])]
+
+        # pin down the edges of the feasible region, a root can sit between the last feasible scan point and the edge
+        for i in reversed(range(len(xs) - 1)):
+            if ok[i] != ok[i+1]:
+                a, b = (xs[i], xs[i+1]) if ok[i] else (xs[i+1], xs[i])
+                for _ in range(self.options['n_refine']):
+                    m = 0.5*(a + b)
+                    f_m, ok_m = scan(m)
+                    if ok_m:
+                        a, f_a = m, f_m
+                    else:
+                        b = m
+                if a != (xs[i] if ok[i] else xs[i+1]):
+                    xs.insert(i+1, a)
+                    fs.insert(i+1, f_a)
+                    ok.insert(i+1, True)
+        xs, fs, ok = np.array(xs), np.array(fs), np.array(ok)
+
+        # sign changes between feasible points, the one closest to where the solve started first
+        idx = np.flatnonzero(ok[:-1] & ok[1:] & np.isfinite(fs[:-1]) & np.isfinite(fs[1:]) & (np.sign(fs[:-1]) * np.sign(fs[1:]) <= 0))
+        idx = idx[np.argsort(np.abs(0.5*(xs[idx] + xs[idx+1]) - x0[0]))]
+        f = lambda x: self._residual(system, x_name, x)[0]
+        for i in idx:
+            x = scipy.optimize.brentq(f, xs[i], xs[i+1], xtol=1e-12, rtol=1e-12)
+            # a sign change across a pole is not a root
+            r = abs(f(x))
+            if r <= self.options['atol'] or r <= 1e-6*min(abs(fs[i]), abs(fs[i+1])):
+                return 'bracket'
+        return 'no_root'
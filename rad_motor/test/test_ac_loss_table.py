@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import openmdao.api as om
+
+from rad_motor.motor import Motor
+from rad_motor.thermal.thermal_group import AC_LOSS_REFERENCE, motor_loss_data
+from rad_motor.thermal.ac_loss_table import ACLossTable
+
+GEOMETRY = dict(rot_or=0.0684098557, sta_mass=0.95055653, w_slot=0.01483893, w_t=0.00479385)
+T_WINDINGS = np.array([20., 100., 200.])
+D_STRAND = np.array([0.2, 0.321, 0.5])    # strand diameter [mm]
+
+
+def table_4d(T_factor):
+    # the reference table, scaled along T_windings and constant along the strand size
+    scale = 1 + T_factor*(T_WINDINGS - 150)
+    return motor_loss_data[:, :, None, None] * scale[None, None, :, None] * np.ones(3)
+
+
+def off_design(table, T_windings=150.):
+    p = om.Problem()
+    p.model.add_subsystem('motor', Motor(num_nodes=2, design=False, ac_loss_table=table), promotes=['*'])
+    p.setup()
+    for name, val in GEOMETRY.items():
+        p[name] = val
+    p['rpm'] = [3000., 5400.]
+    p['I'] = [25., 34.5]
+    p['T_windings'] = T_windings
+    p.run_model()
+    return p
+
+
+class TestACLossTable(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def save(self, values, name='ac.npz', T_units='C', T_windings=T_WINDINGS):
+        path = os.path.join(self.tmp, name)
+        rpm, I_peak = AC_LOSS_REFERENCE.points
+        np.savez(path, **{'rpm[rpm]': rpm, 'I_peak[A]': I_peak, f'T_windings[{T_units}]': T_windings, 'r_strand[mm]': D_STRAND/2,
+                          'AC_power_factor': values})
+        return path
+
+    def test_load_and_share(self):
+        path = self.save(table_4d(0.))
+        table = ACLossTable.load(path)
+        self.assertIsInstance(table.values, np.memmap)
+        self.assertEqual(table.axis_names, ('rpm', 'I_peak', 'T_windings', 'r_strand'))
+        np.testing.assert_allclose(table.points[3], D_STRAND/2000)
+        self.assertIs(ACLossTable.load(path), table)
+
+        # constant along the new axes: the reference losses, and every Motor interpolates the one mapping
+        ref = off_design(AC_LOSS_REFERENCE)
+        p = off_design(table)
+        np.testing.assert_allclose(p['P_ac'], ref['P_ac'], rtol=1e-12)
+        self.assertIs(p.model.motor.thermal_properties.ac_power_factor_interp.interps['AC_power_factor'].values, table.values)
+
+        # losses follow the winding temperature through the table
+        hot = ACLossTable.load(self.save(table_4d(0.002), name='hot.npz'))
+        np.testing.assert_allclose(off_design(hot, T_windings=200.)['thermal_properties.AC_power_factor'], ref['thermal_properties.AC_power_factor']*1.1, rtol=1e-10)
+
+        npy = os.path.join(self.tmp, 'ac.npy')
+        np.save(npy, motor_loss_data)
+        rpm, I_peak = AC_LOSS_REFERENCE.points
+        table = ACLossTable.load(npy, axes={'rpm': (rpm, 'rpm'), 'I_peak': (I_peak, 'A')})
+        np.testing.assert_allclose(off_design(table)['P_ac'], ref['P_ac'], rtol=1e-12)
+
+    def test_temperature_units(self):
+        # 'C' is the label of the loss components, real temperature units convert to it
+        ref = off_design(ACLossTable.load(self.save(table_4d(0.002))), T_windings=120.)['P_ac']
+        for units, T in (('degC', T_WINDINGS), ('degF', T_WINDINGS*1.8 + 32), ('degK', T_WINDINGS + 273.15)):
+            table = ACLossTable.load(self.save(table_4d(0.002), name=f'{units}.npz', T_units=units, T_windings=T))
+            np.testing.assert_allclose(table.points[2], T_WINDINGS, rtol=1e-12)
+            np.testing.assert_allclose(off_design(table, T_windings=120.)['P_ac'], ref, rtol=1e-12)
+
+        table.save(os.path.join(self.tmp, 'saved.npz'))
+        np.testing.assert_allclose(ACLossTable.load(os.path.join(self.tmp, 'saved.npz')).points[2], T_WINDINGS, rtol=1e-12)
+        with self.assertRaises(ValueError):
+            ACLossTable.load(self.save(table_4d(0.), name='bad.npz', T_units='s'))
+
+    def test_validation(self):
+        rpm, I_peak = AC_LOSS_REFERENCE.points
+        packed = os.path.join(self.tmp, 'packed.npz')
+        np.savez_compressed(packed, **{'rpm[rpm]': rpm, 'I_peak[A]': I_peak, 'AC_power_factor': motor_loss_data})
+        with self.assertRaises(ValueError):
+            ACLossTable.load(packed)
+
+        bad = [({'rpm': (rpm, 'rpm'), 'I': (I_peak, 'A')}, motor_loss_data),              # unknown axis
+               ({'rpm': (rpm[::-1], 'rpm'), 'I_peak': (I_peak, 'A')}, motor_loss_data),   # descending
+               ({'rpm': (rpm, 'rpm'), 'I_peak': (I_peak[:-1], 'A')}, motor_loss_data),    # shape
+               ({'rpm': (rpm, 'm'), 'I_peak': (I_peak, 'A')}, motor_loss_data),           # units
+               ({'rpm': (rpm, 'rpm')}, motor_loss_data)]                                  # dimensions
+        for axes, values in bad:
+            with self.assertRaises(ValueError):
+                ACLossTable(axes, values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import os
+import sys
+import json
+import warnings
+import shutil
+import tempfile
+import subprocess
+import unittest
+import numpy as np
+
+from rad_motor import cli
+from rad_motor.analysis.evaluator import OffDesignEvaluator
+
+
+GEOMETRY = dict(rot_or=0.0684098557, sta_mass=0.95055653, w_slot=0.01483893, w_t=0.00479385)
+SET = [arg for name, val in GEOMETRY.items() for arg in ('--set', f'{name}={val}')]
+
+
+class TestCLI(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        return path
+
+    def test_read_cases(self):
+        ref = {'rpm': [1000., 2000.], 'I': [20., 20.]}
+        for text in ('rpm,I\n1000,20\n2000,20\n',
+                     '[{"rpm": 1000, "I": 20}, {"rpm": 2000, "I": 20}]',
+                     '{"rpm": 1000, "I": 20}\n{"rpm": 2000, "I": 20}\n',
+                     '{"rpm": [1000, 2000], "I": 20}'):
+            cases = cli.read_cases(io.StringIO(text))
+            self.assertEqual(sorted(cases), ['I', 'rpm'])
+            for name, val in ref.items():
+                np.testing.assert_array_equal(cases[name], val)
+
+    def test_off_design(self):
+        rpm = [1000., 3000., 5400., 2000.]
+        I = [10., 20., 34.5, 15.]
+        T_mag = [80., 80., 80., 120.]     # vectorizable, stays a node input
+        n_turns = [12, 12, 13, 13]        # shared input, evaluated in two runs
+        cases = self.write('cases.csv', 'rpm,I,T_mag,n_turns\n' + ''.join(f'{a},{b},{c},{d}\n' for a, b, c, d in zip(rpm, I, T_mag, n_turns)))
+
+        ndjson = os.path.join(self.dir, 'out.ndjson')
+        cli.main([cases, '-o', ndjson, '--outputs', 'Eff,P_wire', '--batch-size', '3'] + SET)
+        with open(ndjson) as f:
+            rows = [json.loads(line) for line in f]
+
+        npy = os.path.join(self.dir, 'out.npy')
+        cli.main([cases, '-o', npy, '--outputs', 'Eff,P_wire'] + SET)
+        arr = np.load(npy)
+
+        for turns, idx in ((12, slice(0, 2)), (13, slice(2, 4))):
+            ev = OffDesignEvaluator(dict(GEOMETRY, n_turns=turns), vectorize_params=('T_mag',))
+            ref = ev.evaluate(outputs=('Eff', 'P_wire'), rpm=rpm[idx], I=I[idx], T_mag=T_mag[idx])
+            for name in ('Eff', 'P_wire'):
+                np.testing.assert_allclose([row[name] for row in rows[idx]], ref[name], rtol=1e-12)
+                np.testing.assert_allclose(arr[name][idx], ref[name], rtol=1e-12)
+
+    def test_in_process_leaves_interpreter(self):
+        # the IPython probe shortcut is only for the console entry point, warnings are filtered for the run only
+        cases = self.write('cases.csv', 'rpm,I\n1000,20\n')
+        filters, showwarning = list(warnings.filters), warnings.showwarning
+        had_ipython = 'IPython' in sys.modules
+        cli.main([cases, '-o', os.path.join(self.dir, 'out.ndjson')] + SET)
+        self.assertEqual(warnings.filters, filters)
+        self.assertIs(warnings.showwarning, showwarning)
+        self.assertEqual('IPython' in sys.modules, had_ipython)
+
+    def test_lazy_imports(self):
+        code = 'import sys, rad_motor.cli; print(any(m.split(".")[0] in ("openmdao", "numba", "scipy") for m in sys.modules))'
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(out.strip(), 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
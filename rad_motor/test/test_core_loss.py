@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from rad_motor.motor import Motor
+from rad_motor.thermal.motor_losses import SteinmetzLossComp, CoreLossTableComp, steinmetz_table
+
+
+def core_loss_problem(comp, **inputs):
+    p = om.Problem()
+    p.model.add_subsystem('loss', comp, promotes=['*'])
+    p.setup(force_alloc_complex=True)
+    for name, val in inputs.items():
+        p[name] = val
+    p.run_model()
+    return p
+
+
+class TestCoreLossTable(unittest.TestCase):
+
+    def test_matches_steinmetz(self):
+        # a power law is linear in log space, so the table reproduces the fit exactly, also outside it
+        f_e = np.array([5., 90., 450., 900., 1234., 8000.])
+        ref = core_loss_problem(SteinmetzLossComp(num_nodes=6), f_e=f_e, B_pk=2.4, sta_mass=0.95)
+        p = core_loss_problem(CoreLossTableComp(num_nodes=6), f_e=f_e, B_pk=2.4, sta_mass=0.95)
+        np.testing.assert_allclose(p['P_steinmetz'], ref['P_steinmetz'], rtol=1e-12)
+
+    def test_table_points_and_partials(self):
+        f_e = np.array([50., 400., 1000., 3000.])
+        B_pk = np.array([0.5, 1.0, 1.5, 2.0])
+        f, B = np.meshgrid(f_e, B_pk, indexing='ij')
+        loss = 0.01 * f**(1.2 + 0.1*np.log(f)/np.log(10)) * B**(1.8 + 0.2*B)      # exponents vary over the table
+
+        nn = 6
+        comp = CoreLossTableComp(num_nodes=nn, table=(f_e, B_pk, loss))
+        p = core_loss_problem(comp, f_e=[50., 1000., 3000., 700., 2000., 4000.],
+                              B_pk=[0.5, 1.5, 2.0, 1.2, 0.7, 2.2], sta_mass=2.)
+        np.testing.assert_allclose(p['P_steinmetz'][:3], 2*loss[[0, 2, 3], [0, 2, 3]], rtol=1e-12)
+
+        data = p.check_partials(method='cs', out_stream=None)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_bad_table(self):
+        comp = CoreLossTableComp(num_nodes=2, table=(np.array([10., 100.]), np.array([1., 2.]), np.ones((3, 2))))
+        with self.assertRaises(ValueError):
+            core_loss_problem(comp)
+
+    def test_motor_per_node_B_pk(self):
+        nn = 4
+        geometry = dict(rot_or=0.0684098557, sta_mass=0.95055653, w_slot=0.01483893, w_t=0.00479385)
+        probs = {}
+        for core_loss in ('steinmetz', 'table'):
+            p = om.Problem()
+            p.model.add_subsystem('motor', Motor(num_nodes=nn, design=False, core_loss=core_loss), promotes=['*'])
+            p.setup()
+            for name, val in geometry.items():
+                p[name] = val
+            p['rpm'] = [1000, 2000, 4000, 5400]
+            p['B_pk'] = 2.4
+            p.run_model()
+            probs[core_loss] = p
+
+        np.testing.assert_allclose(probs['table']['P_steinmetz'], probs['steinmetz']['P_steinmetz'], rtol=1e-10)
+
+        p = probs['table']
+        p['B_pk'] = [2.4, 2.0, 1.6, 1.2]
+        p.run_model()
+        self.assertTrue(np.all(np.diff(p['P_steinmetz'] / probs['steinmetz']['P_steinmetz']) < 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import numpy as np
+import scipy.sparse
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_totals
+
+from rad_motor.motor import Motor
+from rad_motor.solvers import _NodeBlockLU
+from rad_motor.analysis.evaluator import OffDesignEvaluator
+
+
+GEOMETRY = dict(rot_or=0.0684098557, sta_mass=0.95055653, w_slot=0.01483893, w_t=0.00479385)
+MATERIALS = dict(B_pk=2.4, T_windings=150, T_mag=100, n_slots=24, n_m=20, n_turns=12)
+
+
+def current_balance_problem(nn, **options):
+    p = om.Problem()
+    p.model.add_subsystem('motor', Motor(num_nodes=nn, design=False, current_balance=True, **options), promotes=['*'])
+    p.setup(force_alloc_complex=True)
+    for name, val in dict(GEOMETRY, **MATERIALS).items():
+        p.set_val(name, val, units='kg' if name == 'sta_mass' else ('m' if name in GEOMETRY else None))
+    return p
+
+
+class TestCurrentBalance(unittest.TestCase):
+
+    def test_torque_matches(self):
+        nn = 50
+        p = current_balance_problem(nn)
+        p['rpm'] = np.linspace(500, 5400, nn)
+        p['P_shaft'] = np.linspace(1000, 14000, nn)
+        p.run_model()
+
+        omega = p.get_val('rpm', units='rpm') * 2*np.pi/60
+        np.testing.assert_allclose(p.get_val('Tq_max', units='N*m'), p.get_val('Tq_shaft', units='N*m'), rtol=1e-9)
+        np.testing.assert_allclose(p.get_val('Tq_max', units='N*m'), p.get_val('P_shaft', units='W')/omega, rtol=1e-9)
+        self.assertTrue(np.all(p['I'] > 0))
+
+        # the plain off-design motor run at the solved currents gives back the requested torque
+        ev = OffDesignEvaluator(dict(GEOMETRY, **MATERIALS))
+        res = ev.evaluate(outputs=('Tq_max', 'P_wire'), rpm=p['rpm'], I=p['I'], P_shaft=p['P_shaft'])
+        np.testing.assert_allclose(res['Tq_max'], p['Tq_shaft'], rtol=1e-9)
+        np.testing.assert_allclose(res['P_wire'], p['P_wire'], rtol=1e-9)
+
+    def test_totals(self):
+        nn = 4
+        p = current_balance_problem(nn)
+        p['rpm'] = np.array([1000., 2500., 4000., 5400.])
+        p['P_shaft'] = np.array([2000., 5000., 9000., 14000.])
+        p.run_model()
+        data = p.check_totals(of=['I', 'P_wire'], wrt=['P_shaft', 'rpm', 'rot_or'], method='cs', out_stream=None)
+        assert_check_totals(data, atol=1e-6, rtol=1e-6)
+
+    def test_per_node_fields(self):
+        # per-node magnet thickness makes the air gap fields per node as well
+        nn = 3
+        p = current_balance_problem(nn, vectorize_params=('t_mag',))
+        p.set_val('t_mag', [0.004, 0.0044, 0.005], units='m')
+        p['P_shaft'] = 10000.
+        p.run_model()
+        self.assertEqual(p['B_g'].shape, (nn,))
+        np.testing.assert_allclose(p.get_val('Tq_max', units='N*m'), p.get_val('Tq_shaft', units='N*m'), rtol=1e-9)
+        self.assertTrue(np.all(np.diff(p['I']) < 0))
+
+    def test_undeclared_shared_output(self):
+        p = current_balance_problem(4)
+        p.model.motor.linear_solver.options['shared_outputs'] = ['L_wire']
+        with self.assertRaisesRegex(ValueError, 'carters.Br'):
+            p.run_model()
+
+    def test_design_raises(self):
+        p = om.Problem()
+        p.model.add_subsystem('motor', Motor(num_nodes=1, design=True, current_balance=True))
+        with self.assertRaises(ValueError):
+            p.setup()
+
+
+class TestNodeBlockLU(unittest.TestCase):
+
+    def test_matches_dense(self):
+        rng = np.random.default_rng(0)
+        nn, k, g = 6, 3, 2
+        N = g + nn*k
+        # shared entries first, then per-node variables stored variable by variable
+        node = np.concatenate([np.full(g, -1), np.tile(np.arange(nn), k)])
+        slot = np.concatenate([np.full(g, -1), np.repeat(np.arange(k), nn)])
+
+        J = np.zeros((N, N))
+        J[:g, :g] = rng.random((g, g)) + 3*np.eye(g)
+        for i in range(nn):
+            idx = np.flatnonzero(node == i)
+            J[np.ix_(idx, idx)] = rng.random((k, k)) + 3*np.eye(k)
+            J[idx, rng.integers(g)] = rng.random(k)
+            J[rng.integers(g), idx[0]] = rng.random()
+
+        lu = _NodeBlockLU(scipy.sparse.csc_matrix(J), node, slot, nn, k)
+        b = rng.random(N)
+        np.testing.assert_allclose(lu.solve(b, 'N'), np.linalg.solve(J, b), rtol=1e-10)
+        np.testing.assert_allclose(lu.solve(b, 'T'), np.linalg.solve(J.T, b), rtol=1e-10)
+
+        J[g, g+1] = 1.       # couples node 0 to node 1
+        with self.assertRaises(RuntimeError):
+            _NodeBlockLU(scipy.sparse.csc_matrix(J), node, slot, nn, k)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from rad_motor.motor import Motor
+from rad_motor.cycle_comp import DriveCycleComp
+
+
+class TestDriveCycle(unittest.TestCase):
+
+    def test_values_and_partials(self):
+        nn = 5
+        p = om.Problem()
+        p.model.add_subsystem('cycle', DriveCycleComp(num_nodes=nn), promotes=['*'])
+        p.setup(force_alloc_complex=True)
+        dt = np.array([10., 60., 30., 120., 5.])
+        P_shaft = np.array([2000., 8000., 14000., 4000., 0.])
+        P_wire = np.array([20., 150., 400., 60., 5.])
+        P_stein = np.array([30., 90., 130., 70., 10.])
+        p['dt'], p['P_shaft'], p['P_wire'], p['P_steinmetz'] = dt, P_shaft, P_wire, P_stein
+        p.run_model()
+
+        E_loss = np.sum(dt*(P_wire + P_stein))
+        E_shaft = np.sum(dt*P_shaft)
+        np.testing.assert_allclose(p['E_loss'], E_loss)
+        np.testing.assert_allclose(p['E_in'], E_shaft + E_loss)
+        np.testing.assert_allclose(p['Eff_cycle'], E_shaft/(E_shaft + E_loss))
+        P_max = np.max(P_wire + P_stein)
+        self.assertTrue(P_max <= p['P_loss_peak'][0] <= P_max + 100*np.log(nn)/50)
+
+        data = p.check_partials(method='cs', out_stream=None)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_motor_cycle_totals(self):
+        nn = 4
+        p = om.Problem()
+        p.model.add_subsystem('motor', Motor(num_nodes=nn, design=False), promotes=['*'])
+        p.model.add_subsystem('cycle', DriveCycleComp(num_nodes=nn), promotes=['*'])
+        p.setup(force_alloc_complex=True)
+        for name, val in dict(rot_or=0.0684098557, sta_mass=0.95055653, w_slot=0.01483893, w_t=0.00479385).items():
+            p[name] = val
+        p['rpm'] = [1100., 2300., 4100., 5300.]
+        p['I'] = [12., 20., 30., 34.]
+        p['P_shaft'] = [3000., 6000., 11000., 14000.]
+        p['dt'] = [300., 120., 60., 30.]
+        p.run_model()
+
+        totals = p.check_totals(of=['E_in', 'Eff_cycle', 'P_loss_peak'], wrt=['rot_or', 'I', 'n_turns', 'dt'],
+                                method='cs', out_stream=None)
+        for key, data in totals.items():
+            np.testing.assert_allclose(data['J_fwd'], data['J_fd'], rtol=1e-6, atol=1e-9, err_msg=str(key))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import size_motor, design_geometry
+from rad_motor.design_cache import DesignCache
+
+
+INPUTS = dict(b_ry=3.0, b_sy=2.4, b_t=3.0, k_wb=0.58, k=0.94, radius_motor=0.086, P_shaft=14000, rpm=5400,
+              I=34.5, B_pk=2.4, T_windings=150, T_mag=100, n_slots=24, n_m=20, n_turns=12)
+
+
+class TestDesignCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_hit_skips_solve(self):
+        cache = DesignCache(self.dir)
+        ref = size_motor(INPUTS, design_cache=cache)
+        self.assertEqual((cache.n_hits, cache.n_misses), (0, 1))
+
+        # a new process only shares the directory
+        cache = DesignCache(self.dir)
+        p = size_motor(INPUTS, rot_or=5.0, design_cache=cache)
+        self.assertEqual(cache.n_hits, 1)
+        self.assertEqual(p.model.motor.sizing.nonlinear_solver._iter_count, 0)
+        for name, (val, units) in design_geometry(ref).items():
+            np.testing.assert_allclose(p.get_val(name, units=units), val, rtol=1e-14)
+        for name in ('Eff', 'P_wire', 'P_steinmetz', 'Tq_max'):
+            np.testing.assert_allclose(p[name], ref[name], rtol=1e-14)
+
+        # off-design inputs downstream of the sizing loop still change the results
+        p['B_pk'] = 2.0
+        p.run_model()
+        self.assertEqual(cache.n_hits, 2)
+        self.assertLess(p['P_steinmetz'][0], ref['P_steinmetz'][0])
+
+        p['radius_motor'] = 0.09
+        p.run_model()
+        self.assertEqual(cache.n_misses, 1)
+        self.assertGreater(p['rot_or'][0], ref['rot_or'][0])
+
+    def test_diverged_not_stored(self):
+        cache = DesignCache(self.dir)
+        with np.errstate(all='ignore'):
+            p = size_motor(dict(INPUTS, radius_motor=0.01), design_cache=cache)
+        self.assertTrue(np.isnan(p['J'][0]))
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_lru_eviction(self):
+        cache = DesignCache(self.dir, max_entries=2)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, np.arange(3.))
+            os.utime(cache._file(key), (0, {'a': 10, 'b': 20, 'c': 30}[key]))
+        self.assertEqual(sorted(os.listdir(self.dir)), ['b.npy', 'c.npy'])
+
+        cache.get('b')
+        cache.put('d', np.ones(3))
+        self.assertEqual(sorted(os.listdir(self.dir)), ['b.npy', 'd.npy'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import design_problem
+from rad_motor.analysis.screen import size_designs
+from rad_motor.design_catalog import DesignCatalog, CATALOG_INPUTS
+
+
+class TestDesignCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'catalog.npz')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_sized_designs(self):
+        catalog = DesignCatalog(self.path)
+        radius = np.array([0.078225, 0.086, 0.074, 0.07])
+        res = size_designs(design_problem(), outputs=('rot_or', 'Eff'), catalog=catalog, radius_motor=radius)
+        # 0.07 does not converge from the default rot_or guess, it does from the catalog's 0.074 design
+        self.assertEqual(size_designs(design_problem(), radius_motor=0.07)['status'][0], 'failed')
+        np.testing.assert_array_equal(res['status'], 'newton')
+        self.assertEqual(len(catalog), 4)
+        np.testing.assert_allclose(catalog.columns['radius_motor'], radius)
+        np.testing.assert_allclose(catalog.columns['rot_or'], res['rot_or'])
+        np.testing.assert_allclose(catalog.columns['Eff'], res['Eff'])
+        self.assertEqual(catalog.units['rot_or'], 'cm')
+        # the design point is part of the catalog, at node 0
+        np.testing.assert_allclose(catalog.columns['I'], 34.5)
+        catalog.save()
+
+        # a later study reuses the designs
+        catalog = DesignCatalog(self.path)
+        match = catalog.nearest({'radius_motor': 0.081}, k=2)
+        np.testing.assert_array_equal(match.index, [0, 1])
+        np.testing.assert_allclose(match.values['Eff'], res['Eff'][:2])
+        self.assertEqual(catalog.rot_or_guess({'radius_motor': 0.0725}), res['rot_or'][2])
+        np.testing.assert_array_equal(catalog.within({'radius_motor': 0.0715}, 0.5).index, [3, 2])
+
+    def test_queries(self):
+        rng = np.random.default_rng(0)
+        n = 100000
+        columns = {name: np.full(n, 1.) for name in CATALOG_INPUTS}
+        columns.update(radius_motor=rng.uniform(0.05, 0.1, n), n_turns=rng.integers(4, 40, n).astype(float),
+                       I=rng.uniform(10, 80, n), Eff=rng.uniform(0.8, 1., n))
+        catalog = DesignCatalog(inputs=CATALOG_INPUTS)
+        catalog.extend(columns)
+        self.assertEqual(len(catalog), n)
+
+        point = dict(radius_motor=0.07, n_turns=12., I=30.)
+        u = np.column_stack([(columns[name] - columns[name].mean())/columns[name].std() for name in point])
+        u0 = np.array([(point[name] - columns[name].mean())/columns[name].std() for name in point])
+        dist = np.linalg.norm(u - u0, axis=1)
+
+        catalog.nearest(point)
+        start = time.perf_counter()
+        match = catalog.nearest(point, k=5)
+        self.assertLess(time.perf_counter() - start, 0.05)
+        np.testing.assert_array_equal(match.index, np.argsort(dist)[:5])
+        np.testing.assert_allclose(match.distance, np.sort(dist)[:5])
+        np.testing.assert_array_equal(match.values['Eff'], columns['Eff'][match.index])
+
+        match = catalog.within(point, 0.1)
+        np.testing.assert_array_equal(np.sort(match.index), np.flatnonzero(dist <= 0.1))
+        self.assertTrue(np.all(np.diff(match.distance) >= 0))
+
+        # many queries at once
+        match = catalog.nearest(dict(radius_motor=[0.06, 0.07], n_turns=12., I=30.), k=3)
+        self.assertEqual(match.index.shape, (2, 3))
+        np.testing.assert_array_equal(match.index[1], np.argsort(dist)[:3])
+
+        with self.assertRaises(ValueError):
+            catalog.nearest({'rot_or': 0.07})
+        with self.assertRaises(ValueError):
+            catalog.extend({'radius_motor': 0.07})
+
+
+if __name__ == '__main__':
+    unittest.main()
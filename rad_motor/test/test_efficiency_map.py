@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import OffDesignEvaluator, size_motor, design_geometry
+from rad_motor.analysis.efficiency_map import adaptive_map, efficiency_map
+
+
+MATERIALS = dict(B_pk=2.4, T_windings=150, T_mag=100, n_slots=24, n_m=20, n_turns=12)
+
+
+def size_reference_motor():
+    p = size_motor(dict(b_ry=3.0, b_sy=2.4, b_t=3.0, k_wb=0.58, k=0.94, radius_motor=0.086,
+                        P_shaft=14000, rpm=5400, I=34.5, **MATERIALS))
+    return design_geometry(p)
+
+
+def island(x, y):
+    # efficiency-like surface with a peak away from the corners
+    return 0.97 - 0.25*((x - 0.6)**2 + 0.5*(y - 0.4)**2) - 0.2*np.exp(-8*x)
+
+
+class TestAdaptiveMap(unittest.TestCase):
+
+    def test_fewer_evaluations_same_contours(self):
+        levels = [0.85, 0.9, 0.93, 0.95, 0.96]
+        m = adaptive_map(island, (0, 1), (0, 1), levels=levels, coarse=8, max_level=4, tol=1e-3)
+
+        n_uniform = (8*16 + 1)**2
+        self.assertGreater(n_uniform / m.n_evals, 5)
+
+        x = np.linspace(0, 1, 8*16 + 1)
+        X, Y = np.meshgrid(x, x)
+        Z = island(X, Y)
+        near = np.any([np.abs(Z - level) < 0.01 for level in levels], axis=0)
+        np.testing.assert_array_less(np.abs(m.to_grid(x, x) - Z)[near], 2e-3)
+
+        for level in levels:
+            seg = m.contour(level)
+            self.assertGreater(len(seg), 0)
+            np.testing.assert_allclose(island(seg[..., 0], seg[..., 1]), level, atol=2e-3)
+
+    def test_levels_batched(self):
+        calls = []
+
+        def func(x, y):
+            calls.append(x.size)
+            return island(x, y)
+
+        m = adaptive_map(func, (0, 1), (0, 1), coarse=4, max_level=3)
+        self.assertLessEqual(len(calls), 4)     # coarse grid + one batch per level
+        self.assertEqual(sum(calls), m.n_evals)
+        self.assertEqual(len(m.levels), 10)
+
+
+class TestMotorEfficiencyMap(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.evaluator = OffDesignEvaluator(dict(size_reference_motor(), **MATERIALS))
+
+    def test_batches(self):
+        rpm = np.linspace(200, 5400, 40)
+        I = np.linspace(5, 50, 40)
+        ref = self.evaluator.evaluate(outputs=('Eff', 'P_wire'), rpm=rpm, I=I, P_shaft=10000.)
+
+        chunked = OffDesignEvaluator(self.evaluator.inputs, max_nodes=16)
+        res = chunked.evaluate(outputs=('Eff', 'P_wire'), rpm=rpm, I=I, P_shaft=10000.)
+        for name in ref:
+            np.testing.assert_allclose(res[name], ref[name], rtol=1e-12)
+        self.assertEqual(chunked.n_evals, 40)
+        self.assertEqual(sorted(chunked._problems), [16])
+
+    def test_map(self):
+        m = efficiency_map(self.evaluator, (200, 5400), (5, 50), coarse=4, max_level=2)
+        res = self.evaluator.evaluate(outputs=('Tq_max', 'omega', 'P_wire', 'P_steinmetz'), rpm=m.rpm, I=m.I)
+        P_out = res['Tq_max']*res['omega']
+        np.testing.assert_allclose(m.Eff, P_out/(P_out + res['P_wire'] + res['P_steinmetz']), rtol=1e-12)
+        self.assertTrue(np.all((m.Eff > 0) & (m.Eff < 1)))
+        self.assertTrue(all(len(seg) for seg in m.contours().values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
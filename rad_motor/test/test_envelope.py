@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import OffDesignEvaluator, size_motor, design_geometry
+from rad_motor.analysis.envelope import torque_speed_envelope, envelope, LIMIT_J, LIMIT_THERMAL, \
+    LIMIT_INFEASIBLE
+
+
+MATERIALS = dict(B_pk=2.4, T_windings=150, T_mag=100, n_slots=24, n_m=20, n_turns=12)
+
+
+class TestEnvelope(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        p = size_motor(dict(b_ry=3.0, b_sy=2.4, b_t=3.0, k_wb=0.58, k=0.94, radius_motor=0.086,
+                            P_shaft=14000, rpm=5400, I=34.5, **MATERIALS))
+        cls.J_per_A = p.get_val('J', units='A/mm**2')[0] / p.get_val('I', units='A')[0]
+        cls.evaluator = OffDesignEvaluator(dict(design_geometry(p), **MATERIALS))
+        cls.rpm = np.linspace(200, 5400, 27)
+
+    def test_limits(self):
+        env = torque_speed_envelope(self.evaluator, self.rpm, self.J_per_A, J_cont=10., J_peak=20.,
+                                    P_loss_cont=350., P_loss_peak=1500., xtol=1e-4)
+        cont, peak = env['continuous'], env['peak']
+
+        for e, J_max, P_max in ((cont, 10., 350.), (peak, 20., 1500.)):
+            on_J = e.limit == LIMIT_J
+            hot = e.limit == LIMIT_THERMAL
+            np.testing.assert_allclose(e.I[on_J], J_max/self.J_per_A)
+            np.testing.assert_array_less(e.P_loss, P_max + 1e-9)
+            np.testing.assert_allclose(e.P_loss[hot], P_max, rtol=1e-4)
+            np.testing.assert_array_less(e.I[hot], J_max/self.J_per_A)
+
+        # iron losses grow with speed, so the continuous rating is thermally limited at the top end
+        self.assertEqual(cont.limit[0], LIMIT_J)
+        self.assertEqual(cont.limit[-1], LIMIT_THERMAL)
+        self.assertTrue(np.all(np.diff(cont.Tq[cont.limit == LIMIT_THERMAL]) < 0))
+        self.assertTrue(np.all(peak.Tq >= cont.Tq))
+
+        res = self.evaluator.evaluate(outputs=('Tq_max', 'omega'), rpm=self.rpm, I=cont.I)
+        np.testing.assert_allclose(cont.Tq, res['Tq_max'])
+        np.testing.assert_allclose(cont.P_shaft, res['Tq_max']*res['omega'])
+
+    def test_current_density_only(self):
+        e = envelope(self.evaluator, self.rpm, I_max=30.)
+        self.assertTrue(np.all(e.limit == LIMIT_J))
+        np.testing.assert_allclose(e.I, 30.)
+
+    def test_infeasible(self):
+        # iron losses alone pass 60 W above ~3600 rpm, no current keeps those nodes under the limit
+        e = envelope(self.evaluator, self.rpm, I_max=30., P_loss_max=60., xtol=1e-4)
+        bad = e.limit == LIMIT_INFEASIBLE
+        self.assertTrue(bad[-1] and not bad[0])
+        self.assertTrue(np.all(np.isnan(e.I[bad])) and np.all(np.isnan(e.Tq[bad])))
+        self.assertFalse(np.any(np.isnan(e.I[~bad])))
+        np.testing.assert_array_less(e.P_loss[~bad], 60. + 1e-9)
+
+        res = self.evaluator.evaluate(outputs=('P_wire', 'P_steinmetz'), rpm=self.rpm[bad], I=0.)
+        np.testing.assert_array_less(60., res['P_wire'] + res['P_steinmetz'])
+
+
+if __name__ == '__main__':
+    unittest.main()
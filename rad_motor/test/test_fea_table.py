@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from rad_motor.motor import Motor
+from rad_motor.sizing.fea_table import FEATable, FEACorrectionComp
+from rad_motor.analysis.evaluator import set_inputs
+
+
+DESIGN = dict(k_wb=0.58, k=0.94, radius_motor=0.086, P_shaft=14000, rpm=5400, I=34.5)
+
+
+def fea_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return dict(rot_or=(rng.uniform(0.05, 0.09, n), 'm'), t_mag=(rng.uniform(0.003, 0.006, n), 'm'),
+                w_t=(rng.uniform(0.003, 0.007, n), 'm'), n_slots=(rng.choice([18., 24., 30.], n), None))
+
+
+def tooth_flux(keys):
+    # made-up FEA trend: narrower teeth saturate further
+    return 3.0 - 100*(keys['w_t'][0] - 0.0045) + 5*(keys['rot_or'][0] - 0.068)
+
+
+def size(table):
+    p = om.Problem()
+    p.model.add_subsystem('motor', Motor(num_nodes=1, design=True, fea_table=table), promotes=['*'])
+    p.setup(force_alloc_complex=True)
+    p.model.motor.sizing.nonlinear_solver.options['iprint'] = -1
+    set_inputs(p, DESIGN)
+    p['rot_or'] = 6.8
+    p.run_model()
+    return p
+
+
+class TestFEATable(unittest.TestCase):
+
+    def test_lookup_and_partials(self):
+        keys = fea_points(20000)
+        table = FEATable(keys, {'b_t': (tooth_flux(keys), 'T')})
+        x = np.array([[0.068, 0.0044, 0.0048, 24.], [0.06, 0.005, 0.004, 18.]])
+        f, df = table.lookup(x)
+        np.testing.assert_allclose(f[:, 0], 3.0 - 100*(x[:, 2] - 0.0045) + 5*(x[:, 0] - 0.068), atol=5e-3)
+        np.testing.assert_array_equal(df[:, 0, 3], 0.)      # a single slot count around each point
+
+        p = om.Problem()
+        p.model.add_subsystem('fea', FEACorrectionComp(table=table), promotes=['*'])
+        p.setup(force_alloc_complex=True)
+        p['rot_or'], p['t_mag'], p['w_t'], p['n_slots'] = 0.0684, 0.0044, 0.00479, 24
+        p.run_model()
+        data = p.check_partials(method='cs', out_stream=None)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_continuous(self):
+        # along a line in rot_or the k nearest points change many times, the blend must not jump
+        keys = fea_points(2000)
+        table = FEATable(keys, {'b_t': (tooth_flux(keys), 'T')})
+        rot_or = np.linspace(0.06, 0.07, 20001)
+        x = np.column_stack([rot_or, np.full_like(rot_or, 0.0044), np.full_like(rot_or, 0.0048), np.full_like(rot_or, 24.)])
+        f, df = table.lookup(x)
+
+        _, idx = table.tree.query((x - table.center) / table.scale, k=table.k)
+        self.assertGreater(np.sum(np.any(np.sort(idx[1:], axis=1) != np.sort(idx[:-1], axis=1), axis=1)), 20)
+        # no step larger than the steepest slope allows
+        step = rot_or[1] - rot_or[0]
+        self.assertLess(np.max(np.abs(np.diff(f[:, 0]))), 1.5 * np.max(np.abs(df[:, 0, 0])) * step)
+
+    def test_sizing(self):
+        keys = fea_points(100000)
+        ones = np.ones(100000)
+        constant = FEATable(keys, {'b_ry': (3.0*ones, 'T'), 'b_sy': (2.4*ones, 'T'), 'b_t': (3.0*ones, 'T'),
+                                   'B_pk': (2.4*ones, 'T')})
+        # the table reproduces the fixed flux densities of the reference motor
+        p = size(constant)
+        np.testing.assert_allclose(p.get_val('rot_or', units='cm'), 6.84098557, rtol=1e-8)
+        np.testing.assert_allclose(p['Eff'], 0.96416805, rtol=1e-8)
+
+        varying = FEATable(keys, {'b_ry': (3.0*ones, 'T'), 'b_sy': (2.4*ones, 'T'), 'b_t': (tooth_flux(keys), 'T')})
+        p = size(varying)
+        self.assertLess(p['b_t'][0], 2.99)
+        np.testing.assert_allclose(p['b_t'], varying.lookup([[p.get_val('rot_or', units='m')[0], 0.0044, p['w_t'][0], 24.]])[0][0, 2],
+                                   rtol=1e-10)
+
+        totals = p.check_totals(of=['sta_mass', 'w_t'], wrt=['radius_motor', 'k_wb'], method='cs', out_stream=None)
+        for key, data in totals.items():
+            np.testing.assert_allclose(data['J_fwd'], data['J_fd'], rtol=1e-6, err_msg=str(key))
+
+    def test_current_balance(self):
+        # the FEA lookups and the current balance set up side by side in an off-design motor
+        keys = fea_points(1000)
+        table = FEATable(keys, {'B_pk': (2.4*np.ones(1000), 'T')})
+        geometry = dict(rot_or=(0.0684098557, 'm'), sta_mass=(0.95055653, 'kg'), w_slot=(0.01483893, 'm'), w_t=(0.00479385, 'm'))
+        res = []
+        for fea_table in (table, None):
+            p = om.Problem()
+            p.model.add_subsystem('motor', Motor(num_nodes=3, design=False, current_balance=True, fea_table=fea_table), promotes=['*'])
+            p.setup()
+            set_inputs(p, dict(geometry, n_slots=24, rpm=np.array([1000., 3000., 5400.]), P_shaft=np.array([2000., 6000., 14000.])))
+            p.run_model()
+            np.testing.assert_allclose(p['Tq_max'], p['Tq_shaft'], rtol=1e-9)
+            res.append(p['I'].copy())
+        np.testing.assert_allclose(res[0], res[1], rtol=1e-6)
+
+    def test_load(self):
+        keys = fea_points(50)
+        b_t = tooth_flux(keys)
+        tmp = tempfile.mkdtemp()
+        try:
+            csv = os.path.join(tmp, 'fea.csv')
+            with open(csv, 'w') as f:
+                f.write('rot_or[mm],t_mag[m],w_t[m],n_slots,b_t[T]\n')
+                for row in zip(keys['rot_or'][0]*1e3, keys['t_mag'][0], keys['w_t'][0], keys['n_slots'][0], b_t):
+                    f.write(','.join(repr(v) for v in row) + '\n')
+            npz = os.path.join(tmp, 'fea.npz')
+            np.savez(npz, **{'rot_or[m]': keys['rot_or'][0], 't_mag[m]': keys['t_mag'][0], 'w_t[m]': keys['w_t'][0],
+                             'n_slots': keys['n_slots'][0], 'b_t[T]': b_t})
+
+            for path, scale in ((csv, 1e3), (npz, 1.)):
+                table = FEATable.load(path)
+                self.assertEqual(table.key_names, ('rot_or', 't_mag', 'w_t', 'n_slots'))
+                self.assertEqual(table.value_units, {'b_t': 'T'})
+                f, _ = table.lookup([[0.07*scale, 0.0045, 0.005, 24.]])
+                self.assertTrue(2.5 < f[0, 0] < 3.5)
+
+            with self.assertRaises(ValueError):
+                FEATable.load(npz, keys=('rot_or', 'gap'))
+        finally:
+            shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    unittest.main()
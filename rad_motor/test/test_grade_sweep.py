@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import OffDesignEvaluator
+from rad_motor.analysis.grade_sweep import grade_sweep
+from rad_motor.materials import registry
+
+
+GEOMETRY = dict(rot_or=0.0684098557, sta_mass=(0.95055653, 'kg'), w_slot=0.01483893, w_t=0.00479385)
+SETTINGS = dict(T_windings=150, T_mag=100, n_slots=24, n_m=20, n_turns=12)
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_lookup(self):
+        self.assertEqual(registry.magnet('N48H').Br_20, 1.39)
+        self.assertAlmostEqual(registry.conductor('Cu').resistivity(20.), 1.724e-8)
+        with self.assertRaises(KeyError):
+            registry.steel('unobtainium')
+
+    def test_temperature(self):
+        mag = registry.magnet('Sm2Co17')
+        ev = OffDesignEvaluator(dict(GEOMETRY, **SETTINGS, **mag.motor_inputs()))
+        for T in (20., 80., 150.):
+            ev.set_inputs(T_mag=T)
+            np.testing.assert_allclose(ev.evaluate(outputs=('Br',), rpm=3000.)['Br'], mag.Br(T))
+
+
+class TestGradeSweep(unittest.TestCase):
+
+    def test_matches_scalar_runs(self):
+        rpm = np.array([1000., 3000., 5400.])
+        I = np.array([10., 20., 34.5])
+
+        sweep = grade_sweep(GEOMETRY, magnets=('N48H', 'Sm2Co17'), steels=('Hiperco-50', 'M19-29Ga'), conductors=('Cu', 'Al'),
+                            outputs=('Eff', 'P_wire', 'P_steinmetz', 'Tq_max'), inputs=SETTINGS, rpm=rpm, I=I, P_shaft=8000.)
+        self.assertEqual(sweep.results['Eff'].shape, (8, 3))
+        self.assertEqual(list(sweep.magnet[:2]), ['N48H', 'N48H'])
+
+        for i, (mag, st, cond) in enumerate(zip(sweep.magnet, sweep.steel, sweep.conductor)):
+            mag, st, cond = registry.magnet(mag), registry.steel(st), registry.conductor(cond)
+            inputs = dict(GEOMETRY, **SETTINGS, **mag.motor_inputs(), **st.motor_inputs(), **cond.motor_inputs())
+            inputs['sta_mass'] = GEOMETRY['sta_mass'][0] * st.rho / 8110.2
+            ref = OffDesignEvaluator(inputs).evaluate(outputs=sweep.results, rpm=rpm, I=I, P_shaft=8000.)
+            for name, val in ref.items():
+                np.testing.assert_allclose(sweep.results[name][i], val, rtol=1e-12, err_msg=name)
+
+        # aluminium windings lose more than copper, and the weaker magnet gives less torque, everything else equal
+        wire = sweep.results['P_wire']
+        self.assertTrue(np.all(wire[1::2] > wire[::2]))
+        # the magnet permeability only enters the air gap field, not the winding skin depth
+        np.testing.assert_allclose(wire[4:], wire[:4], rtol=1e-14)
+        torque = sweep.results['Tq_max']
+        self.assertTrue(np.all(torque[4:] < torque[:4]))
+
+
+if __name__ == '__main__':
+    unittest.main()
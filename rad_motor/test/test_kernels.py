@@ -0,0 +1,153 @@
+import unittest
+from unittest import mock
+import numpy as np
+from math import pi
+from openmdao.api import Problem
+from openmdao.utils.assert_utils import assert_check_partials
+
+from rad_motor import kernels
+from rad_motor.motor import Motor
+from rad_motor.thermal.motor_losses import WindingLossComp, SteinmetzLossComp
+from rad_motor.electromagnetics.fields_comp import CartersComp
+from rad_motor.electromagnetics.performance_comp import TorqueComp, EfficiencyComp
+
+
+def run_comp(comp, **inputs):
+    p = Problem()
+    p.model.add_subsystem('comp', comp, promotes=['*'])
+    p.setup(force_alloc_complex=True)
+    for name, val in inputs.items():
+        p[name] = val
+    p.run_model()
+    return p
+
+
+def outputs_of(p):
+    return {name: meta['value'].copy() for name, meta in p.model.comp.list_outputs(out_stream=None)}
+
+
+class TestKernelParity(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.nn = 50
+        self.rpm = np.random.uniform(200, 5400, self.nn)
+        self.I = np.random.uniform(5, 50, self.nn)
+        self.pf = np.random.uniform(0.001, 6, self.nn)
+
+    def assert_same(self, p_ref, p_jit):
+        ref, jit = outputs_of(p_ref), outputs_of(p_jit)
+        for name in ref:
+            np.testing.assert_allclose(jit[name], ref[name], rtol=1e-12, err_msg=name)
+
+    @unittest.skipUnless(kernels.HAS_NUMBA, 'numba is not installed')
+    def test_winding_loss(self):
+        inputs = dict(rpm=self.rpm, I=self.I, AC_power_factor=self.pf, T_windings=120.)
+        p_ref = run_comp(WindingLossComp(num_nodes=self.nn), **inputs)
+        p_jit = run_comp(WindingLossComp(num_nodes=self.nn, backend='numba'), **inputs)
+        self.assert_same(p_ref, p_jit)
+
+    @unittest.skipUnless(kernels.HAS_NUMBA, 'numba is not installed')
+    def test_steinmetz(self):
+        inputs = dict(f_e=self.rpm/6, B_pk=2.4, sta_mass=1.8)
+        p_ref = run_comp(SteinmetzLossComp(num_nodes=self.nn), **inputs)
+        p_jit = run_comp(SteinmetzLossComp(num_nodes=self.nn, backend='numba'), **inputs)
+        self.assert_same(p_ref, p_jit)
+
+    @unittest.skipUnless(kernels.HAS_NUMBA, 'numba is not installed')
+    def test_carters(self):
+        inputs = dict(w_slot=.01508251, w_t=.0047909798, T_mag=80.)
+        p_ref = run_comp(CartersComp(), **inputs)
+        p_jit = run_comp(CartersComp(backend='numba'), **inputs)
+        self.assert_same(p_ref, p_jit)
+
+    @unittest.skipUnless(kernels.HAS_NUMBA, 'numba is not installed')
+    def test_motor(self):
+        results = []
+        for backend in ('numpy', 'numba'):
+            p = Problem()
+            p.model.add_subsystem('motor', Motor(num_nodes=self.nn, design=False, backend=backend), promotes=['*'])
+            p.setup()
+            p['rpm'] = self.rpm
+            p['I'] = self.I
+            p['P_shaft'] = 10000.
+            p.run_model()
+            results.append({name: p[name].copy() for name in ('P_wire', 'P_steinmetz', 'carters_coef', 'Eff')})
+
+        for name in results[0]:
+            np.testing.assert_allclose(results[1][name], results[0][name], rtol=1e-12, err_msg=name)
+
+    def test_fallback_without_numba(self):
+        inputs = dict(rpm=self.rpm, I=self.I, AC_power_factor=self.pf)
+        p_ref = run_comp(WindingLossComp(num_nodes=self.nn), **inputs)
+        with mock.patch.object(kernels, 'HAS_NUMBA', False):
+            p_jit = run_comp(WindingLossComp(num_nodes=self.nn, backend='numba'), **inputs)
+        ref, jit = outputs_of(p_ref), outputs_of(p_jit)
+        for name in ref:
+            np.testing.assert_array_equal(jit[name], ref[name])
+
+    def test_vectorized_partials(self):
+        nn = 4
+        p = Problem()
+        p.model.add_subsystem('copperloss', WindingLossComp(num_nodes=nn, backend='numba'))
+        p.model.add_subsystem('steinmetzloss', SteinmetzLossComp(num_nodes=nn, backend='numba'))
+        p.model.add_subsystem('carters', CartersComp(backend='numba'))
+        p.model.add_subsystem('torque', TorqueComp(num_nodes=nn))
+        p.setup(force_alloc_complex=True)
+        p['copperloss.rpm'] = self.rpm[:nn]
+        p['copperloss.I'] = self.I[:nn]
+        p['steinmetzloss.f_e'] = self.rpm[:nn]/6
+        p.run_model()
+
+        # P_dc wrt resistivity_wire is ~1e10, so the absolute tolerance only needs to cover round-off
+        data = p.check_partials(method='cs', compact_print=True, out_stream=None)
+        assert_check_partials(data, atol=1e-4, rtol=1e-6)
+
+
+class TestInplaceBackend(unittest.TestCase):
+
+    def setUp(self):
+        np.random.seed(0)
+        self.nn = 50
+        self.rpm = np.random.uniform(200, 5400, self.nn)
+        self.I = np.random.uniform(5, 50, self.nn)
+        self.I[3] = 0.     # a node without current, the torque partials still follow from the other factors
+        self.pf = np.random.uniform(0.001, 6, self.nn)
+
+    def test_components(self):
+        cases = [(WindingLossComp, dict(rpm=self.rpm, I=self.I, AC_power_factor=self.pf, T_windings=120.)),
+                 (SteinmetzLossComp, dict(f_e=self.rpm/6, B_pk=2.4, sta_mass=1.8)),
+                 (TorqueComp, dict(rpm=self.rpm, I=self.I, rot_or=.068)),
+                 (EfficiencyComp, dict(rpm=self.rpm, P_wire=self.I**2, omega=self.rpm*pi/30))]
+        for comp, inputs in cases:
+            p_ref = run_comp(comp(num_nodes=self.nn), **inputs)
+            p_inp = run_comp(comp(num_nodes=self.nn, backend='inplace'), **inputs)
+            ref, inp = outputs_of(p_ref), outputs_of(p_inp)
+            for name in ref:
+                np.testing.assert_allclose(inp[name], ref[name], rtol=1e-12, err_msg=f'{comp.__name__} {name}')
+
+            # the partials are written into the jacobian in place, they match the (cs checked) numpy ones
+            J_ref = p_ref.check_partials(method='cs', out_stream=None)['comp']
+            J_inp = p_inp.check_partials(method='cs', out_stream=None)['comp']
+            for key in J_ref:
+                np.testing.assert_allclose(J_inp[key]['J_fwd'], J_ref[key]['J_fwd'], rtol=1e-12, atol=1e-300, 
+                                           err_msg=f'{comp.__name__} {key}')
+
+    def test_motor(self):
+        results = []
+        for backend in ('numpy', 'inplace'):
+            p = Problem()
+            p.model.add_subsystem('motor', Motor(num_nodes=self.nn, design=False, backend=backend), promotes=['*'])
+            p.setup()
+            p['rpm'] = self.rpm
+            p['I'] = self.I
+            p['P_shaft'] = 10000.
+            p.run_model()
+            results.append({name: p[name].copy() for name in ('P_wire', 'P_steinmetz', 'Tq_max', 'Eff')})
+
+        for name in results[0]:
+            np.testing.assert_allclose(results[1][name], results[0][name], rtol=1e-12, err_msg=name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -122,20 +122,20 @@ class TestMotorGroup(unittest.TestCase):
         # make new lines for each component
 
 
-        data = p.check_partials(method='cs', compact_print=True, show_only_incorrect = True, includes='DESIGN.geometry.size')
+        data = p.check_partials(method='cs', compact_print=True, show_only_incorrect = True, includes='DESIGN.sizing.geometry.size')
 
         # can look at one component at a time with assert_check_partials
         assert_check_partials(data, atol=1e-6, rtol=1e-6)
 
-        data = p.check_partials(method='cs', compact_print=True, show_only_incorrect = True, includes='DESIGN.em_properties.carters')
+        data = p.check_partials(method='cs', compact_print=True, show_only_incorrect = True, includes='DESIGN.sizing.em_fields.carters')
         # can look at one component at a time with assert_check_partials
         assert_check_partials(data, atol=1e-6, rtol=1e-6)
 
-        data = p.check_partials(method='cs', compact_print=True, show_only_incorrect = True, includes='DESIGN.em_properties.equivalent_gap')
+        data = p.check_partials(method='cs', compact_print=True, show_only_incorrect = True, includes='DESIGN.sizing.em_fields.equivalent_gap')
         # can look at one component at a time with assert_check_partials
         assert_check_partials(data, atol=1e-6, rtol=1e-6)
 
-        data = p.check_partials(method='cs', compact_print=True, show_only_incorrect = True, includes='DESIGN.em_properties.gap_fields')
+        data = p.check_partials(method='cs', compact_print=True, show_only_incorrect = True, includes='DESIGN.sizing.em_fields.gap_fields')
         # can look at one component at a time with assert_check_partials
         assert_check_partials(data, atol=1e-6, rtol=1e-6) 
 
@@ -155,6 +155,35 @@ class TestMotorGroup(unittest.TestCase):
         # can look at one component at a time with assert_check_partials
         assert_check_partials(data, atol=1e-6, rtol=1e-6)
 
+    def test_design_nodes(self):
+        # sizing uses the first node only, the other nodes are evaluated at the resulting geometry
+        inputs = dict(b_ry=3.0, b_sy=2.4, b_t=3.0, k_wb=0.58, k=0.94, radius_motor=0.086, B_pk=2.4, 
+                      T_windings=150, T_mag=100, n_slots=24, n_m=20, n_turns=12, P_shaft=14000)
+
+        probs = []
+        for nn in (1, 3):
+            p = Problem()
+            p.model.add_subsystem('DESIGN', Motor(num_nodes=nn, design=True), promotes=['*'])
+            p.setup(force_alloc_complex=True)
+            p.model.DESIGN.sizing.nonlinear_solver.options['iprint'] = -1
+            for name, val in inputs.items():
+                p[name] = val
+            p['I'] = [34.5, 20., 10.][:nn]
+            p['rpm'] = [5400, 3100, 1100][:nn]     # off the AC table breakpoints
+            p['rot_or'] = 6.8
+            p.run_model()
+            probs.append(p)
+
+        p1, p3 = probs
+        assert_rel_error(self, p3['rot_or'], 6.84098557, 1e-6)
+        for name in ('rot_or', 'sta_mass', 'w_slot', 'w_t', 'J'):
+            assert_rel_error(self, p3[name], p1[name], 1e-12)
+        assert_rel_error(self, p3['Eff'][0], p1['Eff'][0], 1e-12)
+
+        data = p3.check_totals(of=['rot_or', 'Eff'], wrt=['I', 'rpm', 'radius_motor'], method='cs', out_stream=None)
+        for key, val in data.items():
+            np.testing.assert_allclose(val['J_fwd'], val['J_fd'], rtol=1e-6, atol=1e-9, err_msg=str(key))
+
 
 if __name__ == '__main__':
     unittest.main()
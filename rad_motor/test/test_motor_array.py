@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from rad_motor.motor import Motor
+from rad_motor.motor_array import MotorArray, VariantGeometryComp, ArrayPowerComp
+
+RPM = np.array([2000., 3500., 5400.])
+I = np.array([20., 30., 34.5])
+P_SHAFT = np.array([5000., 9000., 14000.])
+RADIUS = (0.086, 0.08)
+
+
+def array_problem(K, variants):
+    p = om.Problem()
+    p.model.add_subsystem('array', MotorArray(num_motors=K, num_nodes=3, variants=variants), promotes=['*'])
+    p.setup(force_alloc_complex=True)
+    n_var = 1 if variants is None else max(variants) + 1
+    for v in range(n_var):
+        p.model.array._get_subsystem(f'DESIGN{v}').sizing.nonlinear_solver.options['iprint'] = -1
+        p[f'DESIGN{v}.radius_motor'] = RADIUS[v]
+        p[f'DESIGN{v}.k_wb'] = 0.58
+        p[f'DESIGN{v}.k'] = 0.94
+        p[f'DESIGN{v}.rot_or'] = 6.8
+    # motor m runs the schedule scaled by 1 - 0.05*m
+    scale = np.repeat(1 - 0.05*np.arange(K), 3)
+    p['rpm'] = np.tile(RPM, K)*scale
+    p['I'] = np.tile(I, K)*scale
+    p['P_shaft'] = np.tile(P_SHAFT, K)*scale**2
+    p.run_model()
+    return p
+
+
+def single_motor(radius_motor, scale):
+    p = om.Problem()
+    p.model.add_subsystem('DESIGN', Motor(num_nodes=1, design=True), promotes_inputs=['n_slots', 'stack_length', 't_mag', 'mu_r'])
+    p.model.add_subsystem('OD', Motor(num_nodes=3, design=False), promotes_inputs=['n_slots', 'stack_length', 't_mag', 'mu_r'])
+    for name in ('rot_or', 'sta_mass', 'w_slot', 'w_t'):
+        p.model.connect(f'DESIGN.{name}', f'OD.{name}')
+    p.model.set_input_defaults('n_slots', 24)
+    p.setup()
+    p.model.DESIGN.sizing.nonlinear_solver.options['iprint'] = -1
+    p['DESIGN.radius_motor'], p['DESIGN.k_wb'], p['DESIGN.k'], p['DESIGN.rot_or'] = radius_motor, 0.58, 0.94, 6.8
+    p['OD.rpm'], p['OD.I'], p['OD.P_shaft'] = RPM*scale, I*scale, P_SHAFT*scale**2
+    p.run_model()
+    return p
+
+
+class TestMotorArray(unittest.TestCase):
+
+    def test_variants_match_single_motors(self):
+        variants = [0, 1, 1, 0]
+        p = array_problem(4, variants)
+        Eff = p['motors.Eff'].reshape(4, 3)
+        mass = 0.
+        for m, v in enumerate(variants):
+            s = single_motor(RADIUS[v], 1 - 0.05*m)
+            np.testing.assert_allclose(Eff[m], s['OD.Eff'], rtol=1e-10, err_msg=f'motor {m}')
+            mass += s['DESIGN.sta_mass'] + s['DESIGN.rot_mass'] + s['DESIGN.mag_mass']
+        np.testing.assert_allclose(p['mass'], mass, rtol=1e-10)
+        # EfficiencyComp labels P_in kW but holds W, the total is in W
+        np.testing.assert_allclose(p.get_val('P_in_total', units='W'), p['motors.P_in'].reshape(4, 3).sum(axis=0), rtol=1e-12)
+
+        totals = p.check_totals(of=['mass', 'P_in_total'], wrt=['DESIGN1.radius_motor', 'n_turns'], method='cs', out_stream=None)
+        for key, data in totals.items():
+            np.testing.assert_allclose(data['J_fwd'], data['J_fd'], rtol=1e-6, atol=1e-9, err_msg=str(key))
+
+    def test_identical_motors(self):
+        p = array_problem(3, None)
+        self.assertEqual(p['motors.rot_or'].shape, (1,))
+        s = single_motor(RADIUS[0], 0.9)
+        np.testing.assert_allclose(p['motors.Eff'][6:], s['OD.Eff'], rtol=1e-10)
+
+        with self.assertRaises(ValueError):
+            om.Problem(MotorArray(num_motors=3, variants=[0, 2, 2])).setup()
+
+    def test_partials(self):
+        p = om.Problem()
+        p.model.add_subsystem('geometry', VariantGeometryComp(variants=np.array([1, 0, 1]), num_nodes=2))
+        p.model.add_subsystem('power', ArrayPowerComp(num_motors=3, num_nodes=2))
+        p.setup(force_alloc_complex=True)
+        p['power.P_shaft'] = np.arange(6.)
+        p['power.P_wire'] = 1.
+        p.set_val('power.P_steinmetz', 2., units='kW')
+        p.run_model()
+        np.testing.assert_allclose(p.get_val('power.P_in_total', units='kW'), [6.009, 6.012])
+        data = p.check_partials(method='cs', out_stream=None)
+        assert_check_partials(data, atol=1e-10, rtol=1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import io
+import unittest
+import contextlib
+import numpy as np
+import openmdao.api as om
+
+from rad_motor.motor import Motor, motor_results, print_motor
+from rad_motor.analysis.evaluator import set_inputs
+
+
+DESIGN = dict(k_wb=0.58, k=0.94, radius_motor=0.086, P_shaft=14000, rpm=5400, I=34.5)
+
+
+class TestMotorResults(unittest.TestCase):
+
+    def test_design_and_off_design(self):
+        p = om.Problem()
+        p.model.add_subsystem('DESIGN', Motor(num_nodes=1, design=True))
+        p.model.add_subsystem('OD1', Motor(num_nodes=3, design=False))
+        for name in ('rot_or', 'sta_mass', 'w_slot', 'w_t'):
+            p.model.connect(f'DESIGN.{name}', f'OD1.{name}')
+        p.setup()
+        p.model.DESIGN.sizing.nonlinear_solver.options['iprint'] = -1
+        set_inputs(p, {f'DESIGN.{name}': val for name, val in DESIGN.items()})
+        p['DESIGN.rot_or'] = 6.8
+        p['OD1.rpm'] = [2000., 3500., 5400.]
+        p['OD1.I'] = [20., 30., 34.5]
+        p['OD1.P_shaft'] = [5000., 9000., 14000.]
+        p.run_model()
+
+        for path in ('DESIGN', 'OD1'):
+            r = motor_results(p, path)
+            for name in ('Eff', 'P_wire', 'B_g', 'rot_or', 'sta_mass', 'I'):
+                np.testing.assert_allclose(r.values[name], p.get_val(f'{path}.{name}', units=r.units[name]).ravel(),
+                                           err_msg=f'{path}.{name}')
+        self.assertEqual(motor_results(p, 'OD1').values['Eff'].shape, (3,))
+
+        r = motor_results(p, 'DESIGN', units={'rot_or': 'mm', 'sta_mass': 'g'})
+        self.assertEqual(r.units['rot_or'], 'mm')
+        np.testing.assert_allclose(r.values['rot_or'], 10*p.get_val('DESIGN.rot_or', units='cm'), rtol=1e-12)
+        np.testing.assert_allclose(r.values['sta_mass'], 1e3*p['DESIGN.sta_mass'], rtol=1e-12)
+
+        with self.assertRaises(ValueError):
+            motor_results(p)
+        with self.assertRaises(ValueError):
+            motor_results(p, 'OD2')
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            print_motor(p, 'DESIGN')
+            print_motor(p, 'OD1')
+        text = out.getvalue()
+        self.assertEqual(text.count('GEOMETRY'), 1)
+        self.assertEqual(text.count('Overall Efficiency'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import inspect
+import unittest
+import numpy as np
+
+import openmdao.api as om
+from openmdao.core.analysis_error import AnalysisError
+from openmdao.solvers.solver import NonlinearSolver
+
+from rad_motor.analysis.evaluator import design_problem, size_motor, sizing_status
+from rad_motor.analysis.screen import size_designs
+from rad_motor.solvers import _is_singular
+
+
+# plain Newton stalls on this motor although it has a solution
+STALLS = dict(radius_motor=(0.06305, 'm'), n_turns=14., I=(40.18587, 'A'), k_wb=0.68735, t_mag=(0.00962, 'm'))
+# J never reaches J_tgt with a valid geometry (the screen rejects it)
+NO_ROOT = dict(radius_motor=(0.04495, 'm'), n_turns=34., I=(28.37463, 'A'), k_wb=0.26223, t_mag=(0.00623, 'm'))
+
+
+class Line(om.ImplicitComponent):
+    # R = x - 1 with a bad jacobian: singular (slope 0) or nan
+
+    def initialize(self):
+        self.options.declare('slope')
+
+    def setup(self):
+        self.add_output('x', 1.)
+        self.declare_partials('x', 'x')
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        residuals['x'] = outputs['x'] - 1.
+
+    def linearize(self, inputs, outputs, J):
+        J['x', 'x'] = self.options['slope']
+
+
+def valid(p):
+    return abs(p['J'][0] - 10.47) < 1e-8 and p['s_d'][0] > 0 and p['rot_ir'][0] > 0 and p['slot_area'][0] > 0
+
+
+class TestSafeguard(unittest.TestCase):
+
+    def test_reference(self):
+        p = size_motor(prob=design_problem(safeguard=True))
+        status = sizing_status(p)
+        self.assertEqual(status.code, 'newton')
+        self.assertEqual(status.evaluations, 0)
+        np.testing.assert_allclose(p['rot_or'], 6.02233563, rtol=1e-8)
+        self.assertEqual(sizing_status(size_motor(prob=design_problem())).code, 'newton')
+
+    def test_fallback(self):
+        plain = size_motor(STALLS, prob=design_problem())
+        self.assertEqual(sizing_status(plain).code, 'failed')
+
+        p = size_motor(STALLS, prob=design_problem(safeguard=True))
+        status = sizing_status(p)
+        self.assertEqual(status.code, 'bracket')
+        self.assertTrue(status.converged)
+        self.assertTrue(valid(p))
+        # every other output is consistent with the root
+        p.model.run_apply_nonlinear()
+        self.assertLess(p.model._residuals.get_norm(), 1e-8)
+
+        p = size_motor(NO_ROOT, prob=p)
+        status = sizing_status(p)
+        self.assertEqual(status.code, 'no_root')
+        self.assertLess(status.evaluations, 60)
+        p = size_motor(STALLS, prob=p)
+        self.assertEqual(sizing_status(p).code, 'bracket')
+
+    def test_singular_errors(self):
+        # only a singular (or nan) jacobian hands over to the fallback, other errors propagate
+        self.assertTrue(_is_singular(RuntimeError("Singular entry found in 'sizing' <class Group> for row associated with state/residual 'rot_or'.")))
+        self.assertTrue(_is_singular(RuntimeError("NaN entries found in 'sizing' <class Group> for rows associated with states/residuals [rot_or].")))
+        self.assertTrue(_is_singular(np.linalg.LinAlgError('Singular matrix')))
+        self.assertFalse(_is_singular(RuntimeError('Direct solver not implemented for matrix type')))
+        self.assertFalse(_is_singular(ValueError('Singular entry found')))
+
+    def test_openmdao_internals(self):
+        # SafeguardedNewtonSolver hooks into private OpenMDAO 3.16 methods and messages, this breaks
+        # loudly when an OpenMDAO release renames them
+        solve = inspect.getsource(NonlinearSolver._solve)
+        self.assertIn('self._single_iteration()', solve)
+        self.assertIn('self._iter_get_norm()', solve)
+        self.assertTrue(callable(om.NewtonSolver._single_iteration))
+        self.assertEqual(list(inspect.signature(om.Group._transfer).parameters), ['self', 'vec_name', 'mode', 'sub'])
+
+        for slope in (0., np.nan):
+            p = om.Problem()
+            p.model.add_subsystem('line', Line(slope=slope))
+            p.model.nonlinear_solver = om.NewtonSolver(solve_subsystems=False, iprint=-1)
+            p.model.linear_solver = om.DirectSolver()
+            p.setup()
+            p['line.x'] = 2.
+            with self.assertRaises(RuntimeError) as cm:
+                p.run_model()
+            self.assertTrue(_is_singular(cm.exception), str(cm.exception))
+
+    def test_budget(self):
+        p = design_problem(safeguard=True, sizing_budget=1e-9)
+        size_motor(STALLS, prob=p)
+        self.assertEqual(sizing_status(p).code, 'budget')
+
+        p = design_problem(safeguard=True)
+        p.model.motor.sizing.nonlinear_solver.options['err_on_non_converge'] = True
+        with self.assertRaises(AnalysisError):
+            size_motor(NO_ROOT, prob=p)
+
+    def test_size_designs(self):
+        cases = {name: [val[0] if isinstance(val, tuple) else val for val in vals]
+                 for name, vals in zip(STALLS, zip(STALLS.values(), NO_ROOT.values()))}
+        p = design_problem(safeguard=True)
+        res = size_designs(p, outputs=('rot_or',), **cases)
+        self.assertEqual(list(res['status']), ['bracket', 'screened'])
+        self.assertTrue(np.isfinite(res['rot_or'][0]))
+        self.assertTrue(np.isnan(res['rot_or'][1]))
+
+        res = size_designs(p, outputs=('rot_or',), screen=False, **cases)
+        self.assertEqual(list(res['status']), ['bracket', 'no_root'])
+        self.assertTrue(np.isnan(res['rot_or'][1]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import OffDesignEvaluator, size_motor, design_geometry
+from rad_motor.analysis.scenarios import ScenarioPool
+
+
+class TestScenarioPool(unittest.TestCase):
+
+    def test_scenarios(self):
+        design = size_motor()
+        rng = np.random.default_rng(0)
+        scenarios = {}
+        for i in range(6):
+            scenarios[f'cycle{i}'] = {'rpm': rng.uniform(1000, 5400, 20 + i), 'I': rng.uniform(10, 40, 20 + i), 'P_shaft': 10000.}
+        scenarios['hot'] = {'rpm': 5400., 'I': 30., 'T_windings': (200., 'C')}
+        scenarios['magnets'] = {'rpm': [3000., 5400.], 'T_mag': [60., 120.]}
+
+        with ScenarioPool(design, max_workers=4) as pool:
+            for val, _ in pool.geometry.values():
+                self.assertFalse(val.flags.writeable)
+            results = pool.evaluate(scenarios, outputs=('Eff', 'P_wire'))
+        self.assertEqual(list(results), list(scenarios))
+
+        geometry = design_geometry(design)
+        for name, inputs in scenarios.items():
+            vec = ['T_mag'] if name == 'magnets' else []
+            ev = OffDesignEvaluator(geometry, vectorize_params=vec)
+            ev.set_inputs(**{k: v for k, v in inputs.items() if k not in ('rpm', 'I', 'P_shaft') + tuple(vec)})
+            ref = ev.evaluate(outputs=('Eff', 'P_wire'), **{k: v for k, v in inputs.items() if k in ('rpm', 'I', 'P_shaft') + tuple(vec)})
+            for output in ref:
+                np.testing.assert_allclose(results[name][output], ref[output], rtol=1e-12, err_msg=f'{name} {output}')
+
+        self.assertNotEqual(results['magnets']['Eff'][0], results['magnets']['Eff'][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import design_problem, size_motor
+from rad_motor.analysis.screen import screen_designs, size_designs, REASONS, FEASIBLE, ROT_IR, S_D, SLOT_AREA, FILL
+
+
+# reference motor plus one candidate per reason
+CASES = dict(radius_motor=[0.078225, 0.078225, 0.078225, 0.03, 0.078225],
+             t_mag=[0.0044, 0.0044, 0.08, 0.0044, 0.0044],
+             n_m=[20., 2., 20., 20., 20.],
+             b_ry=[2.4, 0.5, 2.4, 2.4, 2.4],
+             n_strands=[41., 41., 41., 41., 400.])
+
+
+class TestScreen(unittest.TestCase):
+
+    def test_reasons(self):
+        p = design_problem()
+        screen = screen_designs(p, **CASES)
+        self.assertEqual([REASONS[r] for r in screen.reason], ['feasible', 'rot_ir', 's_d', 'slot_area', 'fill'])
+        np.testing.assert_array_equal(screen.feasible, [True, False, False, False, False])
+
+        # the converged reference lies inside the brackets
+        size_motor(prob=p)
+        r = p.get_val('rot_or', units='m')[0]
+        B_g = p.get_val('B_g')[0]
+        self.assertTrue(screen.rot_or[0, 0] < r < screen.rot_or[0, 1])
+        self.assertTrue(screen.B_g[0, 0] < B_g < screen.B_g[0, 1])
+
+    def test_conservative(self):
+        # no candidate the screen rejects has a valid sizing solution
+        rng = np.random.default_rng(1)
+        n = 40
+        cases = dict(radius_motor=rng.uniform(0.02, 0.1, n), n_turns=rng.integers(4, 40, n).astype(float),
+                     I=rng.uniform(10, 80, n), k_wb=rng.uniform(0.2, 0.7, n), t_mag=rng.uniform(0.002, 0.01, n))
+        p = design_problem()
+        screen = screen_designs(p, **cases)
+        self.assertTrue(0 < screen.feasible.sum() < n)
+
+        res = size_designs(p, outputs=('J', 's_d', 'rot_ir', 'rot_or', 'B_g'), units={'rot_or': 'm'}, **cases)
+        np.testing.assert_array_equal(res['reason'], screen.reason)
+        self.assertTrue(np.all(np.isnan(res['J'][~screen.feasible])))
+        solved = screen.feasible & (np.abs(res['J'] - 10.47) < 1e-6) & (res['s_d'] > 0) & (res['rot_ir'] > 0)
+        self.assertGreater(solved.sum(), 0)
+        self.assertTrue(np.all(screen.rot_or[solved, 0] <= res['rot_or'][solved]))
+        self.assertTrue(np.all(res['rot_or'][solved] <= screen.rot_or[solved, 1]))
+
+        for i in np.flatnonzero(~screen.feasible)[:5]:
+            p = size_motor({name: val[i] for name, val in cases.items()}, prob=design_problem())
+            valid = abs(p.get_val('J')[0] - 10.47) < 1e-6 and p['s_d'][0] > 0 and p['rot_ir'][0] > 0
+            self.assertFalse(valid)
+
+    def test_reuse_after_failure(self):
+        # a diverged case leaves nan in the sizing loop, the next case must still see its own inputs
+        ref = size_motor({'radius_motor': 0.09})
+        p = design_problem()
+        with np.errstate(all='ignore'):
+            size_motor({'radius_motor': 0.2}, prob=p)
+        self.assertTrue(np.isnan(p['J'][0]))
+        size_motor({'radius_motor': 0.09}, prob=p)
+        for name in ('rot_or', 'J', 'Eff'):
+            np.testing.assert_allclose(p[name], ref[name], rtol=1e-8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import OffDesignEvaluator, size_motor
+from rad_motor.sensitivity import sobol, saltelli_sample, evaluator_model, design_model
+
+
+GEOMETRY = dict(rot_or=0.0684098557, sta_mass=0.95055653, w_slot=0.01483893, w_t=0.00479385)
+
+
+def ishigami(samples, outputs):
+    x1, x2, x3 = samples['x1'], samples['x2'], samples['x3']
+    return {'f': np.sin(x1) + 7*np.sin(x2)**2 + 0.1*x3**4*np.sin(x1)}
+
+
+class TestSobol(unittest.TestCase):
+
+    def test_saltelli_sample(self):
+        X = saltelli_sample({'a': (0, 1), 'b': (10, 20)}, 8, seed=0)
+        self.assertEqual(X['a'].shape, (32,))
+        np.testing.assert_array_equal(X['a'][16:24], X['a'][8:16])     # AB_a takes a from B
+        np.testing.assert_array_equal(X['b'][16:24], X['b'][:8])       # and b from A
+        self.assertTrue(np.all((X['b'] >= 10) & (X['b'] <= 20)))
+
+    def test_ishigami(self):
+        bounds = {name: (-np.pi, np.pi) for name in ('x1', 'x2', 'x3')}
+        res = sobol(ishigami, bounds, N=4096, outputs=('f',), seed=1)['f']
+        np.testing.assert_allclose(res.S1, [0.3139, 0.4424, 0.], atol=0.03)
+        np.testing.assert_allclose(res.ST, [0.5576, 0.4424, 0.2437], atol=0.03)
+        self.assertTrue(np.all(res.S1_conf > 0) and np.all(res.S1_conf < 0.1))
+
+    def test_off_design_motor(self):
+        bounds = {'Br_20': (1.3, 1.45), 'B_pk': (2.0, 2.4), 'k_stein': (0.004, 0.005)}
+        ev = OffDesignEvaluator(GEOMETRY, vectorize_params=tuple(bounds))
+        res = sobol(evaluator_model(ev, rpm=3000., I=20.), bounds, N=256, outputs=('Tq_max', 'P_steinmetz'), seed=2)
+
+        # torque only depends on the magnets, iron losses not at all
+        np.testing.assert_allclose(res['Tq_max'].ST, [1., 0., 0.], atol=1e-3)
+        np.testing.assert_array_equal(res['Tq_max'].ST[1:], 0.)
+        self.assertEqual(res['P_steinmetz'].ST[0], 0.)
+        self.assertTrue(np.all(res['P_steinmetz'].S1[1:] > 0.2))
+        self.assertEqual(ev.n_evals, 256 * 5)
+
+    def test_design_model(self):
+        inputs = dict(b_ry=3.0, b_sy=2.4, b_t=3.0, k=0.94, radius_motor=0.086, P_shaft=14000, rpm=5400, I=34.5)
+        model = design_model(inputs)
+        Y = model({'k_wb': np.array([0.5, 0.6])}, ('mass', 'Eff'))
+        for k, k_wb in enumerate((0.5, 0.6)):
+            p = size_motor(dict(inputs, k_wb=k_wb))
+            np.testing.assert_allclose(Y['mass'][k], p['sta_mass'] + p['rot_mass'] + p['mag_mass'], rtol=1e-10)
+            np.testing.assert_allclose(Y['Eff'][k], p['Eff'], rtol=1e-10)
+
+        res = sobol(model, {'k_wb': (0.5, 0.6), 'B_pk': (2.0, 2.4)}, N=8, outputs=('mass',), n_boot=10, seed=3)
+        self.assertGreater(res['mass'].ST[0], 0.5)
+        self.assertLess(res['mass'].ST[1], 1e-12)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from unittest import mock
+import numpy as np
+
+from rad_motor.analysis.sensitivity_map import sensitivity_map
+
+INPUTS = dict(k_wb=0.58, k=0.94, radius_motor=0.086)
+RPM = np.array([1500., 3000., 4500., 5400.])
+I = np.array([15., 25., 34.5])
+
+
+class TestSensitivityMap(unittest.TestCase):
+
+    def test_map_against_finite_differences(self):
+        wrt = ('t_mag', 'radius_motor', 'n_turns', 'I')
+        res = sensitivity_map(RPM, I, P_shaft=8000., of=('Eff', 'P_wire'), wrt=wrt, inputs=INPUTS)
+        self.assertEqual(res.values['Eff'].shape, (3, 4))
+        self.assertEqual(res.derivs['Eff', 't_mag'].shape, (3, 4))
+        self.assertEqual(res.n_solves, 4)      # one per input, not per map point
+
+        base = dict(INPUTS, t_mag=0.0044, n_turns=12.)
+        for name, h in (('t_mag', 1e-6), ('radius_motor', 1e-6), ('n_turns', 1e-5)):
+            up = sensitivity_map(RPM, I, P_shaft=8000., wrt=(), inputs=dict(base, **{name: base[name] + h}))
+            down = sensitivity_map(RPM, I, P_shaft=8000., wrt=(), inputs=dict(base, **{name: base[name] - h}))
+            fd = (up.values['Eff'] - down.values['Eff'])/(2*h)
+            np.testing.assert_allclose(res.derivs['Eff', name], fd, rtol=1e-4, atol=1e-8, err_msg=name)
+
+        # the operating point derivative is the diagonal, each point wrt its own current
+        h = 1e-4
+        up = sensitivity_map(RPM, I + h, P_shaft=8000., of=('P_wire',), wrt=(), inputs=INPUTS)
+        down = sensitivity_map(RPM, I - h, P_shaft=8000., of=('P_wire',), wrt=(), inputs=INPUTS)
+        np.testing.assert_allclose(res.derivs['P_wire', 'I'], (up.values['P_wire'] - down.values['P_wire'])/(2*h), rtol=1e-5)
+
+        # rev only for operating point inputs, a scalar input would take one solve per point
+        with self.assertRaises(ValueError):
+            sensitivity_map(RPM, I, P_shaft=8000., wrt=('t_mag', 'I'), inputs=INPUTS, mode='rev')
+        rev = sensitivity_map(RPM, I, P_shaft=8000., wrt=('I', 'rpm'), inputs=INPUTS)
+        self.assertEqual(rev.n_solves, 1)
+        np.testing.assert_allclose(rev.derivs['Eff', 'I'], res.derivs['Eff', 'I'], rtol=1e-10)
+
+    def test_uncolored_fallback(self):
+        wrt = ('t_mag', 'I')
+        ref = sensitivity_map(RPM, I, P_shaft=8000., wrt=wrt, inputs=INPUTS)
+        with mock.patch('openmdao.utils.coloring._compute_coloring', side_effect=AttributeError):
+            res = sensitivity_map(RPM, I, P_shaft=8000., wrt=wrt, inputs=INPUTS)
+        self.assertEqual(res.n_solves, 1 + RPM.size*I.size)
+        for key, val in ref.derivs.items():
+            np.testing.assert_allclose(res.derivs[key], val, rtol=1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
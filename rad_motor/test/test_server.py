@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import asyncio
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import OffDesignEvaluator, size_motor
+from rad_motor.client import MotorClient, MotorServerError
+from rad_motor.server import MotorServer
+
+
+GEOMETRY = dict(rot_or=0.0684098557, sta_mass=0.95055653, w_slot=0.01483893, w_t=0.00479385)
+DESIGN = dict(b_ry=3.0, b_sy=2.4, b_t=3.0, k_wb=0.58, k=0.94, radius_motor=0.086, P_shaft=14000, rpm=5400, I=34.5)
+
+
+class TestMotorServer(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def run_with_server(self, body, **kwargs):
+        async def run():
+            server = MotorServer(**kwargs)
+            await server.start(path=os.path.join(self.dir, 'motor.sock'))
+            client = await MotorClient.connect(path=os.path.join(self.dir, 'motor.sock'))
+            try:
+                return await body(server, client)
+            finally:
+                await client.close()
+                await server.close()
+        return asyncio.run(run())
+
+    def test_concurrent_requests_are_batched(self):
+        rpm = np.linspace(500, 5400, 20)
+        I = np.linspace(5, 34.5, 20)
+
+        async def body(server, client):
+            reqs = [client.evaluate(outputs=('Eff', 'P_wire'), inputs=GEOMETRY, rpm=r, I=i, P_shaft=5000.) for r, i in zip(rpm, I)]
+            reqs.append(client.evaluate(inputs=dict(GEOMETRY, n_turns=13), rpm=rpm[:3], I=20.))
+            results = await asyncio.gather(*reqs)
+            return results, server.n_batches
+
+        results, n_batches = self.run_with_server(body, batch_window=0.05)
+        self.assertLess(n_batches, 5)
+
+        ref = OffDesignEvaluator(GEOMETRY).evaluate(outputs=('Eff', 'P_wire'), rpm=rpm, I=I, P_shaft=5000.)
+        np.testing.assert_allclose(np.concatenate([res['Eff'] for res in results[:-1]]), ref['Eff'], rtol=1e-12)
+        np.testing.assert_allclose(np.concatenate([res['P_wire'] for res in results[:-1]]), ref['P_wire'], rtol=1e-12)
+
+        ref = OffDesignEvaluator(dict(GEOMETRY, n_turns=13)).evaluate(rpm=rpm[:3], I=20.)
+        np.testing.assert_allclose(results[-1]['Eff'], ref['Eff'], rtol=1e-12)
+
+    def test_size_then_evaluate(self):
+        async def body(server, client):
+            design = await client.size(DESIGN, outputs=('Eff',))
+            geometry = {name: design[name] for name in GEOMETRY}
+            off_design = await client.evaluate(inputs=geometry, rpm=[1000., 3000.], I=20.)
+            with self.assertRaises(MotorServerError):
+                await client.evaluate(outputs=('not_an_output',), inputs=geometry, rpm=1000.)
+            return design, off_design
+
+        design, off_design = self.run_with_server(body)
+        p = size_motor(DESIGN)
+        np.testing.assert_allclose(design['Eff'], p['Eff'], rtol=1e-12)
+        np.testing.assert_allclose(design['rot_or'][0], p.get_val('rot_or', units='m'), rtol=1e-12)
+        self.assertEqual(design['rot_or'][1], 'm')
+        self.assertEqual(off_design['Eff'].shape, (2,))
+
+    def test_bad_request_only_fails_itself(self):
+        async def body(server, client):
+            reqs = [client.evaluate(inputs=GEOMETRY, rpm=1000., I=20.),
+                    client.evaluate(outputs=('not_an_output',), inputs=GEOMETRY, rpm=2000., I=20.),
+                    client.evaluate(outputs=('P_wire',), inputs=GEOMETRY, rpm=3000., I=20.)]
+            return await asyncio.gather(*reqs, return_exceptions=True), server.n_batches
+
+        (good, bad, wire), n_batches = self.run_with_server(body, batch_window=0.05)
+        self.assertIsInstance(bad, MotorServerError)
+        self.assertIn('not_an_output', str(bad))
+        # the good requests still run together, once
+        self.assertEqual(n_batches, 1)
+        ref = OffDesignEvaluator(GEOMETRY).evaluate(outputs=('Eff', 'P_wire'), rpm=[1000., 3000.], I=20.)
+        np.testing.assert_allclose(good['Eff'], ref['Eff'][:1], rtol=1e-12)
+        np.testing.assert_allclose(wire['P_wire'], ref['P_wire'][1:], rtol=1e-12)
+
+    def test_warm_latency(self):
+        async def body(server, client):
+            await client.evaluate(inputs=GEOMETRY, rpm=1000., I=20.)      # sets up the problem
+            times = []
+            for rpm in np.linspace(1000., 5000., 20):
+                start = time.perf_counter()
+                await client.evaluate(inputs=GEOMETRY, rpm=rpm, I=20.)
+                times.append(time.perf_counter() - start)
+            return np.median(times)
+
+        # one warm off-design point is a millisecond batch window plus one small model run
+        self.assertLess(self.run_with_server(body), 0.02)
+
+    def test_malformed_line(self):
+        async def body(server, client):
+            reader, writer = await asyncio.open_unix_connection(os.path.join(self.dir, 'motor.sock'))
+            writer.write(b'{"id": 1, "nodes": \n[1, 2]\n')
+            writer.write(json.dumps({'id': 2, 'inputs': GEOMETRY, 'nodes': {'rpm': 1000., 'I': 20.}}).encode() + b'\n')
+            await writer.drain()
+            replies = [json.loads(await reader.readline()) for _ in range(3)]
+            writer.close()
+            return replies
+
+        replies = self.run_with_server(body)
+        errors = [reply for reply in replies if 'error' in reply]
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(all(reply['id'] is None for reply in errors))
+        self.assertEqual([reply['id'] for reply in replies if 'results' in reply], [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import OffDesignEvaluator
+from rad_motor.analysis.sweep import SweepStudy
+
+
+GEOMETRY = dict(rot_or=0.0684098557, sta_mass=0.95055653, w_slot=0.01483893, w_t=0.00479385,
+                B_pk=2.4, T_windings=150, T_mag=100, n_slots=24, n_m=20, n_turns=12)
+
+
+class TestSweepStudy(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'study')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_resume_and_append(self):
+        rpm, I = np.meshgrid(np.linspace(500, 5400, 10), np.linspace(5, 34.5, 5))
+        ev = OffDesignEvaluator(GEOMETRY, min_nodes=8, max_nodes=8)
+        ref = ev.evaluate(outputs=('Eff', 'P_wire'), rpm=rpm.ravel(), I=I.ravel(), P_shaft=5000.)
+
+        study = SweepStudy(self.path, outputs=('Eff', 'P_wire'))
+        study.add_cases(rpm=rpm.ravel(), I=I.ravel(), P_shaft=5000.)
+        self.assertEqual(study.run(ev, batch_size=8, max_batches=3), 24)
+
+        # a crash while writing a batch leaves only a temporary file behind
+        open(os.path.join(self.path, '.tmp_partial'), 'wb').close()
+
+        study = SweepStudy(self.path, outputs=('Eff', 'P_wire'))
+        self.assertEqual(study.done.sum(), 24)
+        ev.n_evals = 0
+        self.assertEqual(study.run(ev, batch_size=8), 26)
+        self.assertEqual(ev.n_evals, 26)
+        for name in ('Eff', 'P_wire'):
+            np.testing.assert_allclose(study.results()[name], ref[name], rtol=1e-12)
+
+        new = study.add_cases(rpm=[1234., 4321.], I=20., P_shaft=5000.)
+        np.testing.assert_equal(new, [50, 51])
+        self.assertEqual(SweepStudy(self.path, outputs=('Eff', 'P_wire')).run(ev), 2)
+
+        res = SweepStudy(self.path, outputs=('Eff', 'P_wire')).results()
+        self.assertFalse(np.any(np.isnan(res['Eff'])))
+        np.testing.assert_allclose(res['Eff'][50:], ev.evaluate(rpm=[1234., 4321.], I=20., P_shaft=5000.)['Eff'])
+
+    def test_mismatch(self):
+        study = SweepStudy(self.path, outputs=('Eff',))
+        study.add_cases(rpm=1000., I=10.)
+        with self.assertRaises(ValueError):
+            study.add_cases(rpm=1000.)
+        with self.assertRaises(ValueError):
+            SweepStudy(self.path, outputs=('Tq_max',))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import numpy as np
+import openmdao.api as om
+
+from rad_motor.motor import Motor
+from rad_motor.analysis.evaluator import OffDesignEvaluator
+
+
+GEOMETRY = dict(rot_or=0.0684098557, sta_mass=0.95055653, w_slot=0.01483893, w_t=0.00479385)
+TOLERANCES = ('gap', 't_mag', 'Br_20', 'r_strand', 'resistivity_wire')
+
+
+def tolerance_samples(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return dict(gap=rng.normal(1e-3, 2e-5, n), t_mag=rng.normal(0.0044, 2e-5, n), Br_20=rng.normal(1.39, 0.01, n),
+                r_strand=rng.normal(1.605e-4, 1e-6, n), resistivity_wire=rng.normal(1.724e-8, 1e-10, n))
+
+
+class TestVectorizeParams(unittest.TestCase):
+
+    def test_monte_carlo(self):
+        n = 100000
+        samples = tolerance_samples(n)
+        ev = OffDesignEvaluator(GEOMETRY, min_nodes=n, max_nodes=n, vectorize_params=TOLERANCES)
+        res = ev.evaluate(outputs=('Eff', 'Tq_max', 'P_wire'), rpm=3000., I=20., **samples)
+        self.assertEqual(len(ev._problems), 1)
+
+        scalar = OffDesignEvaluator(GEOMETRY)
+        for k in (0, 4711, n - 1):
+            scalar.set_inputs(**{name: val[k] for name, val in samples.items()})
+            ref = scalar.evaluate(outputs=('Eff', 'Tq_max', 'P_wire'), rpm=3000., I=20.)
+            for name, val in ref.items():
+                np.testing.assert_allclose(res[name][k], val[0], rtol=1e-12, err_msg=name)
+
+    def test_totals(self):
+        nn = 3
+        p = om.Problem()
+        p.model.add_subsystem('motor', Motor(num_nodes=nn, design=False, vectorize_params=TOLERANCES), promotes=['*'])
+        p.setup(force_alloc_complex=True)
+        for name, val in dict(GEOMETRY, **tolerance_samples(nn)).items():
+            p[name] = val
+        p['rpm'] = [1100., 3100., 5300.]
+        p.run_model()
+
+        totals = p.check_totals(of=['Eff', 'P_wire', 'Tq_max'], wrt=list(TOLERANCES), method='cs', out_stream=None)
+        for key, data in totals.items():
+            np.testing.assert_allclose(data['J_fwd'], data['J_fd'], rtol=1e-6, atol=1e-9, err_msg=str(key))
+            # every node only depends on its own parameters
+            self.assertEqual(np.count_nonzero(data['J_fwd'] - np.diag(np.diag(data['J_fwd']))), 0)
+
+    def test_sizing_params(self):
+        p = om.Problem()
+        p.model.add_subsystem('motor', Motor(num_nodes=2, design=False, vectorize_params=('k_wb',)))
+        with self.assertRaises(ValueError):
+            p.setup()
+
+
+if __name__ == '__main__':
+    unittest.main()
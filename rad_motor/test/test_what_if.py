@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+
+from rad_motor.analysis.evaluator import size_motor
+from rad_motor.analysis.what_if import WhatIf, independent_inputs
+
+
+OF = ('Eff', 'rot_or', 'sta_mass')
+
+
+class TestWhatIf(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.prob = size_motor()
+        cls.what_if = WhatIf(cls.prob, of=OF, wrt=('gap', 'k_wb', 'n_turns', 'I'))
+
+    def test_independent_inputs(self):
+        names = independent_inputs(self.prob)
+        for name in ('radius_motor', 'gap', 'k_wb', 'J_tgt', 'T_windings'):
+            self.assertIn(name, names)
+        self.assertEqual(len(names), len(set(names)))
+
+    def test_prediction(self):
+        Eff = self.prob['Eff'].copy()
+        for query in ({'gap': (1.1, 'mm')}, {'k_wb': 0.6}, {'k_wb': 0.64, 'n_turns': 13}, {'I': 36.}):
+            res = self.what_if.predict(query)
+            self.assertFalse(res.solved, query)
+            exact = self.what_if.solve(query)
+            for name in OF:
+                err = abs(res.values[name] - exact.values[name])
+                # the error estimate is the right size and the prediction within the tolerance
+                self.assertLess(err, 2*res.error[name] + 1e-12, (query, name))
+                self.assertLess(err, 1e-3*abs(exact.values[name]), (query, name))
+        np.testing.assert_allclose(self.prob['Eff'], Eff, rtol=1e-12)
+
+    def test_trust_region(self):
+        Eff = self.prob['Eff'].copy()
+        for query in ({'k_wb': 0.45}, {'T_windings': 100.}):
+            res = self.what_if.predict(query)
+            self.assertTrue(res.solved, query)
+            self.assertEqual(res.error['Eff'], 0.)
+        self.assertNotAlmostEqual(res.values['Eff'][0], Eff[0], places=4)
+        # the linearization point is restored
+        np.testing.assert_allclose(self.prob['Eff'], Eff, rtol=1e-12)
+
+    def test_first_order(self):
+        what_if = WhatIf(self.prob, of=('Eff',), wrt=('k_wb',), order=1, rtol=1e-2)
+        res = what_if.predict({'k_wb': 0.64})
+        exact = what_if.solve({'k_wb': 0.64})
+        np.testing.assert_allclose(res.values['Eff'], self.prob['Eff'] + what_if.J[0, 0]*(0.64 - 0.65), rtol=1e-14)
+        self.assertLess(abs(res.values['Eff'] - exact.values['Eff']), 2*res.error['Eff'])
+
+
+if __name__ == '__main__':
+    unittest.main()
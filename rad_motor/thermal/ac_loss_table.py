@@ -0,0 +1,119 @@
+# AC loss factor tables for the AC_power_factor interpolation of ThermalGroup.
+# Measured and FEA tables are large (several axes, hundreds of MB), so the values are memory
+# mapped from disk and handed as they are to the interpolation, which only reads the cells
+# around the evaluated points. Loaded tables are shared by path: every Motor built from the same
+# file uses one mapping. Only the (small) axes are read into memory and checked.
+
+from __future__ import absolute_import
+import os
+import struct
+import zipfile
+import numpy as np
+from openmdao.utils.units import convert_units
+
+from rad_motor.sizing.fea_table import _parse_column
+
+# ThermalGroup inputs a table can be indexed by, with the units the axes are held in (the units of the
+# loss components, T_windings is labelled 'C' there)
+AC_LOSS_AXES = {'rpm': 'rpm', 'I_peak': 'A', 'T_windings': 'C', 'r_strand': 'm'}
+# units the table axes convert from: to OpenMDAO 'C' is coulomb, a temperature axis is in degC, degF or degK
+_TABLE_UNITS = dict(AC_LOSS_AXES, T_windings='degC')
+VALUES = 'AC_power_factor'
+
+# loaded tables, by (path, modification time)
+_loaded = {}
+
+
+def _npz_memmap(path, member):
+    # memory map an uncompressed .npz member in place, np.load reads npz members into memory
+    with zipfile.ZipFile(path) as zf:
+        info = zf.getinfo(member)
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f'{path}: {member} is compressed and can not be memory mapped, save the table with np.savez')
+    with open(path, 'rb') as f:
+        f.seek(info.header_offset)
+        local = f.read(30)
+        name_len, extra_len = struct.unpack('<HH', local[26:30])
+        f.seek(info.header_offset + 30 + name_len + extra_len)
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran, dtype = read_header(f)
+        offset = f.tell()
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape, order='F' if fortran else 'C')
+
+
+class ACLossTable(object):
+    """
+    AC_power_factor over a structured grid. axes maps AC_LOSS_AXES names to (points, units) in
+    the order of the dimensions of values; values can be (and for large tables should be) a
+    read-only memmap, it is kept as it is. Only the axes and the shape are checked, checking the
+    values would read the whole table.
+    """
+
+    def __init__(self, axes, values):
+        values = values if isinstance(values, np.ndarray) else np.asarray(values, dtype=float)
+        if not np.issubdtype(values.dtype, np.floating):
+            raise ValueError(f'AC loss table values must be floating point, got {values.dtype}')
+        if values.ndim != len(axes):
+            raise ValueError(f'AC loss table values have {values.ndim} dimensions but {len(axes)} axes are given')
+
+        self.axis_names = tuple(axes)
+        self.points = []
+        for i, (name, (points, units)) in enumerate(axes.items()):
+            if name not in AC_LOSS_AXES:
+                raise ValueError(f"AC loss table axis '{name}' is not one of {tuple(AC_LOSS_AXES)}")
+            points = np.asarray(points, dtype=float)
+            if points.ndim != 1 or points.size < 2 or not np.all(np.isfinite(points)):
+                raise ValueError(f"AC loss table axis '{name}' needs 1-D, finite points, at least 2")
+            if not np.all(np.diff(points) > 0):
+                raise ValueError(f"AC loss table axis '{name}' must be strictly ascending")
+            if points.size != values.shape[i]:
+                raise ValueError(f"AC loss table axis '{name}' has {points.size} points but dimension {i} of the values has {values.shape[i]}")
+            try:
+                if units != AC_LOSS_AXES[name]:
+                    points = convert_units(points, units, _TABLE_UNITS[name])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"AC loss table axis '{name}' is in '{units}', which does not convert to '{_TABLE_UNITS[name]}'")
+            self.points.append(points)
+        self.values = values
+
+    @classmethod
+    def load(cls, path, axes=None):
+        """
+        Table from an uncompressed .npz whose members are the axes, named 'name[units]' in the
+        order of the dimensions, and 'AC_power_factor', or from a .npy of the values with the
+        axes given as {name: (points, units)}. The values are memory mapped and the table is
+        shared with earlier loads of the same, unmodified, file.
+        """
+        path = os.path.realpath(path)
+        key = (path, os.path.getmtime(path))
+        if key in _loaded and axes is None:
+            return _loaded[key]
+
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                members = data.files
+                if VALUES not in members:
+                    raise ValueError(f"AC loss table {path} has no '{VALUES}' member")
+                file_axes = {}
+                for col in members:
+                    if col == VALUES:
+                        continue
+                    name, units = _parse_column(col)
+                    file_axes[name] = (data[col], units)
+            values = _npz_memmap(path, VALUES + '.npy')
+            table = cls(file_axes if axes is None else axes, values)
+        else:
+            if axes is None:
+                raise ValueError(f'AC loss table {path}: a .npy only holds the values, give the axes')
+            table = cls(axes, np.load(path, mmap_mode='r'))
+
+        if axes is None:
+            _loaded[key] = table
+        return table
+
+    def save(self, path):
+        """save as a .npz that load memory maps (the axes in their ThermalGroup units)"""
+        members = {f'{name}[{_TABLE_UNITS[name]}]': points for name, points in zip(self.axis_names, self.points)}
+        members[VALUES] = np.asarray(self.values)
+        np.savez(path, **members)
@@ -6,22 +6,27 @@ from math import pi
 
 import openmdao.api as om
 
+from rad_motor.kernels import BACKENDS, use_jit, winding_loss_kernel, steinmetz_kernel, Workspace, winding_loss_inplace, steinmetz_inplace
+
 
 class WindingLossComp(om.ExplicitComponent):
     def initialize(self):
         self.options.declare('num_nodes', types=int)
+        self.options.declare('backend', default='numpy', values=BACKENDS, 
+                             desc='numba runs the per-node losses as one compiled loop, inplace writes them without temporaries')
     
 
     def setup(self):
         nn = self.options['num_nodes']
+        self._work = Workspace(nn)
         self.add_input('rpm', 4000*np.ones(nn), units='rpm', desc='Rotation speed')
         self.add_input('n_m', 20, desc='Number of magnets')
         self.add_input('mu_o', 1.2566e-6, units='H/m', desc='permeability of free space')    
-        self.add_input('mu_r', 1.0, units='H/m', desc='relative magnetic permeability of ferromagnetic materials') 
-        self.add_input('r_strand', 0.0001605, units='m', desc='radius of one strand of litz wire')
-        self.add_input('T_windings', 150, units='C', desc='operating temperature of windings')
-        self.add_input('T_coeff_cu', 0.00393, desc='temperature coefficient for copper')
-        self.add_input('resistivity_wire', 1.724e-8, units='ohm*m', desc='resisitivity of Cu at 20 degC')
+        self.add_input('mu_r', 1.0*np.ones(nn), units='H/m', desc='relative magnetic permeability of ferromagnetic materials') 
+        self.add_input('r_strand', 0.0001605*np.ones(nn), units='m', desc='radius of one strand of litz wire')
+        self.add_input('T_windings', 150*np.ones(nn), units='C', desc='operating temperature of windings')
+        self.add_input('T_coeff_cu', 0.00393*np.ones(nn), desc='temperature coefficient for copper')
+        self.add_input('resistivity_wire', 1.724e-8*np.ones(nn), units='ohm*m', desc='resisitivity of Cu at 20 degC')
         self.add_input('I', 30*np.ones(nn), units='A', desc='RMS current into motor')
         self.add_input('stack_length', 0.035, units='m', desc='axial length of stator')
         self.add_input('n_slots', 24, desc='number of slots')
@@ -30,30 +35,37 @@ class WindingLossComp(om.ExplicitComponent):
         self.add_input('AC_power_factor', 0.5*np.ones(nn), desc='litz wire AC power factor')
 
         self.add_output('f_e', 900*np.ones(nn), units = 'Hz', desc='electrical frequency')
-        self.add_output('r_litz', 0.0011, units='m', desc='radius of whole litz wire')
+        self.add_output('r_litz', 0.0011*np.ones(nn), units='m', desc='radius of whole litz wire')
         self.add_output('L_wire', 10, units='m', desc='length of wire for one phase')
-        self.add_output('temp_resistivity', 1.724e-8, units='ohm*m', desc='temp dependent resistivity')
-        self.add_output('R_dc', 1, units='ohm', desc= 'DC resistance')
+        self.add_output('temp_resistivity', 1.724e-8*np.ones(nn), units='ohm*m', desc='temp dependent resistivity')
+        self.add_output('R_dc', 1*np.ones(nn), units='ohm', desc= 'DC resistance')
         self.add_output('skin_depth', 0.001*np.ones(nn), units='m', desc='skin depth of wire')
-        self.add_output('A_cu', .005, units='m**2', desc='total area of copper in one slot')
+        self.add_output('A_cu', .005*np.ones(nn), units='m**2', desc='total area of copper in one slot')
         self.add_output('P_dc', 277*np.ones(nn), units='W ', desc= 'Power loss from dc resistance')
         self.add_output('P_ac', 100*np.ones(nn), units='W ', desc= 'Power loss from ac resistance')
         self.add_output('P_wire', 400*np.ones(nn), units='W ', desc= 'total power loss from wire')
 
-        r = c = np.arange(nn)  # for scalar variables only
+        r = c = np.arange(nn)     # vector inputs, diagonal
+        c0 = np.zeros(nn, dtype=int)  # scalar inputs, one column
 
-        self.declare_partials('f_e', ['n_m', 'rpm'], rows=r, cols=c)
-        self.declare_partials('r_litz', ['n_strands', 'r_strand'])
+        self.declare_partials('f_e', 'rpm', rows=r, cols=c)
+        self.declare_partials('f_e', 'n_m', rows=r, cols=c0)
+        self.declare_partials('r_litz', 'r_strand', rows=r, cols=c)
+        self.declare_partials('r_litz', 'n_strands', rows=r, cols=c0)
         self.declare_partials('L_wire', ['n_slots', 'n_turns', 'stack_length'])
-        self.declare_partials('temp_resistivity', ['resistivity_wire', 'T_coeff_cu', 'T_windings'])
-        self.declare_partials('R_dc', ['resistivity_wire', 'T_coeff_cu', 'T_windings', 'n_slots', 'n_turns', 'stack_length', 'r_strand'])
-        self.declare_partials('skin_depth', ['resistivity_wire', 'T_coeff_cu', 'T_windings', 'n_m', 'rpm', 'mu_r', 'mu_o'], rows=r, cols=c)
-        self.declare_partials('A_cu', ['n_turns', 'n_strands', 'r_strand'])
-        self.declare_partials('R_dc', ['resistivity_wire', 'T_coeff_cu', 'T_windings', 'n_slots', 'n_turns', 'stack_length', 'r_strand'])
-        self.declare_partials('skin_depth', ['resistivity_wire', 'T_coeff_cu', 'T_windings', 'n_m', 'rpm', 'mu_r', 'mu_o'], rows=r, cols=c)
-        self.declare_partials('P_dc', ['I', 'resistivity_wire', 'T_coeff_cu', 'T_windings', 'n_slots', 'n_turns', 'stack_length', 'r_strand'], rows=r, cols=c)
-        self.declare_partials('P_ac', ['AC_power_factor', 'I', 'resistivity_wire', 'T_coeff_cu', 'T_windings', 'n_slots', 'n_turns', 'stack_length', 'r_strand'], rows=r, cols=c)
-        self.declare_partials('P_wire', ['I', 'resistivity_wire', 'T_coeff_cu', 'T_windings', 'n_slots', 'n_turns', 'stack_length', 'r_strand', 'AC_power_factor'], rows=r, cols=c)
+        self.declare_partials('temp_resistivity', ['resistivity_wire', 'T_coeff_cu', 'T_windings'], rows=r, cols=c)
+        self.declare_partials('R_dc', ['resistivity_wire', 'T_coeff_cu', 'T_windings', 'r_strand'], rows=r, cols=c)
+        self.declare_partials('R_dc', ['n_slots', 'n_turns', 'stack_length'], rows=r, cols=c0)
+        self.declare_partials('A_cu', 'r_strand', rows=r, cols=c)
+        self.declare_partials('A_cu', ['n_turns', 'n_strands'], rows=r, cols=c0)
+        self.declare_partials('skin_depth', ['rpm', 'resistivity_wire', 'T_coeff_cu', 'T_windings', 'mu_r'], rows=r, cols=c)
+        self.declare_partials('skin_depth', ['n_m', 'mu_o'], rows=r, cols=c0)
+        self.declare_partials('P_dc', ['I', 'resistivity_wire', 'T_coeff_cu', 'T_windings', 'r_strand'], rows=r, cols=c)
+        self.declare_partials('P_dc', ['n_slots', 'n_turns', 'stack_length'], rows=r, cols=c0)
+        self.declare_partials('P_ac', ['AC_power_factor', 'I', 'resistivity_wire', 'T_coeff_cu', 'T_windings', 'r_strand'], rows=r, cols=c)
+        self.declare_partials('P_ac', ['n_slots', 'n_turns', 'stack_length'], rows=r, cols=c0)
+        self.declare_partials('P_wire', ['I', 'AC_power_factor', 'resistivity_wire', 'T_coeff_cu', 'T_windings', 'r_strand'], rows=r, cols=c)
+        self.declare_partials('P_wire', ['n_slots', 'n_turns', 'stack_length'], rows=r, cols=c0)
 
 
     def compute(self, inputs, outputs):
@@ -72,18 +84,54 @@ class WindingLossComp(om.ExplicitComponent):
         n_strands = inputs['n_strands']
         AC_pf = inputs['AC_power_factor']
 
-        outputs['f_e']              = n_m / 2 * rpm / 60                                            # Eqn 1.5 "Brushless PM Motor Design" by D. Hansleman                                       
+        if self.options['backend'] == 'inplace' and not self.under_complex_step: 
+            self._compute_inplace(inputs, outputs)
+            return
+
         outputs['r_litz']           = (np.sqrt(n_strands) * 1.154 * r_strand*2)/2                   # New England Wire
         outputs['L_wire']           = (n_slots/3 * n_turns) * (stack_length*2 + .017*2)              
         outputs['temp_resistivity'] = (resistivity_wire * (1 + T_coeff_cu*(T_windings-20)))         # Eqn 4.14 "Brushless PM Motor Design" by D. Hansleman
         outputs['A_cu']             = n_turns * n_strands * 2 * np.pi * r_strand**2
         outputs['R_dc']             = outputs['temp_resistivity'] * outputs['L_wire'] / ((np.pi*(r_strand)**2)*41)
+
+        if use_jit(self.options['backend']) and not self.under_complex_step:
+            winding_loss_kernel(rpm, I, AC_pf, n_m[0], outputs['temp_resistivity'], outputs['R_dc'], mu_r, mu_o[0],
+                                outputs['f_e'], outputs['skin_depth'], outputs['P_dc'], outputs['P_ac'], outputs['P_wire'])
+            return
+
+        outputs['f_e']              = n_m / 2 * rpm / 60                                            # Eqn 1.5 "Brushless PM Motor Design" by D. Hansleman                                       
         outputs['skin_depth']       = np.sqrt( outputs['temp_resistivity'] / (np.pi * outputs['f_e'] * mu_r * mu_o) )
         outputs['P_dc']             = (I*np.sqrt(2))**2 * (outputs['R_dc']) *3/2
         outputs['P_ac']             = AC_pf * outputs['P_dc']
         outputs['P_wire']           = outputs['P_dc'] + outputs['P_ac']
 
+    def _compute_inplace(self, inputs, outputs): 
+        r_strand = inputs['r_strand']
+        n_strands = inputs['n_strands'][0]
+        n_turns = inputs['n_turns'][0]
+        temp_resistivity = outputs['temp_resistivity']
+        R_dc = outputs['R_dc']
+        A_cu = outputs['A_cu']
+
+        np.multiply(r_strand, np.sqrt(n_strands) * 1.154, out=outputs['r_litz'])
+        outputs['L_wire'] = L_wire = (inputs['n_slots']/3 * n_turns) * (inputs['stack_length']*2 + .017*2)
+        np.subtract(inputs['T_windings'], 20, out=temp_resistivity)
+        temp_resistivity *= inputs['T_coeff_cu']
+        temp_resistivity += 1
+        temp_resistivity *= inputs['resistivity_wire']
+        np.multiply(r_strand, r_strand, out=A_cu)
+        np.multiply(A_cu, np.pi*41/L_wire[0], out=R_dc)
+        np.divide(temp_resistivity, R_dc, out=R_dc)
+        A_cu *= n_turns * n_strands * 2 * np.pi
+
+        winding_loss_inplace(inputs['rpm'], inputs['I'], inputs['AC_power_factor'], inputs['n_m'][0], temp_resistivity, R_dc, 
+                             inputs['mu_r'], inputs['mu_o'][0], outputs['f_e'], outputs['skin_depth'], outputs['P_dc'], outputs['P_ac'], outputs['P_wire'])
+
     def compute_partials(self, inputs, J):
+        if self.options['backend'] == 'inplace': 
+            self._compute_partials_inplace(inputs, J)
+            return
+
         rpm = inputs['rpm']
         n_m = inputs['n_m']
         mu_o = inputs['mu_o']
@@ -110,7 +158,7 @@ class WindingLossComp(om.ExplicitComponent):
         d_f_e__d_rpm = J['f_e', 'rpm'] = n_m / 2 * 1 / 60 
 
         J['r_litz', 'n_strands'] = (n_strands**-.5 * 1.154 * r_strand*2)/4 
-        J['r_litz', 'r_strand'] = (np.sqrt(n_strands) * 1.154 * 2)/2 
+        J['r_litz', 'r_strand'] = (np.sqrt(n_strands) * 1.154 * 2)/2 * np.ones_like(r_strand)
 
         d_L_wire__d_n_slots = J['L_wire', 'n_slots'] = (1/3 * n_turns) * (stack_length*2 + .017*2)
         d_L_wire__d_n_turns = J['L_wire', 'n_turns'] = (n_slots/3) * (stack_length*2 + .017*2)
@@ -169,23 +217,117 @@ class WindingLossComp(om.ExplicitComponent):
         J['P_wire', 'r_strand'] = d_P_dc__d_r_strand + d_P_ac__d_r_strand
         J['P_wire', 'AC_power_factor'] = d_P_ac__d_AC_pf
 
+    def _compute_partials_inplace(self, inputs, J): 
+        # the partials of compute_partials, written into J and four workspace buffers
+        w0, w1, w2, w3 = (self._work[i] for i in range(4))
+        rpm = inputs['rpm']
+        n_m = inputs['n_m'][0]
+        mu_o = inputs['mu_o'][0]
+        mu_r = inputs['mu_r']
+        r_strand = inputs['r_strand']
+        T_windings = inputs['T_windings']
+        T_coeff_cu = inputs['T_coeff_cu']
+        resistivity_wire = inputs['resistivity_wire']
+        I = inputs['I']
+        stack_length = inputs['stack_length'][0]
+        n_slots = inputs['n_slots'][0]
+        n_turns = inputs['n_turns'][0]
+        n_strands = inputs['n_strands'][0]
+        AC_pf = inputs['AC_power_factor']
+        L_wire = (n_slots/3 * n_turns) * (stack_length*2 + .017*2)
+        d_L_wire = {'n_slots': (1/3 * n_turns) * (stack_length*2 + .017*2), 'n_turns': (n_slots/3) * (stack_length*2 + .017*2), 
+                    'stack_length': (n_slots/3 * n_turns) * 2}
+        node_wrt = ('resistivity_wire', 'T_coeff_cu', 'T_windings')
+
+        np.multiply(rpm, 1 / 120, out=J['f_e', 'n_m'])
+        J['f_e', 'rpm'] = n_m / 120
+        np.multiply(r_strand, n_strands**-.5 * 1.154 / 2, out=J['r_litz', 'n_strands'])
+        J['r_litz', 'r_strand'] = np.sqrt(n_strands) * 1.154
+        for name, d in d_L_wire.items(): 
+            J['L_wire', name] = d
+
+        # w0 = r_strand**2, then 1/(pi*r_strand**2*41)
+        np.multiply(r_strand, r_strand, out=w0)
+        np.multiply(w0, n_strands * 2 * np.pi, out=J['A_cu', 'n_turns'])
+        np.multiply(w0, n_turns * 2 * np.pi, out=J['A_cu', 'n_strands'])
+        np.multiply(r_strand, n_turns * n_strands * 4 * pi, out=J['A_cu', 'r_strand'])
+        w0 *= np.pi*41
+        np.reciprocal(w0, out=w0)
+
+        # temp_resistivity and R_dc, w1 = temp_resistivity, w2 = temp_resistivity/(pi*r_strand**2*41)
+        d_tr = J['temp_resistivity', 'resistivity_wire']
+        np.subtract(T_windings, 20, out=d_tr)
+        np.multiply(d_tr, resistivity_wire, out=J['temp_resistivity', 'T_coeff_cu'])
+        d_tr *= T_coeff_cu
+        d_tr += 1
+        np.multiply(resistivity_wire, T_coeff_cu, out=J['temp_resistivity', 'T_windings'])
+        np.multiply(resistivity_wire, d_tr, out=w1)
+        for name in node_wrt: 
+            np.multiply(J['temp_resistivity', name], w0, out=J['R_dc', name])
+            J['R_dc', name] *= L_wire
+        np.multiply(w1, w0, out=w2)
+        for name, d in d_L_wire.items(): 
+            np.multiply(w2, d, out=J['R_dc', name])
+        # w0 = R_dc
+        np.multiply(w2, L_wire, out=w0)
+        np.divide(w0, r_strand, out=J['R_dc', 'r_strand'])
+        J['R_dc', 'r_strand'] *= -2
+
+        # skin depth, w2 = f_e, w3 = skin_depth, then w1 = skin_depth/f_e and 0.5/(skin_depth*pi*f_e*mu)
+        np.multiply(rpm, n_m / 120, out=w2)
+        np.multiply(w2, mu_r, out=w3)
+        w3 *= pi*mu_o
+        np.divide(w1, w3, out=w3)
+        np.sqrt(w3, out=w3)
+        np.divide(w3, w2, out=w1)
+        np.multiply(w1, rpm, out=J['skin_depth', 'n_m'])
+        J['skin_depth', 'n_m'] *= -0.5 / 120
+        np.multiply(w1, -0.5 * n_m / 120, out=J['skin_depth', 'rpm'])
+        np.multiply(w3, w2, out=w1)
+        w1 *= mu_r
+        w1 *= 2*pi*mu_o
+        np.reciprocal(w1, out=w1)
+        for name in node_wrt: 
+            np.multiply(w1, J['temp_resistivity', name], out=J['skin_depth', name])
+        np.multiply(w3, -0.5 / mu_o, out=J['skin_depth', 'mu_o'])
+        np.divide(w3, mu_r, out=J['skin_depth', 'mu_r'])
+        J['skin_depth', 'mu_r'] *= -0.5
+
+        # losses, w1 = 3*I**2, w2 = P_dc
+        np.multiply(I, w0, out=J['P_dc', 'I'])
+        J['P_dc', 'I'] *= 6
+        np.multiply(I, I, out=w1)
+        w1 *= 3
+        np.multiply(w1, w0, out=w2)
+        for name in node_wrt + tuple(d_L_wire) + ('r_strand',): 
+            np.multiply(w1, J['R_dc', name], out=J['P_dc', name])
+        J['P_ac', 'AC_power_factor'] = w2
+        J['P_wire', 'AC_power_factor'] = w2
+        for name in ('I',) + node_wrt + tuple(d_L_wire) + ('r_strand',): 
+            np.multiply(AC_pf, J['P_dc', name], out=J['P_ac', name])
+            np.add(J['P_dc', name], J['P_ac', name], out=J['P_wire', name])
+
+
 class SteinmetzLossComp(om.ExplicitComponent):
     def initialize(self):
         self.options.declare('num_nodes', types=int)
+        self.options.declare('backend', default='numpy', values=BACKENDS, 
+                             desc='numba runs the per-node losses as one compiled loop, inplace writes them without temporaries')
 
     def setup(self):
         nn = self.options['num_nodes']
+        self._work = Workspace(nn)
         self.add_input('f_e', 900*np.ones(nn), units='Hz', desc='Electrical frequency')
-        self.add_input('B_pk', 2.05, units='T', desc='Peak magnetic field in Tesla')
-        self.add_input('alpha_stein', 1.286, desc='Alpha coefficient for steinmetz, constant')
-        self.add_input('beta_stein', 1.76835, desc='Beta coefficient for steinmentz, dependent on freq')  
-        self.add_input('k_stein', 0.0044, desc='k constant for steinmentz')
-        self.add_input('sta_mass', 1, units='kg', desc='total mass of back-iron')
+        self.add_input('B_pk', 2.05*np.ones(nn), units='T', desc='Peak magnetic field in Tesla')
+        self.add_input('alpha_stein', 1.286*np.ones(nn), desc='Alpha coefficient for steinmetz, constant')
+        self.add_input('beta_stein', 1.76835*np.ones(nn), desc='Beta coefficient for steinmentz, dependent on freq')  
+        self.add_input('k_stein', 0.0044*np.ones(nn), desc='k constant for steinmentz')
+        self.add_input('sta_mass', 1*np.ones(nn), units='kg', desc='total mass of back-iron')
 
         self.add_output('P_steinmetz', 200*np.ones(nn), units='W', desc='Simplified steinmetz losses')
 
-        r = c = np.arange(nn)  # for scalar variables only
-        self.declare_partials('P_steinmetz', ['k_stein', 'f_e', 'alpha_stein', 'B_pk', 'beta_stein', 'sta_mass'], rows=r, cols=c)
+        r = c = np.arange(nn)
+        self.declare_partials('P_steinmetz', ['f_e', 'k_stein', 'alpha_stein', 'B_pk', 'beta_stein', 'sta_mass'], rows=r, cols=c)
 
     def compute(self, inputs, outputs):
         f_e = inputs['f_e']
@@ -195,6 +337,13 @@ class SteinmetzLossComp(om.ExplicitComponent):
         k_stein = inputs['k_stein']
         sta_mass = inputs['sta_mass']
 
+        if use_jit(self.options['backend']) and not self.under_complex_step:
+            steinmetz_kernel(f_e, alpha_stein, k_stein * B_pk**beta_stein * sta_mass, outputs['P_steinmetz'])
+            return
+        if self.options['backend'] == 'inplace' and not self.under_complex_step: 
+            steinmetz_inplace(f_e, alpha_stein, B_pk, beta_stein, k_stein, sta_mass, outputs['P_steinmetz'], self._work)
+            return
+
         outputs['P_steinmetz'] = k_stein * f_e**alpha_stein * B_pk**beta_stein * sta_mass
 
     def compute_partials(self, inputs, J):
@@ -205,6 +354,28 @@ class SteinmetzLossComp(om.ExplicitComponent):
         k_stein = inputs['k_stein']
         sta_mass = inputs['sta_mass']
 
+        if self.options['backend'] == 'inplace': 
+            # w0 = B_pk**beta_stein, w1 = f_e**alpha_stein, then w0 = P_steinmetz
+            w0, w1 = self._work[0], self._work[1]
+            np.power(B_pk, beta_stein, out=w0)
+            np.power(f_e, alpha_stein, out=w1)
+            for name, other in (('k_stein', sta_mass), ('sta_mass', k_stein)): 
+                np.multiply(w0, w1, out=J['P_steinmetz', name])
+                J['P_steinmetz', name] *= other
+            for name, x, p, other in (('f_e', f_e, alpha_stein, w0), ('B_pk', B_pk, beta_stein, w1)): 
+                d = J['P_steinmetz', name]
+                np.subtract(p, 1, out=d)
+                np.power(x, d, out=d)
+                d *= p
+                d *= other
+                d *= k_stein
+                d *= sta_mass
+            np.multiply(J['P_steinmetz', 'k_stein'], k_stein, out=w0)
+            for name, x in (('alpha_stein', f_e), ('beta_stein', B_pk)): 
+                np.log(x, out=J['P_steinmetz', name])
+                J['P_steinmetz', name] *= w0
+            return
+
         J['P_steinmetz', 'k_stein'] = f_e**alpha_stein * B_pk**beta_stein * sta_mass
         J['P_steinmetz', 'f_e'] = alpha_stein*k_stein * f_e**(alpha_stein-1) * B_pk**beta_stein * sta_mass
         J['P_steinmetz', 'alpha_stein'] = k_stein * f_e**alpha_stein * B_pk**beta_stein * sta_mass * np.log(f_e)
@@ -215,3 +386,73 @@ class SteinmetzLossComp(om.ExplicitComponent):
 
 
 
+
+
+def steinmetz_table(alpha_stein=1.286, beta_stein=1.76835, k_stein=0.0044, 
+                    f_e=np.geomspace(10, 5000, 12), B_pk=np.linspace(0.2, 2.4, 12)):
+    """(f_e [Hz], B_pk [T], loss density [W/kg]) table of the Steinmetz fit used by SteinmetzLossComp."""
+    f, B = np.meshgrid(f_e, B_pk, indexing='ij')
+    return f_e, B_pk, k_stein * f**alpha_stein * B**beta_stein
+
+
+class CoreLossTableComp(om.ExplicitComponent):
+    """
+    Iron losses from a measured (f_e, B_pk) loss-density table, e.g. Hiperco-50 data sheet curves.
+    The table is interpolated bilinearly in log(f_e), log(B_pk), log(loss) space, which is exact for a 
+    Steinmetz power law and extrapolates along the local exponents outside the table. 
+    """
+    def initialize(self):
+        self.options.declare('num_nodes', types=int)
+        self.options.declare('table', default=steinmetz_table(), types=tuple, 
+                             desc='(f_e [Hz], B_pk [T], loss density [W/kg] of shape (len(f_e), len(B_pk)))')
+
+    def setup(self):
+        nn = self.options['num_nodes']
+        self.add_input('f_e', 900*np.ones(nn), units='Hz', desc='Electrical frequency')
+        self.add_input('B_pk', 2.05*np.ones(nn), units='T', desc='Peak magnetic field in Tesla')
+        self.add_input('sta_mass', 1*np.ones(nn), units='kg', desc='total mass of back-iron')
+
+        self.add_output('P_steinmetz', 200*np.ones(nn), units='W', desc='iron losses')
+
+        r = c = np.arange(nn)
+        self.declare_partials('P_steinmetz', ['f_e', 'B_pk', 'sta_mass'], rows=r, cols=c)
+
+        f_e, B_pk, loss = (np.asarray(a, dtype=float) for a in self.options['table'])
+        if loss.shape != (f_e.size, B_pk.size):
+            raise ValueError(f'{self.msginfo}: loss table has shape {loss.shape}, expected {(f_e.size, B_pk.size)}.')
+        if np.any(loss <= 0) or np.any(f_e <= 0) or np.any(B_pk <= 0):
+            raise ValueError(f'{self.msginfo}: the loss table must be positive.')
+
+        # per cell, log(loss) = a + b*x + c*y + d*x*y with x = log(f_e), y = log(B_pk)
+        x, y, z = np.log(f_e), np.log(B_pk), np.log(loss)
+        x0, x1, y0, y1 = x[:-1, None], x[1:, None], y[None, :-1], y[None, 1:]
+        z00, z10, z01, z11 = z[:-1, :-1], z[1:, :-1], z[:-1, 1:], z[1:, 1:]
+        dx, dy = x1 - x0, y1 - y0
+        d = (z11 - z10 - z01 + z00) / (dx*dy)
+        b = (z10 - z00) / dx - d*y0
+        c = (z01 - z00) / dy - d*x0
+        a = z00 - b*x0 - c*y0 - d*x0*y0
+        self._x, self._y = x, y
+        self._coef = np.stack([a, b, c, d], axis=-1)
+
+    def _lookup(self, f_e, B_pk):
+        x, y = np.log(f_e), np.log(B_pk)
+        i = np.clip(np.searchsorted(self._x, x.real) - 1, 0, self._x.size - 2)
+        j = np.clip(np.searchsorted(self._y, y.real) - 1, 0, self._y.size - 2)
+        a, b, c, d = self._coef[i, j].T
+        p = np.exp(a + b*x + c*y + d*x*y)
+        return p, b + d*y, c + d*x
+
+    def compute(self, inputs, outputs):
+        p, _, _ = self._lookup(inputs['f_e'], inputs['B_pk'])
+        outputs['P_steinmetz'] = p * inputs['sta_mass']
+
+    def compute_partials(self, inputs, J):
+        f_e = inputs['f_e']
+        B_pk = inputs['B_pk']
+        sta_mass = inputs['sta_mass']
+
+        p, dlnp_dlnf, dlnp_dlnB = self._lookup(f_e, B_pk)
+        J['P_steinmetz', 'f_e'] = p * sta_mass * dlnp_dlnf / f_e
+        J['P_steinmetz', 'B_pk'] = p * sta_mass * dlnp_dlnB / B_pk
+        J['P_steinmetz', 'sta_mass'] = p
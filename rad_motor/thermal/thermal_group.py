@@ -4,7 +4,10 @@ from math import pi
 
 import openmdao.api as om
 
-from rad_motor.thermal.motor_losses import WindingLossComp, SteinmetzLossComp
+from rad_motor.thermal.motor_losses import WindingLossComp, SteinmetzLossComp, CoreLossTableComp, steinmetz_table
+from rad_motor.thermal.ac_loss_table import ACLossTable, AC_LOSS_AXES
+from rad_motor.kernels import BACKENDS
+from rad_motor.node_params import promote_node_inputs
 
 motor_loss_data = np.array([
 # I:   10          14.4          18.9        23.3          27.8        32.2          36.7        41.1          45.6        50
@@ -24,38 +27,73 @@ motor_loss_data = np.array([
   [6.14424586,  3.044548373, 1.859187116, 1.282938888, 0.959527238, 0.759635469, 0.627167766, 0.534597704, 0.467133872, 0.416252825]]  #    = 5400
 )
 
+# AC loss factor of the reference motor, over rpm and I_peak
+AC_LOSS_REFERENCE = ACLossTable({'rpm': (np.array([200, 600, 1000, 1800, 2200, 3000, 3400, 4200, 5000, 5400]), 'rpm'),  #  1400, 2600,  3800, 4600
+                                 'I_peak': (np.array([10, 14.4, 18.9, 23.3, 27.8, 32.2, 36.7, 41.1, 45.6, 50]), 'A')}, 
+                                motor_loss_data)
+# AC loss table inputs start at these values (the WindingLossComp defaults for the shared ones)
+AC_LOSS_DEFAULTS = {'rpm': 5400, 'I_peak': 50, 'T_windings': 150, 'r_strand': 0.0001605}
+
+
+CORE_LOSS_MODELS = ('steinmetz', 'table')
+
+# inputs of the loss components that can be given per node
+LOSS_PARAMS = ('resistivity_wire', 'T_coeff_cu', 'T_windings', 'r_strand', 'mu_r', 'alpha_stein', 'beta_stein', 'k_stein', 'B_pk', 'sta_mass')
 
 
 class ThermalGroup(om.Group):
     def initialize(self):
         self.options.declare('num_nodes', types=int)
+        self.options.declare('backend', default='numpy', values=BACKENDS)
+        self.options.declare('core_loss', default='steinmetz', values=CORE_LOSS_MODELS, 
+                             desc='steinmetz: scalar B_pk and fit coefficients, table: per-node B_pk and a (f_e, B_pk) loss table')
+        self.options.declare('core_loss_table', default=steinmetz_table(), types=tuple, 
+                             desc='(f_e [Hz], B_pk [T], loss density [W/kg]) for core_loss=table')
+        self.options.declare('vec_params', default=(), types=(tuple, list), desc='LOSS_PARAMS given per node')
+        self.options.declare('ac_loss_table', default=AC_LOSS_REFERENCE, types=ACLossTable, 
+                             desc='AC_power_factor table over some of rpm, I_peak, T_windings and r_strand')
 
     def setup(self):
         nn = self.options['num_nodes']
+        backend = self.options['backend']
+        vec_params = self.options['vec_params']
+        # shared inputs whose scalar default promote_node_inputs has set
+        defaulted = set()
 
-        self.add_subsystem('comp', om.ExecComp('I_peak= I*2**0.5', I={'value': np.ones(nn), 'units':'A'}), promotes_inputs=['I'], promotes_outputs=['I_peak'])
+        self.add_subsystem('comp', om.ExecComp('I_peak= I*2**0.5', I={'value': np.ones(nn), 'units':'A'}, I_peak={'value': np.ones(nn), 'units':'A'},
+                                               has_diag_partials=True), promotes_inputs=['I'], promotes_outputs=['I_peak'])
 
 
-        motor_interp = om.MetaModelStructuredComp(method='scipy_slinear', extrapolate=True)
-    
-        rpm_data = np.array([200, 600, 1000, 1800, 2200, 3000, 3400, 4200, 5000, 5400])  #  1400, 2600,  3800, 4600
-        current_data = np.array([10, 14.4, 18.9, 23.3, 27.8, 32.2, 36.7, 41.1, 45.6, 50])
-        
-        motor_interp.add_input('rpm', 5400*np.ones(nn), training_data= rpm_data, units='rpm' )
-        motor_interp.add_input('I_peak', 50, training_data=current_data, units='A')
-        motor_interp.add_output('AC_power_factor', 0.5, training_data=motor_loss_data)
+        # the table values (possibly a memmap) go to the interpolation as they are, it only reads the cells it needs
+        ac_loss = self.options['ac_loss_table']
+        motor_interp = om.MetaModelStructuredComp(method='slinear', extrapolate=True, vec_size=nn)
+        for name, points in zip(ac_loss.axis_names, ac_loss.points): 
+            motor_interp.add_input(name, AC_LOSS_DEFAULTS[name], training_data=points, units=AC_LOSS_AXES[name])
+        motor_interp.add_output('AC_power_factor', 0.5, training_data=ac_loss.values)
         self.add_subsystem('ac_power_factor_interp', motor_interp, 
-                            promotes_inputs=['rpm', 'I_peak'], promotes_outputs=['AC_power_factor'])
+                            promotes_inputs=[name for name in ac_loss.axis_names if name in ('rpm', 'I_peak')], 
+                            promotes_outputs=['AC_power_factor'])
+        promote_node_inputs(self, 'ac_power_factor_interp', [name for name in ac_loss.axis_names if name in ('T_windings', 'r_strand')], 
+                            nn, vec_params, defaulted)
 
         self.add_subsystem(name='copperloss', 
-                           subsys=WindingLossComp(num_nodes=nn),
-                           promotes_inputs=['resistivity_wire', 'stack_length', 'n_slots', 'n_turns', 'T_coeff_cu', 'I',
-                                             'T_windings', 'r_strand', 'n_m', 'mu_o', 'mu_r', 'n_strands', 'rpm', 'AC_power_factor'],
+                           subsys=WindingLossComp(num_nodes=nn, backend=backend),
+                           promotes_inputs=['stack_length', 'n_slots', 'n_turns', 'I',
+                                             'n_m', 'mu_o', 'n_strands', 'rpm', 'AC_power_factor'],
                            promotes_outputs=['A_cu', 'f_e', 'r_litz', 'P_dc', 'P_ac', 'P_wire', 'L_wire', 'R_dc', 'skin_depth', 'temp_resistivity'])
+        promote_node_inputs(self, 'copperloss', ['resistivity_wire', 'T_coeff_cu', 'T_windings', 'r_strand', 'mu_r'], nn, vec_params, defaulted)
 
 
-        self.add_subsystem(name = 'steinmetzloss',
-                           subsys = SteinmetzLossComp(num_nodes=nn),
-                           promotes_inputs=['alpha_stein', 'B_pk', 'f_e', 'beta_stein', 'k_stein', 'sta_mass'],
-                           promotes_outputs = ['P_steinmetz'])
+        if self.options['core_loss'] == 'table': 
+            self.add_subsystem(name = 'steinmetzloss',
+                               subsys = CoreLossTableComp(num_nodes=nn, table=self.options['core_loss_table']),
+                               promotes_inputs=['B_pk', 'f_e'],
+                               promotes_outputs = ['P_steinmetz'])
+            promote_node_inputs(self, 'steinmetzloss', ['sta_mass'], nn, vec_params, defaulted)
+        else: 
+            self.add_subsystem(name = 'steinmetzloss',
+                               subsys = SteinmetzLossComp(num_nodes=nn, backend=backend),
+                               promotes_inputs=['f_e'],
+                               promotes_outputs = ['P_steinmetz'])
+            promote_node_inputs(self, 'steinmetzloss', ['alpha_stein', 'B_pk', 'beta_stein', 'k_stein', 'sta_mass'], nn, vec_params, defaulted)
 
@@ -1,9 +1,10 @@
-from distutils.core import setup
+from setuptools import setup
 
 setup(name='rad_motor',
       version='1.0.0',
       packages=[
           'rad_motor',
+          'rad_motor/analysis',
           'rad_motor/electromagnetics',
           'rad_motor/materials',
           'rad_motor/sizing', 
@@ -11,6 +12,11 @@ setup(name='rad_motor',
       ],
 
       install_requires=[
-        'openmdao>=2.0.0',
-      ]
+        'openmdao==3.16.*',      # the solvers use OpenMDAO 3.16 internals, see test_safeguard
+      ],
+
+      entry_points={
+          'console_scripts': ['rad-motor=rad_motor.cli:console_main',
+                              'rad-motor-server=rad_motor.server:main'],
+      },
 )